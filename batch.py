@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+import argparse
+import concurrent.futures
+import json
+import multiprocessing as mp
+import os
+import time
+from typing import Any, Dict, List, Tuple
+
+# Workers only save plots to files
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib import pyplot as plt
+
+import src.Kernels as Kernels
+import src.SolverService as SolverService
+from src.NetworkVisualizer import NetworkVisualizer
+
+
+def loadManifest(fileName: str) -> List[Dict[str, Any]]:
+    """
+    Read list of jobs from JSON manifest. It's either a list of jobs or an object
+    with "jobs" list and "defaults" parameters shared by all of them:
+        {"defaults": {"epochs": 500},
+         "jobs": [{"model": "polska.txt", "params": {"n": 20}, "output": "output/polska"}]}
+    """
+    with open(fileName) as file:
+        manifest = json.load(file)
+    if isinstance(manifest, list):
+        manifest = {'jobs': manifest}
+
+    defaults = manifest.get('defaults', {})
+    jobs = []
+    for i, job in enumerate(manifest['jobs']):
+        if 'model' not in job:
+            raise KeyError(f'Job {i} has no model')
+        jobs.append({
+            'id': i,
+            'model': job['model'],
+            'params': {**defaults, **job.get('params', {})},
+            'output': job.get('output', os.path.join('output', f'job_{i}')),
+        })
+    return jobs
+
+
+def jobSize(job: Dict[str, Any]) -> int:
+    """
+    Estimated size of the job - number of demands times number of their admissible paths
+    """
+    index = SolverService.loadModel(job['model']).getIndex()
+    return index.demandsCount() * index.totalPathsCount()
+
+
+def sortJobs(jobs: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Parse models of @jobs and sort them by size, the biggest first, so they don't end up
+    running alone at the end. Return sorted jobs and results of jobs whose model couldn't
+    be loaded - they fail right away, without stopping the rest of the batch
+    """
+    sizes: Dict[int, int] = {}
+    failures: List[Dict[str, Any]] = []
+    for job in jobs:
+        try:
+            sizes[job['id']] = jobSize(job)
+        except Exception as e:
+            failures.append({'id': job['id'], 'model': job['model'], 'error': f'{type(e).__name__}: {e}'})
+    runnable = [job for job in jobs if job['id'] in sizes]
+    return sorted(runnable, key=lambda job: sizes[job['id']], reverse=True), failures
+
+
+def runJob(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Solve single job in worker process and save its results to job's output directory
+    """
+    start = time.perf_counter()
+    genetic = SolverService.createAlgorithm(SolverService.loadModel(job['model']), job['params'])
+    score = genetic.run(True)
+
+    visualizer = NetworkVisualizer(job['output'], False)
+    genetic.result(visualizer)
+    plt.close('all')
+
+    return {'id': job['id'], 'score': score, 'time': time.perf_counter() - start}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Solve many network design problems concurrently')
+    parser.add_argument('manifest', metavar='FILE', type=str, help='JSON file listing jobs to solve')
+    parser.add_argument('--workers', '-w', metavar='N', type=int, default=os.cpu_count(),
+                        help='Number of worker processes')
+    parser.add_argument('--backend', metavar='NAME', type=str, default='auto', choices=Kernels.BACKENDS,
+                        help='Evaluation backend (auto / python / numpy / numba)')
+    args = parser.parse_args()
+
+    Kernels.useBackend(args.backend)
+    jobs = loadManifest(args.manifest)
+
+    # Models are parsed once here, forked workers inherit them. With other start
+    # methods every worker parses each model at most once
+    runnable, failures = sortJobs(jobs)
+    for failure in failures:
+        print(f'[-] Job {failure["id"]} ({failure["model"]}) failed: {failure["error"]}')
+
+    context = mp.get_context('fork') if 'fork' in mp.get_all_start_methods() else None
+    failed = len(failures)
+    with concurrent.futures.ProcessPoolExecutor(args.workers, mp_context=context,
+                                                initializer=Kernels.useBackend,
+                                                initargs=(args.backend,)) as pool:
+        futures = {pool.submit(runJob, job): job for job in runnable}
+        for future in concurrent.futures.as_completed(futures):
+            job = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failed += 1
+                print(f'[-] Job {job["id"]} ({job["model"]}) failed: {type(e).__name__}: {e}')
+                continue
+            print(f'[i] Job {job["id"]} ({job["model"]}) finished in {result["time"]:.1f}s '
+                  f'with score {result["score"]}, results saved to {job["output"]}')
+
+    print(f'[i] Finished {len(jobs) - failed} of {len(jobs)} jobs')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,27 @@
 #!/usr/bin/env python3
 import argparse
 import multiprocessing as mp
-import random
 
 from src.GeneticAlgorithm import GeneticAlgorithm
 from src.NetworkModel import NetworkModel
+from src.RandomStream import RandomStream
+from src.ResultsStore import ResultsStore
 
 
-def run(q: mp.Queue, net, pop, epochs, mut, single, x, sel, succ, mod, xm):
+def run(q: mp.Queue, idx, net, pop, epochs, mut, single, x, sel, succ, mod, xm, rng):
+    score = None
     try:
-        alg = GeneticAlgorithm(net, pop, epochs, mut, single, x, sel, succ, mod, xm)
-        q.put(alg.run(True))
+        alg = GeneticAlgorithm(net, pop, epochs, mut, single, x, sel, succ, mod, xm, rng=rng)
+        score = alg.run(True)
     except KeyboardInterrupt:
         # Don't care didn't ask plus you're a child
         # (disable traceback on Ctrl-C)
         pass
+    except Exception as e:
+        print(f'\n[-] Run {idx} failed: {type(e).__name__}: {e}')
+    finally:
+        # Parent waits for every run, failed ones send None
+        q.put((idx, score))
 
 
 def main():
@@ -24,76 +31,106 @@ def main():
                         help='Number of cycles done before returning result')
     parser.add_argument('--model', '-f', metavar='FILE', type=str, default='polska.txt',
                         help='Path to file describing network model')
-    parser.add_argument('--log', '-l', metavar='FILE', type=str, default='log.csv', help='Path to log file')
+    parser.add_argument('--store', metavar='FILE', type=str, default='results.db',
+                        help='SQLite file with scores of finished runs, which are not repeated')
+    parser.add_argument('--log', '-l', metavar='FILE', type=str, default=None, help='Path to CSV log file')
+    parser.add_argument('--report', metavar='PARAM', type=str, action='append', default=[],
+                        help='Print score statistics per value of parameter from the store instead of running, '
+                             'only for runs with the same --multi-mode and --modularity (can be repeated)')
     parser.add_argument('--multi-mode', dest='single_mode', action='store_false',
                         help='Whether to solve problem assuming that network support packet aggregation')
     parser.add_argument('--modularity', '-mod', metavar='K', type=int, default=1,
                         help='Modularity of links')
     parser.add_argument('--configs', '-c', metavar='N', type=int, default=1000, help='Number of configs to test')
+    parser.add_argument('--seed', '-s', metavar='N', type=int, default=420, help='Root seed of all random streams')
     args = parser.parse_args()
 
-    # Common seed for all runs for reproducibility
-    random.seed(420)
+    # Common root seed for all runs for reproducibility, every run
+    # gets its own stream spawned from the root one
+    rng = RandomStream(args.seed)
 
     epochs = args.epochs
     mode = args.single_mode
     selection = ['rand', 'exp']
-    succession = ['best', 'tourny']
+    succession = ['best', 'tourney']
     xover_mode = ['avg', 'hor-slice', 'vert-slice']
     mod = args.modularity
 
+    store = ResultsStore(args.store)
+    model = ResultsStore.modelHash(args.model)
+    # Scores of runs with other mode or modularity aren't comparable
+    variant = {'singleMode': mode, 'modularity': mod}
+    if args.report:
+        for param in args.report:
+            print(f'{param};runs;mean;p10;median;p90')
+            for row in store.aggregate(model, param, where=variant):
+                print(';'.join(map(str, row)))
+        store.close()
+        return
+
     network = NetworkModel(args.model)
     network.parse()
 
-    log = open(args.log, 'w')
-    log.write('population;mutation factor;crossover chance;selection;succession;crossover mode;score\n')
+    log = None
+    if args.log is not None:
+        log = open(args.log, 'w')
+        log.write('population;mutation factor;crossover chance;selection;succession;crossover mode;score\n')
 
-    best = float('inf')
-    params = {}
     for idx in range(args.configs):
         try:
-            pop = random.randint(1, 25) # population
-            mut = random.uniform(0, 1) # mutation factor
-            x = random.uniform(0, 1) # crossover chance
-            xm = xover_mode[random.randint(0, len(xover_mode) - 1)] # crossover mode
-            sel = selection[random.randint(0, len(selection) - 1)] # selection mode
-            succ = succession[random.randint(0, len(succession) - 1)] # succession mode
+            pop = rng.randint(1, 25) # population
+            mut = rng.uniform(0, 1) # mutation factor
+            x = rng.uniform(0, 1) # crossover chance
+            xm = xover_mode[rng.randint(0, len(xover_mode) - 1)] # crossover mode
+            sel = selection[rng.randint(0, len(selection) - 1)] # selection mode
+            succ = succession[rng.randint(0, len(succession) - 1)] # succession mode
 
             # Scale number of epochs according to population in order to achieve 
             # similar run times for each test
             ep = epochs // pop
 
-            procs: list[mp.Process] = []
-            q = mp.Queue()
+            params = {'n': pop, 'epochs': ep, 'mutationFactor': mut, 'singleMode': mode, 'xoverChance': x,
+                      'selection': sel, 'succession': succ, 'modularity': mod, 'xoverMode': xm}
 
-            avg = 0.0
-            for i in range(args.repeat):
-                procs.append(mp.Process(target=run, args=(q, network, pop, ep, mut, 
-                                                            mode,  x, sel, succ, mod, xm,)))
-                procs[i].start()
+            # Streams are spawned even when all runs are stored, so the following
+            # configs are drawn the same as in interrupted sweep
+            streams = rng.spawn(args.repeat)
+            scores = store.scores(model, params)
 
+            procs: list[mp.Process] = []
+            q = mp.Queue()
             for i in range(args.repeat):
-                procs[i].join()
-                score = q.get()
-                log.write('{};{};{};{};{};{};{}\n'.format(pop, mut, x, sel, succ, xm, score))
-                avg += score
-            avg /= args.repeat
+                if i not in scores:
+                    procs.append(mp.Process(target=run, args=(q, i, network, pop, ep, mut,
+                                                              mode,  x, sel, succ, mod, xm, streams[i],)))
+                    procs[-1].start()
+
+            for proc in procs:
+                proc.join()
+            # Processes killed by a signal never send their result
+            for _ in [proc for proc in procs if proc.exitcode >= 0]:
+                i, score = q.get()
+                if score is not None:
+                    store.add(model, params, i, score)
+                    scores[i] = score
+            if not scores:
+                continue
+
+            if log is not None:
+                for i in sorted(scores):
+                    log.write('{};{};{};{};{};{};{}\n'.format(pop, mut, x, sel, succ, xm, scores[i]))
+            avg = sum(scores.values()) / len(scores)
 
             print(idx, '/', args.configs, '[{}, {}, {}, {}, {}, {}]: {}'.format(pop, mut, x, sel, succ, xm, avg), end='\r')
-
-            if avg < best:
-                best = avg
-                params = {  'population':       pop, 
-                            'mutation factor':  mut, 
-                            'crossover chance': x, 
-                            'selection mode':   sel, 
-                            'succession mode':  succ,
-                            'crossover mode':   xm, }
         except KeyboardInterrupt:
             break
 
-    print('\nbest params: {}, score: {}'.format(params, best))
-    log.close()
+    best = store.best(model, variant)
+    if best is not None:
+        print('\nbest params: {}, score: {}'.format(best['params'], best['score']))
+    store.close()
+    if log is not None:
+        log.close()
 
 
 if __name__ == '__main__':
@@ -1,9 +1,17 @@
 #!/usr/bin/env python3
 import argparse
+import os
 
+import src.Decomposition as Decomposition
+import src.FileParser as FileParser
+import src.Kernels as Kernels
 from src.GeneticAlgorithm import GeneticAlgorithm
+from src.LinearRelaxation import LinearRelaxation
 from src.NetworkModel import NetworkModel
 from src.NetworkVisualizer import NetworkVisualizer
+from src.RandomStream import RandomStream
+from src.Reduction import Reduction
+from src.Survivability import SUMMARY_COLUMNS, SurvivabilityAnalyzer
 
 
 def main():
@@ -24,30 +32,143 @@ def main():
                         help='Succession mode (best / tourney)')
     parser.add_argument('--modularity', '-mod', metavar='K', type=int, default=1,
                         help='Modularity of links')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Adjust mutation factor, crossover chance and crossover mode during the run '
+                             '(--xover-mode is ignored)')
+    parser.add_argument('--restart-entropy', metavar='H', type=float, default=0.0,
+                        help='Restart part of population when mean path choice entropy drops below H (0 disables)')
+    parser.add_argument('--restart-stall', metavar='N', type=int, default=0,
+                        help='Restart part of population when the best score does not change for N epochs (0 disables)')
+    parser.add_argument('--restart-ratio', metavar='R', type=float, default=0.5,
+                        help='Part of population reinitialized on restart, the best individual is always kept')
+    parser.add_argument('--batched', action='store_true',
+                        help='Create whole generation at once with vectorized crossover and mutation')
+    parser.add_argument('--init', metavar='MODE', type=str, default='random', choices=['random', 'shortest'],
+                        help='Initial population drawn uniformly or biased towards paths with fewer links (random / shortest)')
+    parser.add_argument('--local-search', '-ls', metavar='N', type=int, default=0,
+                        help='Number of best individuals improved by greedy local search every epoch (0 disables)')
+    parser.add_argument('--cache-size', metavar='N', type=int, default=10000,
+                        help='Number of objective function values remembered for duplicate genomes (0 disables)')
+    parser.add_argument('--genome', metavar='TYPE', type=str, default='auto', choices=['auto', 'float', 'packed'],
+                        help='Chromosome representation (auto / float / packed), packed is single mode only')
+    parser.add_argument('--backend', metavar='NAME', type=str, default='auto', choices=Kernels.BACKENDS,
+                        help='Evaluation backend (auto / python / numpy / numba)')
+    parser.add_argument('--workers', '-w', metavar='N', type=int, default=0,
+                        help='Number of processes evaluating population through shared memory (0 evaluates in main process)')
+    parser.add_argument('--seed', '-s', metavar='N', type=int, default=None,
+                        help='Seed of random number generator, runs with the same seed give the same results')
+    parser.add_argument('--seed-solution', metavar='FILE', type=str, action='append', default=[],
+                        help='Solution XML used to warm-start initial population (can be repeated)')
+    parser.add_argument('--seed-ratio', metavar='R', type=float, default=0.5,
+                        help='Part of initial population filled with seed solutions and their mutated copies')
+    parser.add_argument('--lp', metavar='MODE', type=str, default='off', choices=['off', 'relaxed', 'exact'],
+                        help='Solve linear relaxation (or time-limited exact model) for lower bound and seeding (off / relaxed / exact)')
+    parser.add_argument('--lp-time-limit', metavar='SEC', type=float, default=60,
+                        help='Time limit of exact model solver')
+    parser.add_argument('--gap', metavar='R', type=float, default=0.0,
+                        help='Stop when relative gap between the best score and lower bound drops to R')
+    parser.add_argument('--scenarios', metavar='FILE', type=str, default=None,
+                        help='CSV file with demand values in many traffic scenarios, capacity is planned for all of them')
+    parser.add_argument('--scenario-quantile', metavar='Q', type=float, default=1.0,
+                        help='Quantile of link loads over scenarios which capacity is planned for (1 is the worst case)')
+    parser.add_argument('--failures', metavar='N', type=int, default=0, choices=[0, 1, 2],
+                        help='Check survivability of the best solution under up to N failed links at once (0 disables)')
+    parser.add_argument('--reduce', action='store_true',
+                        help='Prune dominated paths (and merge equivalent demands in multi mode) before solving')
+    parser.add_argument('--regions', metavar='N', type=int, default=0,
+                        help='Solve N regions of the network in parallel first, their merged solution seeds the final run (0 disables)')
+    parser.add_argument('--region-epochs', metavar='N', type=int, default=100,
+                        help='Number of cycles done for each region')
+    parser.add_argument('--final-epochs', metavar='N', type=int, default=20,
+                        help='Number of cycles of the final run seeded by regions, instead of --epochs')
     parser.add_argument('--multi-mode', dest='single_mode', action='store_false',
                         help='Whether to solve problem assuming that network support packet aggregation')
     parser.add_argument('--output', metavar='DIR', dest='output_dir', type=str, default='output',
                         help='Name of directory to which results will be saved')
+    parser.add_argument('--history-dir', metavar='DIR', type=str, default=None,
+                        help='Directory to which per-epoch history is memory-mapped during the run')
     parser.add_argument('--hide-plots', dest='show_plots', action='store_false',
                         help='Whether to display plots after final cycle of genetic algorithm')
     parser.add_argument('--quiet', '-q', dest='quiet', action='store_true', help='Run without printing anything')
     args = parser.parse_args()
 
+    Kernels.useBackend(args.backend)
+
     # Setup network model
     network = NetworkModel(args.model)
     network.parse()
+    if args.scenarios is not None:
+        network.setScenarios(FileParser.loadScenarios(args.scenarios), args.scenario_quantile)
+
+    # Solve smaller equivalent problem, merged demands would share one path in single mode
+    reduction = None
+    if args.reduce:
+        reduction = Reduction(network, mergeDemands=not args.single_mode)
+        if not args.quiet:
+            print(f'[i] Reduced problem: {reduction.summary()}')
+    problem = reduction.reduced if reduction else network
+
+    # Load solutions used for warm-start
+    seedSolutions = [FileParser.loadSolution(fileName)[1] for fileName in args.seed_solution]
+
+    # Lower bound from linear relaxation, its rounded routing is used as another seed
+    lowerBound = None
+    if args.lp != 'off' and args.scenarios is not None:
+        print('[-] Linear relaxation does not support traffic scenarios, running without it')
+    elif args.lp != 'off':
+        try:
+            relaxation = LinearRelaxation(problem, args.modularity)
+            lowerBound = relaxation.solve(args.lp == 'exact', args.single_mode, args.lp_time_limit)
+            seedSolutions.append(relaxation.demandsFlows(args.single_mode))
+            if not args.quiet:
+                print(f'[i] Lower bound of objective function: {lowerBound}')
+        except ImportError:
+            print('[-] scipy module is not installed, running without linear relaxation')
 
-    # Roll the genetic algorithm
-    genetic = GeneticAlgorithm(network, args.population_size, args.epochs, args.mutation, args.single_mode,
-                               args.xover, args.selection, args.succession, args.modularity, args.xover_mode)
+    # Solve weakly coupled regions separately, then improve merged solution over the whole network
+    if args.regions > 0:
+        params = {'n': args.population_size, 'epochs': args.region_epochs, 'mutationFactor': args.mutation,
+                  'singleMode': args.single_mode, 'xoverChance': args.xover, 'selection': args.selection,
+                  'succession': args.succession, 'modularity': args.modularity, 'xoverMode': args.xover_mode,
+                  'adaptive': args.adaptive, 'batched': args.batched, 'cacheSize': args.cache_size,
+                  'genome': args.genome, 'init': args.init, 'seed': args.seed}
+        merged, regions = Decomposition.solveRegions(problem, args.regions, params, os.cpu_count())
+        seedSolutions.append(merged)
+        if not args.quiet:
+            for i, (demands, score) in enumerate(regions):
+                print(f'[i] Region {i}: {demands} demands, score {score}')
+
+    # Roll the genetic algorithm, merged solution of regions only needs short run over the whole network
+    epochs = args.final_epochs if args.regions > 0 else args.epochs
+    genetic = GeneticAlgorithm(problem, args.population_size, epochs, args.mutation, args.single_mode,
+                               args.xover, args.selection, args.succession, args.modularity, args.xover_mode,
+                               localSearch=args.local_search, cacheSize=args.cache_size, genome=args.genome,
+                               rng=RandomStream(args.seed), historyDir=args.history_dir,
+                               seedSolutions=seedSolutions, seedRatio=args.seed_ratio, adaptive=args.adaptive,
+                               restartEntropy=args.restart_entropy, restartStall=args.restart_stall,
+                               restartRatio=args.restart_ratio, lowerBound=lowerBound, targetGap=args.gap,
+                               workers=args.workers, batched=args.batched, init=args.init)
     genetic.run(args.quiet)
 
+    if reduction is not None:
+        # Results are reported for demands and paths of the original model
+        genetic.network = network
+        genetic.population = [reduction.expand(chromosome) for chromosome in genetic.population]
+
     if not args.quiet:
         visualizer = NetworkVisualizer(args.output_dir, args.show_plots)
         genetic.result(visualizer)
+        if args.failures > 0:
+            results = SurvivabilityAnalyzer.fromChromosome(genetic.population[0]).analyze(args.failures, args.workers)
+            visualizer.outputCSV('survivability.csv', SUMMARY_COLUMNS, SurvivabilityAnalyzer.summary(results))
+            print(f'[i] Failure scenarios with unroutable demands: '
+                  f'{sum(1 for result in results if result["unroutable"])} of {len(results)}')
         visualizer.showWindow()
         print('[i] Finished!')
 
+    # Memory-mapped history is only needed during the run
+    genetic.history.close(remove=True)
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+import os
+
+from src.SolverService import SolverService
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run solver service which keeps network models loaded and queues jobs')
+    parser.add_argument('--socket', metavar='PATH', type=str, default='solver.sock',
+                        help='Path of Unix socket on which service listens')
+    parser.add_argument('--port', '-p', metavar='N', type=int, default=None,
+                        help='Listen on localhost TCP port instead of Unix socket')
+    parser.add_argument('--workers', '-w', metavar='N', type=int, default=os.cpu_count(),
+                        help='Number of worker processes solving jobs')
+    parser.add_argument('--queue-size', metavar='N', type=int, default=100,
+                        help='Maximal number of jobs waiting for a worker')
+    parser.add_argument('--preload', metavar='FILE', type=str, action='append', default=[],
+                        help='Network model parsed by workers at startup (can be repeated)')
+    args = parser.parse_args()
+
+    service = SolverService(args.workers, args.queue_size, args.preload)
+    print(f'[i] Listening on {f"127.0.0.1:{args.port}" if args.port is not None else args.socket}')
+    try:
+        asyncio.run(service.serve(args.socket, port=args.port))
+    except KeyboardInterrupt:
+        print('[i] Finished!')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+import random
+from typing import Dict, List, Tuple
+
+XOVER_MODES = ['avg', 'vert-slice', 'hor-slice']
+
+
+class AdaptiveRates:
+    """
+    Online control of mutation factor, crossover chance and crossover mode
+    based on success of offspring - child is successful when it's better than
+    its (best) parent. Mutation factor follows the 1/5th success rule, crossover
+    modes are chosen by probability matching of their recent success rates
+    """
+
+    def __init__(self, mutationFactor: float, xoverChance: float, xoverModes: List[str] = XOVER_MODES,
+                 stallEpochs: int = 50, minMutation: float = 0.01, maxMutation: float = 1.0,
+                 learningRate: float = 0.1):
+        self.mutationFactor = mutationFactor
+        self.xoverChance = xoverChance
+        self.stallEpochs = stallEpochs
+        self.minMutation = minMutation
+        self.maxMutation = maxMutation
+        self.learningRate = learningRate
+
+        # Every mode keeps some chance of being chosen, so its credit can recover
+        self.minModeChance = 0.1 / len(xoverModes)
+        self.credit: Dict[str, float] = {mode: 0.2 for mode in xoverModes}
+
+    def chooseMode(self, rng: random.Random = random) -> str:
+        """
+        Draw crossover mode with probability proportional to its credit
+        """
+        total = sum(self.credit.values())
+        modes = list(self.credit)
+        if total <= 0:
+            return rng.choice(modes)
+
+        scale = 1 - self.minModeChance * len(modes)
+        weights = [self.minModeChance + scale * self.credit[mode] / total for mode in modes]
+        return rng.choices(modes, weights)[0]
+
+    def update(self, mutated: List[bool], crossed: List[Tuple[str, bool]], changes: int) -> None:
+        """
+        Adjust rates after one epoch
+        :param mutated: success of children created only by mutation
+        :param crossed: crossover mode and success of children created by crossover
+        :param changes: number of epochs since the best score has changed
+        """
+        successes = mutated + [success for _, success in crossed]
+        if successes:
+            # 1/5th success rule
+            rate = sum(successes) / len(successes)
+            if rate > 0.2:
+                self.mutationFactor /= 0.82
+            elif rate < 0.2:
+                self.mutationFactor *= 0.82
+
+        # Escape from stagnation with a burst of stronger mutation
+        if changes > 0 and changes % self.stallEpochs == 0:
+            self.mutationFactor *= 2
+        self.mutationFactor = min(self.maxMutation, max(self.minMutation, self.mutationFactor))
+
+        for mode in self.credit:
+            results = [success for used, success in crossed if used == mode]
+            if results:
+                self.credit[mode] += self.learningRate * (sum(results) / len(results) - self.credit[mode])
+
+        # Prefer the operator whose children are more often better than their parents
+        if mutated and crossed:
+            xoverRate = sum(success for _, success in crossed) / len(crossed)
+            mutationRate = sum(mutated) / len(mutated)
+            self.xoverChance += self.learningRate * (xoverRate - mutationRate)
+            self.xoverChance = min(0.95, max(0.05, self.xoverChance))
@@ -0,0 +1,188 @@
+"""
+    BatchOperators.py - crossover and mutation of whole generation at once
+    Genomes are rows of a matrix - path indices of demands (packed genome, see
+    SinglePathChromosome) or shares of all paths (float genome, see Chromosome.pathShares).
+    Operators draw the same distributions as their per-chromosome counterparts,
+    but all random values of the generation are drawn up front as arrays
+"""
+from typing import Optional, Sequence
+
+import numpy as np
+
+from src.NetworkIndex import NetworkIndex
+
+XOVER_MODES = ['avg', 'vert-slice', 'hor-slice']
+INIT_MODES = ['random', 'shortest']
+
+
+def pathWeights(index: NetworkIndex, rows: int, generator: np.random.Generator, init: str = 'random') -> np.ndarray:
+    """
+    Draw random weights of all paths for @rows new genomes, as Gene does for every path.
+    With 'shortest' @init weights are halved for every link a path has over the shortest
+    path of its demand, so short paths get bigger shares
+    """
+    if init not in INIT_MODES:
+        raise ValueError('Initialization must be one of the following: ' + ', '.join(INIT_MODES))
+
+    weights = generator.uniform(0, 1, (rows, index.totalPathsCount()))
+    if init == 'shortest':
+        shortest = np.minimum.reduceat(index.pathLength, index.pathOffset)
+        weights *= np.exp2(shortest[index.pathDemand] - index.pathLength)
+    return weights
+
+
+def shortestChoices(index: NetworkIndex) -> np.ndarray:
+    """
+    Return packed genome routing every demand over its first path with the fewest links
+    """
+    shortest = np.minimum.reduceat(index.pathLength, index.pathOffset)
+    positions = np.where(index.pathLength == shortest[index.pathDemand], index.pathPosition, index.pathsCount.max())
+    return np.minimum.reduceat(positions, index.pathOffset).astype(np.uint8)
+
+
+def randomShares(index: NetworkIndex, rows: int, generator: np.random.Generator, singleMode: bool,
+                 init: str = 'random') -> np.ndarray:
+    """
+    Draw float genomes (see Chromosome.pathShares) of @rows new chromosomes at once
+    """
+    return normalizeShares(index, pathWeights(index, rows, generator, init), singleMode)
+
+
+def randomChoices(index: NetworkIndex, rows: int, generator: np.random.Generator, init: str = 'random') -> np.ndarray:
+    """
+    Draw packed genomes (see SinglePathChromosome) of @rows new chromosomes at once, with the same
+    distribution as Gene.normalize applied to drawn path weights
+    """
+    weights = pathWeights(index, rows, generator, init)
+    positions = np.add.reduceat(weights * index.pathPosition, index.pathOffset, axis=1)
+    return np.rint(positions / np.add.reduceat(weights, index.pathOffset, axis=1)).astype(np.uint8)
+
+
+def normalizeShares(index: NetworkIndex, shares: np.ndarray, singleMode: bool) -> np.ndarray:
+    """
+    Gene.normalize applied to every demand of every row of @shares
+    """
+    sums = np.add.reduceat(shares, index.pathOffset, axis=1)
+    empty = (np.maximum.reduceat(shares, index.pathOffset, axis=1) == 0)[:, index.pathDemand]
+
+    normalized = shares / np.where(sums == 0, 1, sums)[:, index.pathDemand]
+    if singleMode:
+        avgPos = np.rint(np.add.reduceat(normalized * index.pathPosition, index.pathOffset, axis=1))
+        normalized = (index.pathPosition == avgPos[:, index.pathDemand]).astype(np.float64)
+
+    # Demands without any flow fall back to the first path
+    return np.where(empty, (index.pathPosition == 0).astype(np.float64), normalized)
+
+
+def mutateShares(index: NetworkIndex, shares: np.ndarray, mutationFactor: float,
+                 generator: np.random.Generator, singleMode: bool) -> np.ndarray:
+    """
+    Chromosome.mutate applied to every row of @shares - each demand is mutated with
+    probability @mutationFactor by setting random path to value from 0 ... 2
+    """
+    rows = shares.shape[0]
+    mask = generator.uniform(0, 1, (rows, index.demandsCount())) <= mutationFactor
+    rowIdx, demandIdx = np.nonzero(mask)
+    if rowIdx.size == 0:
+        return shares
+
+    values = generator.uniform(0, 2, rowIdx.size)
+    positions = np.floor(generator.uniform(0, 1, rowIdx.size) * index.pathsCount[demandIdx]).astype(np.intp)
+
+    mutated = shares.copy()
+    mutated[rowIdx, index.pathOffset[demandIdx] + positions] = values
+
+    # Only mutated demands are normalized, the others stay exactly as they were
+    return np.where(mask[:, index.pathDemand], normalizeShares(index, mutated, singleMode), mutated)
+
+
+def crossShares(index: NetworkIndex, first: np.ndarray, second: np.ndarray, xoverMode: str,
+                generator: np.random.Generator, singleMode: bool) -> np.ndarray:
+    """
+    Chromosome.reproduce applied to pairs of rows of @first and @second
+    """
+    rows = first.shape[0]
+    if xoverMode == 'hor-slice':
+        slicePos = generator.integers(0, index.demandsCount(), rows, endpoint=True)
+        return np.where(index.pathDemand < slicePos[:, np.newaxis], first, second)
+    if xoverMode == 'avg':
+        return normalizeShares(index, (first + second) / 2, singleMode)
+    if xoverMode == 'vert-slice':
+        slicePoint = generator.integers(0, index.pathsCount, (rows, index.demandsCount()), endpoint=True)
+        return normalizeShares(index, np.where(index.pathPosition < slicePoint[:, index.pathDemand], first, second),
+                               singleMode)
+    raise ValueError('Crossover mode must be one of the following: ' + ', '.join(XOVER_MODES))
+
+
+def mutateChoices(index: NetworkIndex, choices: np.ndarray, mutationFactor: float,
+                  generator: np.random.Generator) -> np.ndarray:
+    """
+    SinglePathChromosome.mutate applied to every row of @choices
+    """
+    mask = generator.uniform(0, 1, choices.shape) <= mutationFactor
+    count = int(mask.sum())
+    if count == 0:
+        return choices
+
+    current = choices[mask].astype(np.float64)
+    choicesVal = generator.uniform(0, 2, count)
+    choicesPos = np.floor(generator.uniform(0, 1, count) * np.broadcast_to(index.pathsCount, choices.shape)[mask])
+
+    moved = np.rint((current + choicesPos * choicesVal) / (1 + choicesVal))
+    mutated = choices.copy()
+    mutated[mask] = np.where(choicesPos == current, current, moved).astype(np.uint8)
+    return mutated
+
+
+def crossChoices(index: NetworkIndex, first: np.ndarray, second: np.ndarray, xoverMode: str,
+                 generator: np.random.Generator) -> np.ndarray:
+    """
+    SinglePathChromosome.reproduce applied to pairs of rows of @first and @second
+    """
+    rows, demands = first.shape
+    if xoverMode == 'hor-slice':
+        slicePos = generator.integers(0, demands, rows, endpoint=True)
+        return np.where(np.arange(demands) < slicePos[:, np.newaxis], first, second)
+
+    avg = np.rint((first + second.astype(np.float64)) / 2).astype(np.uint8)
+    if xoverMode == 'avg':
+        return avg
+    if xoverMode == 'vert-slice':
+        slicePoint = np.floor(generator.uniform(0, 1, (rows, demands)) * (index.pathsCount + 1))
+        fromFirst = first < slicePoint
+        fromSecond = second >= slicePoint
+
+        # When neither path survives the slice, Gene.normalize falls back to the first path
+        return np.where(fromFirst & fromSecond, avg,
+                        np.where(fromFirst, first, np.where(fromSecond, second, 0))).astype(np.uint8)
+    raise ValueError('Crossover mode must be one of the following: ' + ', '.join(XOVER_MODES))
+
+
+def breed(index: NetworkIndex, genomes: np.ndarray, first: np.ndarray, second: np.ndarray,
+          modes: Sequence[Optional[str]], mutationFactor: float, generator: np.random.Generator,
+          packed: bool, singleMode: bool = True) -> np.ndarray:
+    """
+    Create genomes of all children of the generation
+    :param genomes: genomes of selected parents, one per row
+    :param first: row of the first parent of every child
+    :param second: row of the second parent of every child, ignored when child isn't crossed over
+    :param modes: crossover mode of every child, None for children created only by mutation
+    """
+    modesArray = np.array([mode if mode is not None else '' for mode in modes])
+    if set(modesArray.tolist()) - set(XOVER_MODES) - {''}:
+        raise ValueError('Crossover mode must be one of the following: ' + ', '.join(XOVER_MODES))
+
+    children = genomes[first]
+    for mode in XOVER_MODES:
+        rows = np.nonzero(modesArray == mode)[0]
+        if rows.size == 0:
+            continue
+        if packed:
+            children[rows] = crossChoices(index, genomes[first[rows]], genomes[second[rows]], mode, generator)
+        else:
+            children[rows] = crossShares(index, genomes[first[rows]], genomes[second[rows]], mode, generator,
+                                         singleMode)
+
+    if packed:
+        return mutateChoices(index, children, mutationFactor, generator)
+    return mutateShares(index, children, mutationFactor, generator, singleMode)
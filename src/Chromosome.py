@@ -1,9 +1,14 @@
 import copy
+import itertools
 import math
 import random
-from typing import Dict, List, Tuple, Union
+from typing import Dict, List, Optional, Set, Tuple, Union
 
+import numpy as np
+
+import src.Kernels as Kernels
 from src.FileParser import saveSolution
+from src.NetworkIndex import NetworkIndex
 from src.NetworkModel import NetworkModel
 
 
@@ -13,13 +18,14 @@ class Gene:
         path_choice: [0, 1, 0, ...] - which paths are used
     """
 
-    def __init__(self, name: str, network: NetworkModel, singleMode: bool = True, _skipGen: bool = False):
+    def __init__(self, name: str, network: NetworkModel, singleMode: bool = True, _skipGen: bool = False,
+                 rng: random.Random = random):
         self.name: str = name
         self.network = network
         self.singleMode: bool = singleMode
 
         if not _skipGen:
-            self.path_choices: List[float] = [random.uniform(0, 1) for _ in range(network.getDemand(name).pathsCount())]
+            self.path_choices: List[float] = [rng.uniform(0, 1) for _ in range(network.getDemand(name).pathsCount())]
             self.normalize()
 
     def __str__(self) -> str:
@@ -48,6 +54,21 @@ class Gene:
                 links[link.name] += demandPart
         return links
 
+    def getFlows(self) -> Dict[str, float]:
+        """
+        Return the amount of capacity used by this gene, but only for links
+        which belong to at least one of selected paths
+        """
+        flows: Dict[str, float] = {}
+
+        demand = self.network.getDemand(self.name)
+        for i, path_choice in enumerate(self.path_choices):
+            if path_choice == 0:
+                continue
+            for link in demand.paths[i]:
+                flows[link.name] = flows.get(link.name, 0.0) + demand.value * path_choice
+        return flows
+
     def normalize(self) -> None:
         """
         Scale path_choice so that it always sums to 1
@@ -78,22 +99,61 @@ class Gene:
 class Chromosome:
     """
     Chromosome consists of one gene per every demand
+    Genes are shared between shallow copies of chromosome (and between parents and children
+    of hor-slice crossover) until one of them writes to the gene - writes have to go through
+    writableGene. Deep copies never share genes.
+    Chromosomes created from path shares build their genes only when they're accessed
     """
 
-    def __init__(self, network: NetworkModel, singleMode: bool = True, _skipGen: bool = False, k: int = 1):
+    def __init__(self, network: NetworkModel, singleMode: bool = True, _skipGen: bool = False, k: int = 1,
+                 rng: random.Random = random):
         self.network = network
         self.singleMode = singleMode
         self.k = k
 
+        # Path shares (and index they're ordered by) which genes are built from on first access
+        self.pendingShares: Optional[np.ndarray] = None
+        self.pendingIndex: Optional[NetworkIndex] = None
+        self._genes: Optional[Dict[str, Gene]] = None
+
         if _skipGen:
             # _skipGen is used by __deepcopy__ to omit generation of initial genes,
             #  which are going to be overwritten anyway
             return
 
         self.genes: Dict[str, Gene] = {
-            demand.name: Gene(name=demand.name, network=network, singleMode=singleMode)
+            demand.name: Gene(name=demand.name, network=network, singleMode=singleMode, rng=rng)
             for demand in network.demands.values()
         }
+        # Names of genes not shared with any other chromosome
+        self.owned: Set[str] = set(self.genes)
+
+    @property
+    def genes(self) -> Dict[str, Gene]:
+        if self._genes is None and self.pendingShares is not None:
+            index = self.pendingIndex
+            values = self.pendingShares.astype(np.int64).tolist() if self.singleMode else self.pendingShares.tolist()
+            bounds = index.pathOffset.tolist() + [len(values)]
+
+            genes: Dict[str, Gene] = {}
+            for d, name in enumerate(index.demandNames):
+                gene = Gene(name, self.network, self.singleMode, _skipGen=True)
+                gene.path_choices = values[bounds[d]:bounds[d + 1]]
+                genes[name] = gene
+            self.genes = genes
+            self.owned = set(genes)
+        return self._genes
+
+    @genes.setter
+    def genes(self, genes: Dict[str, Gene]) -> None:
+        self._genes = genes
+        self.pendingShares = self.pendingIndex = None
+
+    def hasPendingShares(self) -> bool:
+        """
+        Whether genes weren't built yet and path shares match current network index
+        """
+        return self.pendingShares is not None and self.pendingIndex is self.network.getIndex()
 
     def __str__(self) -> str:
         return f'Chromosome()[objFunc: {self.objFunc()}]'
@@ -105,41 +165,126 @@ class Chromosome:
         What could go wrong?
         """
         newObj = Chromosome(self.network, self.singleMode, True, self.k)
+        if self._genes is None and self.pendingShares is not None:
+            # Shares are never modified, genes are built by each copy separately
+            newObj.pendingShares, newObj.pendingIndex = self.pendingShares, self.pendingIndex
+            newObj.owned = set()
+            return newObj
+
         newObj.genes = copy.deepcopy(self.genes)
+        newObj.owned = set(newObj.genes)
+        return newObj
+
+    def shallowCopy(self) -> 'Chromosome':
+        """
+        Return copy of chromosome sharing genes with this one, genes are copied lazily
+        when either chromosome modifies them through writableGene
+        """
+        newObj = Chromosome(self.network, self.singleMode, True, self.k)
+        if self._genes is None and self.pendingShares is not None:
+            newObj.pendingShares, newObj.pendingIndex = self.pendingShares, self.pendingIndex
+            newObj.owned = set()
+            return newObj
+
+        newObj.genes = dict(self.genes)
+        newObj.owned = set()
+        self.owned.clear()
         return newObj
 
+    def writableGene(self, name: str) -> Gene:
+        """
+        Return gene of demand @name which can be modified in place, copying it first if it's shared
+        """
+        if name not in self.owned:
+            self.genes[name] = copy.deepcopy(self.genes[name])
+            self.owned.add(name)
+        return self.genes[name]
+
+    @staticmethod
+    def fromSolution(network: NetworkModel, demandsFlows: Dict[str, List[Tuple[float, List[str]]]],
+                     singleMode: bool = True, k: int = 1, rng: random.Random = random) -> 'Chromosome':
+        """
+        Create chromosome routing demands as in @demandsFlows (see FileParser.loadSolution).
+        In single mode every demand uses the path carrying its biggest flow.
+        Demands missing from solution get random genes
+        """
+        chromosome = Chromosome(network, singleMode, k=k, rng=rng)
+        for demandName, choices in network.routingShares(demandsFlows).items():
+            gene = chromosome.writableGene(demandName)
+            if singleMode:
+                best = choices.index(max(choices))
+                gene.path_choices = [1 if i == best else 0 for i in range(len(choices))]
+            else:
+                gene.path_choices = choices
+                gene.normalize()
+        return chromosome
+
+    @staticmethod
+    def fromShares(network: NetworkModel, shares: np.ndarray, singleMode: bool = True, k: int = 1) -> 'Chromosome':
+        """
+        Create chromosome from normalized path shares of all demands (see pathShares).
+        Genes are built on first access, @shares must not be modified afterwards
+        """
+        chromosome = Chromosome(network, singleMode, True, k)
+        chromosome.pendingShares = shares
+        chromosome.pendingIndex = network.getIndex()
+        chromosome.owned = set()
+        return chromosome
+
+    def syncDemands(self, rng: random.Random = random) -> None:
+        """
+        Follow demands added to or removed from the network - genes of remaining
+        demands are kept, new demands get random genes
+        """
+        for name in [name for name in self.genes if name not in self.network.demands]:
+            del self.genes[name]
+            self.owned.discard(name)
+        for name in self.network.demands:
+            if name not in self.genes:
+                self.genes[name] = Gene(name, self.network, self.singleMode, rng=rng)
+                self.owned.add(name)
+
+    def genomeKey(self, quantization: int = 0xFFFF) -> bytes:
+        """
+        Return compact hash of the genome - index of chosen path for each demand in
+        single mode, or path splits quantized to 1/@quantization in multi mode
+        """
+        if self.singleMode:
+            if self.hasPendingShares():
+                return self.pendingIndex.pathPosition[self.pendingShares > 0.5].astype(np.uint8).tobytes()
+            return bytes(self.genes[name].path_choices.index(1) for name in self.network.demands)
+
+        return np.rint(self.pathShares() * quantization).astype(np.uint16).tobytes()
+
     def saveToXML(self, filename: str):
         """
         Save chromosome to XML file compatible with SNDlib platform
+        Routings are generated demand by demand while the file is written
         """
         modsPerLink = self.modulesPerLink()
-        linkModules = {}
-        for link in modsPerLink:
-            linkModules[link] = {
-                'count': modsPerLink[link],
-                'capacity': self.network.links[link].module_capacity
-            }
-
-        demandsFlow = {}
-        for demandName in self.network.demands:
-            gene = self.genes[demandName]
-            demandsFlow[demandName] = []
-
-            for i, pathChoice in enumerate(gene.path_choices):
-                if pathChoice == 0:
-                    continue
-
-                path = self.network.getDemand(demandName).paths[i]
-                demandsFlow[demandName].append((
-                    self.network.getDemand(demandName).value * pathChoice,
-                    [link.name for link in path]
-                ))
+        linkModules = (
+            (link, {'count': modsPerLink[link], 'capacity': self.network.links[link].module_capacity})
+            for link in modsPerLink
+        )
+
+        def demandFlows(demandName: str) -> List[Tuple[float, List[str]]]:
+            demand = self.network.getDemand(demandName)
+            return [
+                (demand.value * pathChoice, [link.name for link in demand.paths[i]])
+                for i, pathChoice in enumerate(self.genes[demandName].path_choices)
+                if pathChoice != 0
+            ]
+
+        demandsFlow = ((demandName, demandFlows(demandName)) for demandName in self.network.demands)
         saveSolution(filename, linkModules, demandsFlow)
 
     def totalLinksCapacity(self) -> Dict[str, float]:
         """
         Return the total capacity of each link
         """
+        if self.network.scenarios is not None:
+            return dict(zip(self.network.links, self.linkLoads().tolist()))
+
         capPerLink: Dict[str, float] = {link: 0.0 for link in self.network.links}
         for gene in self.genes.values():
             geneCap = gene.getCapacity()
@@ -148,6 +293,44 @@ class Chromosome:
 
         return capPerLink
 
+    def pathShares(self) -> np.ndarray:
+        """
+        Return path choices of all genes as one array, in order of network.demands
+        """
+        if self.hasPendingShares():
+            return self.pendingShares
+        return np.fromiter(
+            itertools.chain.from_iterable(self.genes[name].path_choices for name in self.network.demands),
+            dtype=np.float64, count=self.network.getIndex().totalPathsCount()
+        )
+
+    def pathIndices(self) -> np.ndarray:
+        """
+        Return index of the path carrying the biggest part of each demand, in order of network.demands
+        """
+        if self.hasPendingShares():
+            # First of the paths with the biggest share, computed without building genes
+            index = self.pendingIndex
+            biggest = np.maximum.reduceat(self.pendingShares, index.pathOffset)
+            positions = np.where(self.pendingShares == biggest[index.pathDemand], index.pathPosition,
+                                 index.pathsCount.max())
+            return np.minimum.reduceat(positions, index.pathOffset).astype(np.intp)
+        return np.fromiter(
+            (choices.index(max(choices)) for choices in
+             (self.genes[name].path_choices for name in self.network.demands)),
+            dtype=np.intp
+        )
+
+    def linkLoads(self) -> np.ndarray:
+        """
+        Return the total capacity of each link as an array, in order of network.links.
+        With traffic scenarios it's the load capacity is planned for (see Kernels.designLoads)
+        """
+        index = self.network.getIndex()
+        if index.scenarioValues is not None:
+            return Kernels.designLoads(index, self.pathShares(), self.network.scenarioQuantile)
+        return Kernels.flowLoads(index, self.pathShares())
+
     def modulesPerLink(self, ceil: bool = True) -> Dict[str, int]:
         """
         Return the total number of modules installed on each link
@@ -167,6 +350,11 @@ class Chromosome:
         """
         For each link calculate the spare capacity
         """
+        if self.network.scenarios is not None:
+            loads = self.linkLoads()
+            capacity = self.network.getIndex().capacity
+            return dict(zip(self.network.links, (np.ceil(loads / capacity) * capacity - loads).tolist()))
+
         totalLinksCap = self.totalLinksCapacity()
         perLinkDemand: Dict[str, float] = {name: 0.0 for name in self.network.links}
         perLinkRatio: Dict[str, float] = {}
@@ -190,7 +378,17 @@ class Chromosome:
          1) checking that demands were met
          2) minimizing the number of visits
          3) minimizing the amount of wasted capacity
+        Unless reference 'python' backend is selected, it's computed by evaluation kernels.
+        With traffic scenarios capacity is planned for loads given by Kernels.designLoads
         """
+        if self.network.scenarios is not None:
+            return Kernels.objective(self.linkLoads(), self.network.getIndex().capacity, self.k)
+        if Kernels.activeBackend() != 'python':
+            index = self.network.getIndex()
+            shares = self.pathShares()
+            return Kernels.objective(Kernels.flowLoads(index, shares), index.capacity, self.k,
+                                     Kernels.linkDemands(index, shares))
+
         cost = 0.0
 
         # 1. check demands
@@ -213,51 +411,125 @@ class Chromosome:
 
         return cost
 
-    def mutate(self, mutationFactor: float) -> None:
+    def linkCost(self, linkName: str, load: float) -> float:
+        """
+        Return contribution of single link carrying @load capacity units to the
+        objective function. objFunc is a sum of these values over all links,
+        so moves touching only a few links can be evaluated without recomputing it
+        """
+        modCap = self.network.links[linkName].module_capacity
+        modules = math.ceil(load / modCap)
+        cap = modules * modCap
+        wasted = math.ceil(cap / self.k) * self.k - cap
+        return (cap - load) / 100 + modules * 10 + wasted / 10
+
+    def localSearch(self, maxPasses: int = 1) -> int:
+        """
+        Greedily reroute single demands onto the admissible path which reduces
+        objective function the most. Per-link loads are updated incrementally,
+        so each move is evaluated only on links of the old and new path
+        Returns the number of applied moves
+        """
+        loads = self.totalLinksCapacity()
+        moves = 0
+
+        for _ in range(maxPasses):
+            improved = False
+            for demand in self.network.demands.values():
+                gene = self.genes[demand.name]
+                oldFlows = gene.getFlows()
+
+                bestDelta = -1e-9
+                bestPath = None
+                bestFlows = None
+                for i, path in enumerate(demand.paths):
+                    if gene.path_choices[i] == 1:
+                        continue
+
+                    newFlows: Dict[str, float] = {}
+                    for link in path:
+                        newFlows[link.name] = newFlows.get(link.name, 0.0) + demand.value
+
+                    delta = 0.0
+                    for linkName in dict.fromkeys([*oldFlows, *newFlows]):
+                        newLoad = loads[linkName] - oldFlows.get(linkName, 0.0) + newFlows.get(linkName, 0.0)
+                        delta += self.linkCost(linkName, newLoad) - self.linkCost(linkName, loads[linkName])
+
+                    if delta < bestDelta:
+                        bestDelta = delta
+                        bestPath = i
+                        bestFlows = newFlows
+
+                if bestPath is None:
+                    continue
+
+                for linkName, flow in oldFlows.items():
+                    loads[linkName] -= flow
+                for linkName, flow in bestFlows.items():
+                    loads[linkName] += flow
+                self.writableGene(demand.name).path_choices = [
+                    1 if i == bestPath else 0 for i in range(len(gene.path_choices))]
+
+                moves += 1
+                improved = True
+
+            if not improved:
+                break
+        return moves
+
+    def mutate(self, mutationFactor: float, rng: random.Random = random) -> None:
         """
         For each gene in chromosome, apply mutation algorithm with frequency
         controlled by @mutationFactor argument
         """
         for demandName in self.genes:
-            if random.uniform(0, 1) > mutationFactor:
+            if rng.uniform(0, 1) > mutationFactor:
                 continue
 
-            gene = self.genes[demandName]
+            gene = self.writableGene(demandName)
 
             # Mutate path_choices
-            choicesVal = random.uniform(0, 2)
-            choicesPos = random.randint(0, len(gene.path_choices) - 1)
+            choicesVal = rng.uniform(0, 2)
+            choicesPos = rng.randint(0, len(gene.path_choices) - 1)
             gene.path_choices[choicesPos] = choicesVal
             gene.normalize()
 
     @staticmethod
-    def reproduce(parent1: 'Chromosome', parent2: 'Chromosome', xoverMode) -> 'Chromosome':
+    def reproduce(parent1: 'Chromosome', parent2: 'Chromosome', xoverMode, rng: random.Random = random) -> 'Chromosome':
         """
         Trivial implementation of one point slice. For each gene, randomly select
         slice point for paths_choices and modules count
         """
-        child = copy.deepcopy(parent1)
+        child = Chromosome(parent1.network, parent1.singleMode, True, parent1.k)
+        child.genes = {}
+        child.owned = set()
 
         if xoverMode == 'hor-slice':
             demandsNames = list(parent1.genes.keys())
-            slicePos = random.randint(0, len(demandsNames))
+            slicePos = rng.randint(0, len(demandsNames))
 
+            # Genes are taken over unchanged, so they're shared with parents
             for name in demandsNames[:slicePos]:
-                child.genes[name].path_choices = copy.deepcopy(parent1.genes[name].path_choices)
+                child.genes[name] = parent1.genes[name]
+                parent1.owned.discard(name)
             for name in demandsNames[slicePos:]:
-                child.genes[name].path_choices = copy.deepcopy(parent2.genes[name].path_choices)
+                child.genes[name] = parent2.genes[name]
+                parent2.owned.discard(name)
         else:
             for demandName in parent1.genes:
                 gene1 = parent1.genes[demandName]
                 gene2 = parent2.genes[demandName]
-                childGene = child.genes[demandName]
+                childGene = Gene(demandName, parent1.network, parent1.singleMode, _skipGen=True)
+                childGene.path_choices = list(gene1.path_choices)
+                child.genes[demandName] = childGene
+                child.owned.add(demandName)
                 size = len(gene1.path_choices)
 
                 if xoverMode == 'avg':
                     childGene.path_choices = [
                         (gene1.path_choices[i] + gene2.path_choices[i]) / 2 for i in range(size)]
                 elif xoverMode == 'vert-slice':
-                    slicePoint = random.randint(0, size)
+                    slicePoint = rng.randint(0, size)
                     childGene.path_choices[:slicePoint] = gene1.path_choices[:slicePoint]
                     childGene.path_choices[slicePoint:] = gene2.path_choices[slicePoint:]
                 else:
@@ -0,0 +1,146 @@
+"""
+    Decomposition.py - solving large networks region by region
+    Demands are partitioned by links their admissible paths touch. With more connected components
+    of demands sharing links than regions, whole components are packed into regions. Otherwise
+    every region holds demands of a single component - the biggest components are split into more
+    regions, grown greedily from demands sharing the most links. Every region is solved by its own
+    genetic algorithm in separate process, merged routing of all regions seeds short final run
+    over the whole network
+"""
+import concurrent.futures
+import math
+import multiprocessing as mp
+from typing import Any, Dict, List, Set, Tuple, Union
+
+from src.Chromosome import Chromosome
+from src.NetworkModel import NetworkModel
+from src.RandomStream import RandomStream
+from src.SinglePathChromosome import SinglePathChromosome
+from src.SolverService import createAlgorithm
+
+
+def partitionDemands(network: NetworkModel, regions: int) -> List[List[str]]:
+    """
+    Split demands of @network into at most @regions groups of similar size which share few links
+    """
+    index = network.getIndex()
+    demandLinks = [
+        set(index.pathLinkIdx[index.pathLinkPtr[first]:index.pathLinkPtr[first + count]].tolist())
+        for first, count in zip(index.pathOffset.tolist(), index.pathsCount.tolist())
+    ]
+
+    # Connected components of demands sharing links
+    parent = list(range(index.linksCount()))
+
+    def find(link: int) -> int:
+        while parent[link] != link:
+            parent[link] = parent[parent[link]]
+            link = parent[link]
+        return link
+
+    for links in demandLinks:
+        links = list(links)
+        for link in links[1:]:
+            parent[find(link)] = find(links[0])
+
+    components: Dict[Any, List[int]] = {}
+    for d, links in enumerate(demandLinks):
+        components.setdefault(find(min(links)) if links else ('demand', d), []).append(d)
+
+    groups = sorted(components.values(), key=len, reverse=True)
+    if len(groups) >= regions:
+        # Independent components, the biggest ones go first to the smallest region
+        parts: List[List[int]] = [[] for _ in range(regions)]
+        for component in groups:
+            min(parts, key=len).extend(component)
+    else:
+        # Every component gets its own regions, spare ones split components with the most demands per region
+        counts = [1] * len(groups)
+        for _ in range(regions - len(groups)):
+            splittable = [c for c in range(len(groups)) if counts[c] < len(groups[c])]
+            if not splittable:
+                break
+            counts[max(splittable, key=lambda c: len(groups[c]) / counts[c])] += 1
+
+        parts = []
+        for component, count in zip(groups, counts):
+            parts.extend(growRegions(component, demandLinks, count))
+
+    return [[index.demandNames[d] for d in sorted(part)] for part in parts if part]
+
+
+def growRegions(demands: List[int], demandLinks: List[Set[int]], regions: int) -> List[List[int]]:
+    """
+    Split @demands (positions in index) into @regions groups of similar size. Regions grow from
+    demands with the most links, each demand joins open region sharing the most links with it
+    """
+    limit = math.ceil(len(demands) / regions)
+    parts: List[List[int]] = [[] for _ in range(regions)]
+    partLinks: List[Set[int]] = [set() for _ in range(regions)]
+    for d in sorted(demands, key=lambda d: -len(demandLinks[d])):
+        region = max((p for p in range(regions) if len(parts[p]) < limit),
+                     key=lambda p: (len(demandLinks[d] & partLinks[p]), -len(parts[p])))
+        parts[region].append(d)
+        partLinks[region] |= demandLinks[d]
+    return parts
+
+
+def subNetwork(network: NetworkModel, demandNames: List[str]) -> NetworkModel:
+    """
+    Return model with all nodes and links of @network, but only demands @demandNames
+    and their traffic scenarios
+    """
+    region = NetworkModel(network.filename, network.k)
+    region.nodes = network.nodes
+    region.links = network.links
+    region.demands = {name: network.demands[name] for name in demandNames}
+    if network.scenarios is not None:
+        scenarios = {name: values for name, values in network.scenarios.items() if name in region.demands}
+        # Region without demands listed in scenarios plans capacity for demand values
+        region.setScenarios(scenarios or None, network.scenarioQuantile)
+    return region
+
+
+def demandsFlows(chromosome: Union[Chromosome, SinglePathChromosome]) -> Dict[str, List[Tuple[float, List[str]]]]:
+    """
+    Return routing of @chromosome in the format of FileParser.loadSolution
+    """
+    index = chromosome.network.getIndex()
+    shares = chromosome.pathShares().tolist()
+    flows: Dict[str, List[Tuple[float, List[str]]]] = {}
+    for d, name in enumerate(index.demandNames):
+        demand = chromosome.network.getDemand(name)
+        first = int(index.pathOffset[d])
+        flows[name] = [(demand.value * shares[first + i], [link.name for link in path])
+                       for i, path in enumerate(demand.paths) if shares[first + i] > 0]
+    return flows
+
+
+def _solveRegion(region: NetworkModel, params: Dict[str, Any]) -> Tuple[float, Dict[str, List[Tuple[float, List[str]]]]]:
+    genetic = createAlgorithm(region, params)
+    score = genetic.run(True)
+    return score, demandsFlows(genetic.population[0])
+
+
+def solveRegions(network: NetworkModel, regions: int, params: Dict[str, Any],
+                 processes: int) -> Tuple[Dict[str, List[Tuple[float, List[str]]]], List[Tuple[int, float]]]:
+    """
+    Solve demands of every region of @network separately with genetic algorithm created
+    from @params (see SolverService.createAlgorithm), using @processes worker processes.
+    Return merged routing of all demands and the number of demands and score of every region
+    """
+    parts = partitionDemands(network, regions)
+
+    # Every region gets its own random stream spawned from the seed of the run
+    streams = RandomStream(params.get('seed')).spawn(len(parts))
+
+    context = mp.get_context('fork') if 'fork' in mp.get_all_start_methods() else None
+    with concurrent.futures.ProcessPoolExecutor(max(1, min(processes, len(parts))), mp_context=context) as pool:
+        futures = [pool.submit(_solveRegion, subNetwork(network, part), {**params, 'seed': stream.seedSequence})
+                   for part, stream in zip(parts, streams)]
+        results = [future.result() for future in futures]
+
+    merged: Dict[str, List[Tuple[float, List[str]]]] = {}
+    for _, flows in results:
+        merged.update(flows)
+    return merged, [(len(part), score) for part, (score, _) in zip(parts, results)]
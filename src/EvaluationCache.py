@@ -0,0 +1,81 @@
+from collections import OrderedDict
+from typing import Callable, Dict, List, Union
+
+from src.Chromosome import Chromosome
+from src.SinglePathChromosome import SinglePathChromosome
+
+
+class EvaluationCache:
+    """
+    Bounded transposition table of objective function values, keyed by compact
+    genome hash of evaluated chromosomes. When full, least recently used
+    entries are evicted first
+    """
+
+    def __init__(self, maxSize: int = 10000):
+        self.maxSize = maxSize
+        self.entries: 'OrderedDict[bytes, float]' = OrderedDict()
+
+        # Used for run statistics
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def evaluate(self, chromosome: Union[Chromosome, SinglePathChromosome]) -> float:
+        """
+        Return objective function value of @chromosome, computing it only if
+        no chromosome with the same genome has been evaluated recently
+        """
+        key = chromosome.genomeKey()
+
+        value = self.entries.get(key)
+        if value is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return value
+
+        self.misses += 1
+        value = chromosome.objFunc()
+        self.entries[key] = value
+        if len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False)
+        return value
+
+    def evaluateMany(self, chromosomes: List[Union[Chromosome, SinglePathChromosome]],
+                     evaluator: Callable[[List[Union[Chromosome, SinglePathChromosome]]], List[float]]) -> List[float]:
+        """
+        Return objective function values of @chromosomes. Genomes missing from cache
+        are evaluated together by single call of @evaluator, each genome only once
+        """
+        keys = [chromosome.genomeKey() for chromosome in chromosomes]
+
+        values: Dict[bytes, float] = {}
+        missing: Dict[bytes, Union[Chromosome, SinglePathChromosome]] = {}
+        for key, chromosome in zip(keys, chromosomes):
+            value = self.entries.get(key)
+            if value is not None:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                values[key] = value
+            elif key in missing:
+                self.hits += 1
+            else:
+                self.misses += 1
+                missing[key] = chromosome
+
+        if missing:
+            for key, value in zip(missing, evaluator(list(missing.values()))):
+                values[key] = value
+                self.entries[key] = value
+                if len(self.entries) > self.maxSize:
+                    self.entries.popitem(last=False)
+        return [values[key] for key in keys]
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def hitRatio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
@@ -3,7 +3,7 @@
     Using XML version of input data would be probably easier, but you need
     to find it prior to writing vast and complicated text parser
 """
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterable, List, Tuple, Union
 
 
 def parse(file_name: str) -> (List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]):
@@ -106,11 +106,16 @@ def parse(file_name: str) -> (List[Dict[str, Any]], List[Dict[str, Any]], List[D
     return nodes, links, demands, paths
 
 
+SOLUTION_NS = 'http://sndlib.zib.de/solution'
+
+
 def loadSolution(file_name: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
     """
     Load network solution provided in form of XML file. The specification of format
     can be found on SNDlib home page.
     Return the number of modules added to each link and routing for each demand
+    File is parsed incrementally and processed elements are released right away,
+    so memory usage doesn't depend on the size of XML tree
     """
     try:
         from lxml import etree as et
@@ -118,53 +123,83 @@ def loadSolution(file_name: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
         print("[-] Failed to load solution - lxml module is not installed !!!")
         raise   # Hard to say what should be returned in such case - raise exception anyway
 
+    ns = '{' + SOLUTION_NS + '}'
     linksModules = {}
     demandsFlows = {}
 
-    tree = et.parse(file_name)
-    root = tree.getroot()
-    for topGroup in root:
-        if topGroup.tag == '{http://sndlib.zib.de/solution}linkConfigurations':
-            for linkConfiguration in topGroup:
-                linkID = linkConfiguration.attrib['linkId']
-
-                if len(linkConfiguration) > 0:
-                    instModules = linkConfiguration[0]
-                    capacity = float(instModules.find('{http://sndlib.zib.de/solution}capacity').text)
-                    count = float(instModules.find('{http://sndlib.zib.de/solution}installCount').text)
-                else:
-                    capacity = 0
-                    count = 0
-
-                linksModules[linkID] = {
-                    'capacity': capacity,
-                    'count': count
-                }
-        elif topGroup.tag == '{http://sndlib.zib.de/solution}demandRoutings':
-            for demandRouting in topGroup:
-                demandID = demandRouting.get('demandId')
-
-                flows = []
-                for flowPath in demandRouting:
-                    value = float(flowPath.find('{http://sndlib.zib.de/solution}flowPathValue').text)
-                    path = []
-                    for link in flowPath.find('{http://sndlib.zib.de/solution}routingPath'):
-                        path.append(link.text)
-                    flows.append((value, path))
-                demandsFlows[demandID] = flows
+    for _, element in et.iterparse(file_name, events=('end',)):
+        if element.tag == ns + 'linkConfiguration':
+            linkID = element.attrib['linkId']
+
+            if len(element) > 0:
+                instModules = element[0]
+                capacity = float(instModules.find(ns + 'capacity').text)
+                count = float(instModules.find(ns + 'installCount').text)
+            else:
+                capacity = 0
+                count = 0
+
+            linksModules[linkID] = {
+                'capacity': capacity,
+                'count': count
+            }
+        elif element.tag == ns + 'demandRouting':
+            demandID = element.get('demandId')
+
+            flows = []
+            for flowPath in element:
+                value = float(flowPath.find(ns + 'flowPathValue').text)
+                path = []
+                for link in flowPath.find(ns + 'routingPath'):
+                    path.append(link.text)
+                flows.append((value, path))
+            demandsFlows[demandID] = flows
         else:
-            raise KeyError(f'Unknown XML tag found in solution file - "{topGroup.tag}"')
+            parent = element.getparent()
+            if parent is not None and parent.getparent() is None and \
+                    element.tag not in [ns + 'linkConfigurations', ns + 'demandRoutings']:
+                raise KeyError(f'Unknown XML tag found in solution file - "{element.tag}"')
+            continue
+
+        # Release already processed part of the tree
+        element.clear(keep_tail=True)
+        while element.getprevious() is not None:
+            del element.getparent()[0]
 
     return linksModules, demandsFlows
 
 
-def saveSolution(fileName: str, linksModules: Dict[str, Any], demandsFlows: Dict[str, Any]):
+def loadScenarios(fileName: str) -> Dict[str, List[float]]:
+    """
+    Load traffic scenarios from CSV file - header holds demand names,
+    every following row holds values of these demands in one scenario:
+        Demand_0_1,Demand_0_2,...
+        127.0,80.0,...
+    Return values of each demand in all scenarios
+    """
+    with open(fileName, 'r') as f:
+        rows = [line.strip().split(',') for line in f if line.strip()]
+    if not rows:
+        raise ValueError(f'Scenarios file "{fileName}" is empty')
+
+    names = [name.strip() for name in rows[0]]
+    for i, row in enumerate(rows[1:], 2):
+        if len(row) != len(names):
+            raise ValueError(f'Line {i} of scenarios file has {len(row)} values, expected {len(names)}')
+    return {name: [float(row[i]) for row in rows[1:]] for i, name in enumerate(names)}
+
+
+def saveSolution(fileName: str,
+                 linksModules: Union[Dict[str, Any], Iterable[Tuple[str, Any]]],
+                 demandsFlows: Union[Dict[str, Any], Iterable[Tuple[str, Any]]]):
     """
     Save computed solution to XML file compatible with SNDlib platform
     linksModules must be of form:
         {'LINK_0_1': {'capacity': 4.0, 'count': 2.0}, ...}
     demandsFlows must be of form:
         {'Demand_0_1': [(127.0, ['Link_1', 'Link_2', ...])], ...}
+    Instead of dicts, iterables of (name, value) pairs can be passed - elements
+    are streamed to the file one by one, so they don't have to be kept in memory
     """
     try:
         from lxml import etree as et
@@ -172,53 +207,46 @@ def saveSolution(fileName: str, linksModules: Dict[str, Any], demandsFlows: Dict
         print("[-] Failed to save solution - lxml module is not installed !!!")
         return
 
-    root = et.Element("solution")
-    root.attrib['xmlns'] = 'http://sndlib.zib.de/solution'
-    root.attrib['version'] = '1.0'
-
-    linkConfigs = et.Element('linkConfigurations')
-    for linkName in linksModules:
-        linkModules = linksModules[linkName]
-
-        linkConfig = et.Element('linkConfiguration')
-        linkConfig.attrib['linkId'] = linkName
-
-        if linkModules['count'] > 0:
-            instModules = et.Element('installedModule')
-            capacity = et.Element('capacity')
-            count = et.Element('installCount')
-
-            capacity.text = str(linkModules['capacity'])
-            count.text = str(linkModules['count'])
-            instModules.append(capacity)
-            instModules.append(count)
-            linkConfig.append(instModules)
-
-        linkConfigs.append(linkConfig)
-    root.append(linkConfigs)
-
-    demandRoutings = et.Element('demandRoutings')
-    demandRoutings.attrib['state'] = 'NOS'
-    for demandName in demandsFlows:
-        flows = demandsFlows[demandName]
-
-        demandRouting = et.Element('demandRouting', demandId=demandName)
-        for flow in flows:
-            flowPath = et.Element('flowPath')
-            flowPathValue = et.Element('flowPathValue')
-            flowPathValue.text = str(flow[0])
-
-            routingPath = et.Element('routingPath')
-            for linkName in flow[1]:
-                link = et.Element('linkId')
-                link.text = linkName
-                routingPath.append(link)
-            flowPath.append(flowPathValue)
-            flowPath.append(routingPath)
-
-            demandRouting.append(flowPath)
-        demandRoutings.append(demandRouting)
-    root.append(demandRoutings)
-
-    et = et.ElementTree(root)
-    et.write(fileName, pretty_print=True, xml_declaration=True, encoding='UTF-8')
+    if isinstance(linksModules, dict):
+        linksModules = linksModules.items()
+    if isinstance(demandsFlows, dict):
+        demandsFlows = demandsFlows.items()
+
+    def subElement(parent, tag: str, text: str = None):
+        result = et.SubElement(parent, tag)
+        result.text = text
+        return result
+
+    with et.xmlfile(fileName, encoding='UTF-8') as xf:
+        xf.write_declaration()
+        with xf.element('solution', {'xmlns': SOLUTION_NS, 'version': '1.0'}):
+            xf.write('\n  ')
+            with xf.element('linkConfigurations'):
+                for linkName, linkModules in linksModules:
+                    linkConfig = et.Element('linkConfiguration', linkId=linkName)
+
+                    if linkModules['count'] > 0:
+                        instModules = subElement(linkConfig, 'installedModule')
+                        subElement(instModules, 'capacity', str(linkModules['capacity']))
+                        subElement(instModules, 'installCount', str(linkModules['count']))
+
+                    et.indent(linkConfig, level=2)
+                    xf.write('\n    ', linkConfig)
+                xf.write('\n  ')
+            xf.write('\n  ')
+
+            with xf.element('demandRoutings', state='NOS'):
+                for demandName, flows in demandsFlows:
+                    demandRouting = et.Element('demandRouting', demandId=demandName)
+                    for flow in flows:
+                        flowPath = subElement(demandRouting, 'flowPath')
+                        subElement(flowPath, 'flowPathValue', str(flow[0]))
+
+                        routingPath = subElement(flowPath, 'routingPath')
+                        for linkName in flow[1]:
+                            subElement(routingPath, 'linkId', linkName)
+
+                    et.indent(demandRouting, level=2)
+                    xf.write('\n    ', demandRouting)
+                xf.write('\n  ')
+            xf.write('\n')
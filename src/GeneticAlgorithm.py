@@ -1,17 +1,35 @@
-import copy
 import math
 import os
-import random
-from typing import Dict, List
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
+import numpy as np
+
+import src.BatchOperators as BatchOperators
+import src.Kernels as Kernels
+from src.AdaptiveRates import AdaptiveRates
 from src.Chromosome import Chromosome
+from src.EvaluationCache import EvaluationCache
+from src.History import History
 from src.NetworkModel import NetworkModel
 from src.NetworkVisualizer import NetworkVisualizer
+from src.RandomStream import RandomStream, numpyGenerator
+from src.SharedPopulation import SharedPopulation
+from src.SinglePathChromosome import SinglePathChromosome
+
+# Epochs after restart during which low entropy doesn't trigger another one
+RESTART_COOLDOWN = 10
+# Mutation factor of copies of the best chromosome created on restart
+HYPERMUTATION_FACTOR = 0.5
 
 
 class GeneticAlgorithm:
     def __init__(self, network: NetworkModel, n: int, epochs: int, mutationFactor: int, singleMode: bool,
-                 xoverChance: float, selection: str, succession: str, modularity: int, xoverMode: str):
+                 xoverChance: float, selection: str, succession: str, modularity: int, xoverMode: str,
+                 localSearch: int = 0, cacheSize: int = 10000, genome: str = 'auto', rng: RandomStream = None,
+                 historyDir: Optional[str] = None, seedSolutions: Optional[List[Dict[str, Any]]] = None,
+                 seedRatio: float = 0.5, adaptive: bool = False, restartEntropy: float = 0.0,
+                 restartStall: int = 0, restartRatio: float = 0.5, lowerBound: Optional[float] = None,
+                 targetGap: float = 0.0, workers: int = 0, batched: bool = False, init: str = 'random'):
         self.network = network
         self.n = n
         self.epochs = epochs
@@ -22,32 +40,219 @@ class GeneticAlgorithm:
         self.selection = selection
         self.succession = succession
         self.modularity = modularity
+        self.localSearch = localSearch
+
+        # Crossover and mutation of whole generation done at once on genome matrices
+        self.batched = batched
+
+        # All random draws of the run come from this stream, so runs are reproducible
+        # when it's seeded (e.g. spawned from common root stream for parallel runs)
+        self.rng = rng if rng is not None else RandomStream()
+
+        # Single mode uses packed genome (one path index per demand) unless requested otherwise
+        if genome == 'auto':
+            genome = 'packed' if singleMode else 'float'
+        if genome not in ['float', 'packed']:
+            raise ValueError('Genome must be one of the following: auto, float, packed')
+        if genome == 'packed' and not singleMode:
+            raise ValueError('Packed genome supports only single mode')
+        self.genome = genome
+
+        # Initial population is drawn uniformly or biased towards short paths (see BatchOperators.pathWeights)
+        if init not in BatchOperators.INIT_MODES:
+            raise ValueError('Initialization must be one of the following: ' + ', '.join(BatchOperators.INIT_MODES))
+        self.init = init
+
+        # Mutation factor, crossover chance and mode are adjusted during the run, crossover
+        # mode of every child is chosen among all modes, so @xoverMode is not used then
+        self.adaptive = AdaptiveRates(mutationFactor, xoverChance) if adaptive else None
+
+        # Part of population is reinitialized when path entropy drops below @restartEntropy
+        # or the best score doesn't change for @restartStall epochs (0 disables either)
+        self.restartEntropy = restartEntropy
+        self.restartStall = restartStall
+        self.restartRatio = restartRatio
+        self.lastRestart = 0
+        self.restarts = 0
+
+        # Run stops early when relative gap between the best score and @lowerBound
+        # (e.g. from LinearRelaxation) drops to @targetGap
+        self.lowerBound = lowerBound
+        self.targetGap = targetGap
+
+        # Local search and worker processes evaluate moves and genomes against demand values
+        if network.scenarios is not None and (localSearch > 0 or workers > 0):
+            raise ValueError('Local search and evaluation workers do not support traffic scenarios')
+
+        # Chromosomes are evaluated by @workers processes through shared memory (0 disables)
+        self.workers = workers
+        self.shared: Optional[SharedPopulation] = None
 
-        # Used for tracing algorithm progress
-        self.costHistory: List[float] = []
-        self.changesHistory: List[int] = []
+        # Objective values of recently seen genomes, duplicates are not re-evaluated
+        self.cache = EvaluationCache(cacheSize) if cacheSize > 0 else None
+
+        # Used for tracing algorithm progress, memory-mapped in @historyDir if given
+        self.history = History({
+            'cost': 'f8',       # best score
+            'changes': 'i8',    # epochs since last change of best score
+            'mean': 'f8',
+            'worst': 'f8',
+            'diversity': 'f8',  # ratio of distinct genomes in population
+            'entropy': 'f8',    # mean normalized entropy of path choices per demand
+            'mutation': 'f8',   # mutation factor and crossover chance, changing in adaptive mode
+            'xover': 'f8',
+        }, directory=historyDir)
         self.lastSamePos = 0
         self.lastSameVal = 0.0
 
-        # Create initial population
-        self.population = [Chromosome(network, singleMode, k=modularity) for _ in range(self.n)]
+        # Create initial population, warm-started from given solutions if any
+        self.population = self.seedPopulation(seedSolutions or [], seedRatio)
+        self.seeded = len(self.population)
+        self.population += self.newChromosomes(self.n - len(self.population), self.init)
+
+    def newChromosome(self) -> Union[Chromosome, SinglePathChromosome]:
+        """
+        Create random chromosome using representation selected by genome parameter
+        """
+        return self.newChromosomes(1)[0]
+
+    def newChromosomes(self, count: int, init: str = 'random') -> List[Union[Chromosome, SinglePathChromosome]]:
+        """
+        Create @count random chromosomes, genomes of all of them are drawn at once. With 'shortest'
+        @init the first one routes every demand over its shortest path
+        """
+        if count <= 0:
+            return []
+
+        index = self.network.getIndex()
+        generator = numpyGenerator(self.rng)
+        if self.genome == 'packed':
+            genomes = BatchOperators.randomChoices(index, count, generator, init)
+            if init == 'shortest':
+                genomes[0] = BatchOperators.shortestChoices(index)
+
+            chromosomes = []
+            for choices in genomes:
+                chromosome = SinglePathChromosome(self.network, self.modularity, True)
+                chromosome.choices = choices
+                chromosomes.append(chromosome)
+            return chromosomes
+
+        genomes = BatchOperators.randomShares(index, count, generator, self.singleMode, init)
+        if init == 'shortest':
+            genomes[0] = index.choiceShares(BatchOperators.shortestChoices(index))
+        return [Chromosome.fromShares(self.network, shares, self.singleMode, self.modularity) for shares in genomes]
+
+    def seedPopulation(self, seedSolutions: List[Dict[str, Any]], seedRatio: float) -> List[Chromosome]:
+        """
+        Convert demand routings of @seedSolutions (see FileParser.loadSolution) to chromosomes
+        and fill up @seedRatio part of population with them and their mutated copies
+        """
+        seeds = []
+        for demandsFlows in seedSolutions[:self.n]:
+            if self.genome == 'packed':
+                seeds.append(SinglePathChromosome.fromSolution(self.network, demandsFlows, self.modularity, self.rng))
+            else:
+                seeds.append(Chromosome.fromSolution(self.network, demandsFlows, self.singleMode,
+                                                     self.modularity, self.rng))
+
+        population = list(seeds)
+        while seeds and len(population) < round(self.n * seedRatio):
+            variant = seeds[len(population) % len(seeds)].shallowCopy()
+            variant.mutate(self.mutationFactor, self.rng)
+            population.append(variant)
+        return population
+
+    @property
+    def costHistory(self) -> np.ndarray:
+        return self.history['cost']
+
+    @property
+    def changesHistory(self) -> np.ndarray:
+        return self.history['changes']
+
+    def rank(self, population: List[Chromosome]) -> Tuple[List[Chromosome], List[float]]:
+        """
+        Return @population sorted from the best one, together with their scores
+        """
+        scores = self.evaluateAll(population)
+        order = sorted(range(len(population)), key=scores.__getitem__)
+        return [population[i] for i in order], [scores[i] for i in order]
+
+    def evaluate(self, chromosome: Union[Chromosome, SinglePathChromosome]) -> float:
+        """
+        Return objective function value of @chromosome, using cache if enabled
+        """
+        if self.cache is None:
+            return chromosome.objFunc()
+        return self.cache.evaluate(chromosome)
+
+    def evaluateAll(self, population: List[Chromosome]) -> List[float]:
+        """
+        Return objective function values of @population, evaluated in worker processes if enabled
+        """
+        if self.shared is None:
+            return [self.evaluate(x) for x in population]
+        if self.cache is None:
+            return self.shared.evaluate(population)
+        return self.cache.evaluateMany(population, self.shared.evaluate)
 
-    def run(self, quiet: bool) -> float:
+    def run(self, quiet: bool, progress: Optional[Callable[[int, float], None]] = None) -> float:
+        """
+        Run the algorithm and return the best score. If given, @progress is
+        called with epoch number and the best score at the start of every epoch
+        """
+        if self.workers > 0:
+            # Room for the biggest batch - population merged with children
+            self.shared = SharedPopulation(self.network, 2 * self.n, self.genome == 'packed',
+                                           self.modularity, self.workers)
+        try:
+            return self.runEpochs(quiet, progress)
+        finally:
+            if self.shared is not None:
+                self.shared.close()
+                self.shared = None
+            self.history.flush()
+
+    def runEpochs(self, quiet: bool, progress: Optional[Callable[[int, float], None]]) -> float:
         for i in range(self.epochs):
             if not quiet:
                 print(f'[i] Running epoch {i}')
 
             # Select new population
-            row: List[Chromosome] = sorted(self.population, key=lambda x: x.objFunc())
-            self.costHistory.append(row[0].objFunc())
+            row, scores = self.rank(self.population)
+
+            # Fine-tune the elite with greedy rerouting of single demands
+            if self.localSearch > 0:
+                for chromosome in row[:self.localSearch]:
+                    chromosome.localSearch()
+                row, scores = self.rank(row)
+
+            entropy = self.entropy(row)
+            self.history.append(cost=scores[0],
+                                changes=self.lenOfSame(i, scores[0]),
+                                entropy=entropy,
+                                mean=sum(scores) / len(scores),
+                                worst=scores[-1],
+                                diversity=len({x.genomeKey() for x in row}) / len(row),
+                                mutation=self.mutationFactor,
+                                xover=self.xoverChance)
+            if progress is not None:
+                progress(i, scores[0])
+
+            if self.lowerBound is not None and self.gap(scores[0]) <= self.targetGap:
+                if not quiet:
+                    print(f'[i] Reached optimality gap {self.gap(scores[0]):.4f}, stopping')
+                self.population = row
+                break
 
             # Best one continues unmodified
-            bestChrom = copy.deepcopy(row[0])
+            bestChrom = row[0].shallowCopy()
 
             xoverMask = []
             xovers = 0
             for _ in range(self.n - 1):
-                if random.uniform(0, 1) > self.xoverChance:
+                if self.rng.uniform(0, 1) > self.xoverChance:
                     xoverMask.append(0)
                 else:
                     xoverMask.append(1)
@@ -56,42 +261,71 @@ class GeneticAlgorithm:
 
             samples = onlyMutate + xovers * 2
             if self.selection == 'rand':
-                chosenOnes = random.choices(row, k=samples)
+                chosenOnes = self.rng.choices(row, k=samples)
             elif self.selection == 'exp':
                 weights = [math.exp(-x) for x in range(self.n)]
-                chosenOnes = random.choices(row, weights, k=samples)
+                chosenOnes = self.rng.choices(row, weights, k=samples)
             else:
                 raise ValueError('Selection must be one of the following: rand, exp')
 
-            children: List[Chromosome] = []
-
-            # Crossover
+            # Parents (positions in chosenOnes) and crossover mode of every child,
+            # children without second parent are created only by mutation
+            first: List[int] = []
+            second: List[int] = []
+            childModes: List[Optional[str]] = []
             idx = 0
             for bit in xoverMask:
+                first.append(idx)
                 if bit == 0:
-                    children.append(chosenOnes[idx])
+                    second.append(-1)
+                    childModes.append(None)
                     idx += 1
-                    continue
+                else:
+                    second.append(idx + 1)
+                    childModes.append(self.adaptive.chooseMode(self.rng) if self.adaptive is not None
+                                      else self.xoverMode)
+                    idx += 2
+
+            if self.batched:
+                children = self.breed(row, chosenOnes, first, second, childModes)
+            else:
+                # Crossover
+                children: List[Chromosome] = []
+                for a, b, mode in zip(first, second, childModes):
+                    if mode is None:
+                        children.append(chosenOnes[a])
+                    else:
+                        children.append(chosenOnes[a].reproduce(chosenOnes[a], chosenOnes[b], mode, self.rng))
+
+                # Mutation
+                for child in children:
+                    child.mutate(self.mutationFactor, self.rng)
 
-                child = Chromosome.reproduce(chosenOnes[idx], chosenOnes[idx + 1], self.xoverMode)
-                children.append(child)
-                idx += 2
+            # Children are scored once, for adaptation and succession
+            childScores = self.evaluateAll(children)
 
-            # Mutation
-            for child in children:
-                child.mutate(self.mutationFactor)
+            if self.adaptive is not None:
+                # Child is successful when it's better than its best parent
+                scoreOf = {id(x): score for x, score in zip(row, scores)}
+                parentScores = [
+                    scoreOf[id(chosenOnes[a])] if b < 0 else min(scoreOf[id(chosenOnes[a])], scoreOf[id(chosenOnes[b])])
+                    for a, b in zip(first, second)
+                ]
+                self.adapt(childScores, parentScores, childModes)
 
             # Succession
             if self.succession == 'best':
                 combined: list[Chromosome] = row[1:] + children
-                combined = sorted(combined, key=lambda x: x.objFunc())
+                combinedScores = self.evaluateAll(row[1:]) + childScores
+                combined = [combined[i] for i in sorted(range(len(combined)), key=combinedScores.__getitem__)]
 
                 self.population = [bestChrom] + combined[:self.n - 1]
             elif self.succession == 'tourney':
                 self.population = [bestChrom]
 
+                rowScores = self.evaluateAll(row[1:])
                 for idx in range(self.n - 1):
-                    if row[idx + 1].objFunc() <= children[idx].objFunc():
+                    if rowScores[idx] <= childScores[idx]:
                         self.population.append(row[idx + 1])
                     else:
                         self.population.append(children[idx])
@@ -100,14 +334,134 @@ class GeneticAlgorithm:
 
             assert (len(self.population) == self.n)
 
-            # Check how we're doing
-            same = self.lenOfSame(i, self.costHistory[-1])
-            self.changesHistory.append(same)
+            if self.shouldRestart(i, entropy):
+                self.restart(i)
 
         # Sort final population
         self.population = sorted(self.population, key=lambda x: x.objFunc())
         return self.population[0].objFunc()
 
+    def breed(self, row: List[Chromosome], chosenOnes: List[Chromosome], first: List[int], second: List[int],
+              childModes: List[Optional[str]]) -> List[Chromosome]:
+        """
+        Create all children of the generation at once, using BatchOperators on genomes of @row
+        """
+        packed = self.genome == 'packed'
+        genomes = np.stack([x.pathIndices() if packed else x.pathShares() for x in row])
+
+        rowPos = {id(x): i for i, x in enumerate(row)}
+        parents = np.array([rowPos[id(x)] for x in chosenOnes], dtype=np.intp)
+        second = [b if b >= 0 else a for a, b in zip(first, second)]
+
+        childGenomes = BatchOperators.breed(self.network.getIndex(), genomes, parents[first], parents[second],
+                                            childModes, self.mutationFactor, numpyGenerator(self.rng),
+                                            packed, self.singleMode)
+
+        if not packed:
+            return [Chromosome.fromShares(self.network, shares, self.singleMode, self.modularity)
+                    for shares in childGenomes]
+
+        children = []
+        for choices in childGenomes:
+            child = SinglePathChromosome(self.network, self.modularity, True)
+            child.choices = choices
+            children.append(child)
+        return children
+
+    def adapt(self, childScores: List[float], parentScores: List[float], childModes: List[Optional[str]]) -> None:
+        """
+        Update rates used in the next epoch according to how many children improved on their parents
+        """
+        mutated: List[bool] = []
+        crossed: List[Tuple[str, bool]] = []
+        for childScore, parentScore, mode in zip(childScores, parentScores, childModes):
+            success = childScore < parentScore
+            if mode is None:
+                mutated.append(success)
+            else:
+                crossed.append((mode, success))
+
+        self.adaptive.update(mutated, crossed, int(self.history.last('changes')))
+        self.mutationFactor = self.adaptive.mutationFactor
+        self.xoverChance = self.adaptive.xoverChance
+
+    def updateDemands(self, values: Dict[str, float]) -> None:
+        """
+        Change values of demands of the network, so that the run can be continued
+        with current population. Cached loads of packed chromosomes are rescaled
+        """
+        index = self.network.getIndex()
+        demands = np.array([index.demandPos[name] for name in values], dtype=np.intp)
+        deltas = np.array(list(values.values()), dtype=np.float64) - index.demandValue[demands]
+
+        self.network.updateDemands(values)
+        if self.genome == 'packed':
+            # Succession can keep the same chromosome many times, each is rescaled once
+            for chromosome in {id(x): x for x in self.population}.values():
+                chromosome.rescaleLoads(demands, deltas)
+        self.resetProgress()
+
+    def syncDemands(self) -> None:
+        """
+        Adjust population after demands were added to or removed from the network
+        """
+        for chromosome in self.population:
+            chromosome.syncDemands(self.rng)
+        self.resetProgress()
+
+    def resetProgress(self) -> None:
+        """
+        Forget scores which are no longer valid after the network has changed
+        """
+        if self.cache is not None:
+            self.cache.clear()
+        self.lastSamePos = 0
+        self.lastSameVal = 0.0
+        self.lastRestart = 0
+
+    def entropy(self, population: List[Chromosome]) -> float:
+        """
+        Return mean entropy of path choices of demands which have more than one path
+        """
+        index = self.network.getIndex()
+        perDemand = index.pathEntropy(np.stack([x.pathIndices() for x in population]))
+        choosable = index.pathsCount > 1
+        return float(perDemand[choosable].mean()) if choosable.any() else 0.0
+
+    def shouldRestart(self, epoch: int, entropy: float) -> bool:
+        # Population needs a few epochs after restart before it's judged again
+        sinceRestart = epoch - self.lastRestart
+        if self.restartStall > 0 and min(self.history.last('changes'), sinceRestart) >= self.restartStall:
+            return True
+        return entropy < self.restartEntropy and sinceRestart >= RESTART_COOLDOWN
+
+    def restart(self, epoch: int) -> None:
+        """
+        Replace @restartRatio part of population (except the best one) with new random
+        chromosomes and heavily mutated copies of the best one, half of each
+        """
+        self.lastRestart = epoch
+        self.restarts += 1
+
+        row, _ = self.rank(self.population)
+        count = min(self.n - 1, round((self.n - 1) * self.restartRatio))
+        fresh: List[Chromosome] = []
+        for i in range(count):
+            if i % 2 == 0:
+                fresh.append(self.newChromosome())
+            else:
+                variant = row[0].shallowCopy()
+                variant.mutate(HYPERMUTATION_FACTOR, self.rng)
+                fresh.append(variant)
+
+        self.population = row[:self.n - count] + fresh
+
+    def gap(self, score: float) -> float:
+        """
+        Return relative distance of @score from the lower bound
+        """
+        return (score - self.lowerBound) / score if score > 0 else 0.0
+
     def lenOfSame(self, epoch: int, score: float) -> int:
         """
         Returns number of epochs that resulted in the same score
@@ -125,13 +479,15 @@ class GeneticAlgorithm:
         :return: None
         """
         visualizer.drawNetworkModel(self.network, self.population[0])
-        visualizer.drawObjFuncGraph(self.costHistory)
-        visualizer.drawChangesHistory(self.changesHistory)
+        visualizer.drawObjFuncGraph(*self.history.downsample('cost'))
+        visualizer.drawChangesHistory(*self.history.downsample('changes', reduce=np.max))
 
-        visualizer.outputCSV('cost_history.csv',
-                             ['Epoch', 'Value'],
-                             [[i, val] for i, val in enumerate(self.costHistory)]
-                             )
+        visualizer.outputChunksCSV('cost_history.csv',
+                                   ['Epoch', 'Value', 'Mean', 'Worst', 'Diversity', 'Entropy', 'Mutation', 'Crossover'],
+                                   ['%d', '%s', '%s', '%s', '%s', '%s', '%s', '%s'],
+                                   self.history.iterChunks(['cost', 'mean', 'worst', 'diversity', 'entropy',
+                                                            'mutation', 'xover'])
+                                   )
 
         bestResult = self.population[0]
         linksNames = [link for link in self.network.links]
@@ -142,11 +498,13 @@ class GeneticAlgorithm:
                              )
 
         demandsNames = [demand for demand in self.network.demands]
+        # Packed chromosomes build their genes on every access
+        genes = bestResult.genes
         visualizer.outputCSV('path_choices.csv',
                              ['Demand name'] + [f'Path_{i}' for i in range(10)],
                              [
                                  [name] +
-                                 [str(ch) for ch in bestResult.genes[name].path_choices]
+                                 [str(ch) for ch in genes[name].path_choices]
                                  for name in demandsNames
                              ])
 
@@ -168,7 +526,7 @@ class GeneticAlgorithm:
         if self.singleMode:
             paths: Dict[str, List[str]] = {}
             for name in demandsNames:
-                pathNo = bestResult.genes[name].path_choices.index(1)
+                pathNo = genes[name].path_choices.index(1)
                 paths[name] = [link.name for link in self.network.getDemand(name).paths[pathNo]]
 
             visualizer.outputCSV('links_per_demand.csv',
@@ -185,14 +543,32 @@ class GeneticAlgorithm:
                              ['Parameter', 'Value'],
                              [
                                  ['Epochs count', self.epochs],
+                                 ['Epochs run', len(self.history)],
                                  ['Population size', self.n],
                                  ['Mutation factor', self.mutationFactor],
                                  ['Single mode', self.singleMode],
+                                 ['Adaptive rates', self.adaptive is not None],
+                                 ['Batched operators', self.batched],
+                                 ['Initialization', self.init],
+                                 ['Genome', self.genome],
+                                 ['Evaluation backend', Kernels.activeBackend()],
+                                 ['Evaluation workers', self.workers],
                                  ['Modularity factor', self.modularity],
+                                 ['Local search (elite size)', self.localSearch],
+                                 ['Seeded individuals', self.seeded],
+                                 ['Restarts', self.restarts],
                                  ['Network size (nodes)', len(self.network.nodes)],
                                  ['Network size (links)', len(self.network.links)],
                                  ['Network size (demands)', len(self.network.demands)],
+                                 ['Traffic scenarios', len(next(iter(self.network.scenarios.values())))
+                                  if self.network.scenarios is not None else 'N/A'],
+                                 ['Scenario quantile', self.network.scenarioQuantile
+                                  if self.network.scenarios is not None else 'N/A'],
                                  ['Best score', bestResult.objFunc()],
-                                 ['Total modules used', sum(bestResult.modulesPerLink().values())]
+                                 ['Lower bound', self.lowerBound if self.lowerBound is not None else 'N/A'],
+                                 ['Optimality gap', self.gap(bestResult.objFunc()) if self.lowerBound is not None else 'N/A'],
+                                 ['Total modules used', sum(bestResult.modulesPerLink().values())],
+                                 ['Cache hits', self.cache.hits if self.cache else 0],
+                                 ['Cache misses', self.cache.misses if self.cache else 0]
                              ]
                              )
@@ -0,0 +1,125 @@
+import os
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+class History:
+    """
+    Per-epoch series of run statistics (e.g. best cost, epochs since last change)
+    stored in typed arrays allocated in fixed-size chunks. When @directory is
+    given, chunks are memory-mapped files in that directory, so long runs
+    don't have to keep whole history in memory
+    """
+
+    def __init__(self, series: Dict[str, str], chunkSize: int = 4096, directory: Optional[str] = None):
+        """
+        :param series: mapping of series name to NumPy dtype, e.g. {'cost': 'f8'}
+        """
+        self.dtypes = {name: np.dtype(dtype) for name, dtype in series.items()}
+        self.chunkSize = chunkSize
+        self.directory = directory
+        self.chunks: Dict[str, List[np.ndarray]] = {name: [] for name in series}
+        self.length = 0
+
+        if directory is not None and not os.path.exists(directory):
+            os.makedirs(directory)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def names(self) -> List[str]:
+        return list(self.dtypes)
+
+    def _newChunk(self, name: str) -> np.ndarray:
+        if self.directory is None:
+            return np.zeros(self.chunkSize, dtype=self.dtypes[name])
+
+        path = os.path.join(self.directory, f'{name}.{len(self.chunks[name])}.bin')
+        return np.memmap(path, dtype=self.dtypes[name], mode='w+', shape=(self.chunkSize,))
+
+    def append(self, **values) -> None:
+        """
+        Record values of one epoch, series which were not given are set to 0
+        """
+        pos = self.length % self.chunkSize
+        for name in self.dtypes:
+            if pos == 0:
+                self.chunks[name].append(self._newChunk(name))
+            self.chunks[name][-1][pos] = values.get(name, 0)
+        self.length += 1
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """
+        Return whole series as one array. It's built in memory even when chunks are
+        memory-mapped, iterChunks and downsample go through history chunk by chunk
+        """
+        if self.length == 0:
+            return np.zeros(0, dtype=self.dtypes[name])
+        return np.concatenate(self.chunks[name])[:self.length]
+
+    def last(self, name: str):
+        """
+        Return the most recently recorded value of series
+        """
+        return self.chunks[name][-1][(self.length - 1) % self.chunkSize]
+
+    def iterChunks(self, names: List[str]) -> Iterator[np.ndarray]:
+        """
+        Yield 2D arrays with epoch number followed by selected series as columns,
+        one per chunk. Used for exporting history without building it as a whole
+        """
+        for i in range(len(self.chunks[names[0]]) if names else 0):
+            size = min(self.chunkSize, self.length - i * self.chunkSize)
+            columns = [np.arange(i * self.chunkSize, i * self.chunkSize + size)]
+            columns += [self.chunks[name][i][:size] for name in names]
+            yield np.column_stack(columns)
+
+    def downsample(self, name: str, maxPoints: int = 2000,
+                   reduce: Callable[[np.ndarray], np.ndarray] = np.min) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return (epochs, values) with at most @maxPoints points - each point
+        reduces a bucket of consecutive epochs using @reduce. Chunks are read
+        one by one, so whole series is never loaded at once
+        """
+        bucket = max(1, -(-self.length // maxPoints))
+        starts = np.arange(0, self.length, bucket)
+
+        points: List[np.ndarray] = []
+        # Values of bucket started in previous chunk
+        carry = np.zeros(0, dtype=self.dtypes[name])
+        for i, chunk in enumerate(self.chunks[name]):
+            values = np.concatenate((carry, chunk[:min(self.chunkSize, self.length - i * self.chunkSize)]))
+            full = values.size - values.size % bucket
+            if full:
+                points.append(reduce(values[:full].reshape(-1, bucket), axis=1))
+            carry = values[full:]
+
+        if carry.size:
+            # Last bucket is filled up with the last value, so it doesn't change the result
+            points.append(reduce(np.pad(carry, (0, bucket - carry.size), mode='edge').reshape(1, bucket), axis=1))
+        if not points:
+            return starts, np.zeros(0, dtype=self.dtypes[name])
+        return starts, np.concatenate(points)
+
+    def flush(self) -> None:
+        """
+        Write memory-mapped chunks to their files
+        """
+        for chunks in self.chunks.values():
+            for chunk in chunks:
+                if isinstance(chunk, np.memmap):
+                    chunk.flush()
+
+    def close(self, remove: bool = False) -> None:
+        """
+        Flush memory-mapped chunks and release them, their files are deleted if @remove is set.
+        History is empty afterwards
+        """
+        self.flush()
+        paths = [chunk.filename for chunks in self.chunks.values() for chunk in chunks if isinstance(chunk, np.memmap)]
+        self.chunks = {name: [] for name in self.dtypes}
+        self.length = 0
+        if remove:
+            for path in paths:
+                os.remove(path)
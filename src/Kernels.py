@@ -0,0 +1,176 @@
+"""
+    Kernels.py - evaluation kernels used by array based chromosomes
+    Numba-compiled versions are used when numba module is installed, otherwise
+    NumPy implementation is used. All backends give results identical to
+    Chromosome.objFunc - loads are accumulated and costs summed in the same order
+"""
+import math
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+from src.NetworkIndex import NetworkIndex
+
+BACKENDS = ['auto', 'python', 'numpy', 'numba']
+
+_backend = 'numba' if numba is not None else 'numpy'
+
+
+def useBackend(name: str) -> str:
+    """
+    Select evaluation backend, 'python' stands for reference dict-based code
+    Return the name of backend which is actually used
+    """
+    global _backend
+
+    if name not in BACKENDS:
+        raise ValueError('Backend must be one of the following: ' + ', '.join(BACKENDS))
+    if name == 'auto':
+        name = 'numba' if numba is not None else 'numpy'
+    elif name == 'numba' and numba is None:
+        print('[-] numba module is not installed, falling back to numpy backend')
+        name = 'numpy'
+
+    _backend = name
+    return _backend
+
+
+def activeBackend() -> str:
+    return _backend
+
+
+def singlePathLoads(index: NetworkIndex, choices: np.ndarray) -> np.ndarray:
+    """
+    Return load of each link when every demand uses only the path chosen by @choices
+    """
+    if _backend == 'numba':
+        return _numbaSinglePathLoads(index.pathOffset + choices, index.pathLinkPtr, index.pathLinkIdx,
+                                     index.demandValue, index.linksCount())
+    return index.singlePathLoads(choices)
+
+
+def flowLoads(index: NetworkIndex, shares: np.ndarray) -> np.ndarray:
+    """
+    Return load of each link when demands are split between paths according
+    to @shares (one value per global path)
+    """
+    if _backend == 'numba':
+        return _numbaFlowLoads(shares, index.pathOffset, index.pathsCount, index.pathLinkPtr,
+                               index.pathLinkIdx, index.demandValue, index.linksCount())
+    return index.flowLoads(shares)
+
+
+def linkDemands(index: NetworkIndex, shares: np.ndarray) -> np.ndarray:
+    """
+    Same as flowLoads, but summed path by path instead of demand by demand -
+    like per-link demand in Chromosome.calcDemands
+    """
+    if _backend == 'numba':
+        return _numbaLinkDemands(shares, index.pathDemand, index.pathLinkPtr, index.pathLinkIdx,
+                                 index.demandValue, index.linksCount())
+    return index.linkDemands(shares)
+
+
+def designLoads(index: NetworkIndex, shares: np.ndarray, quantile: float = 1.0) -> np.ndarray:
+    """
+    Return load of each link which capacity is planned for, when demands split between paths
+    according to @shares take values of every traffic scenario (index.scenarioValues). Loads of
+    all scenarios come from one product of scenario and routing matrices, then their @quantile
+    over scenarios is taken for every link (1 is the worst case)
+    """
+    loads = index.scenarioValues @ index.routingMatrix(shares)
+    if quantile >= 1:
+        return loads.max(axis=0)
+    return np.quantile(loads, quantile, axis=0)
+
+
+def objective(loads: np.ndarray, capacity: np.ndarray, k: int, demands: np.ndarray = None) -> float:
+    """
+    Return value of objective function for given per-link @loads. Spare capacity
+    is computed against @demands, which default to @loads
+    """
+    if demands is None:
+        demands = loads
+    if _backend == 'numba':
+        return _numbaObjective(loads, demands, capacity, k)
+
+    modules = np.ceil(loads / capacity)
+    installed = modules * capacity
+    wasted = np.ceil(installed / k) * k - installed
+
+    cost = 0.0
+    cost += sum((installed - demands).tolist()) / 100
+    cost += float(modules.sum()) * 10
+    for value in wasted.tolist():
+        cost += value / 10
+    return cost
+
+
+# Scalar loop implementations, compiled by numba when it's available
+def _objectiveLoop(loads, demands, capacity, k):
+    cost = 0.0
+
+    spare = 0.0
+    for i in range(loads.size):
+        spare += math.ceil(loads[i] / capacity[i]) * capacity[i] - demands[i]
+    cost += spare / 100
+
+    visits = 0.0
+    for i in range(loads.size):
+        visits += math.ceil(loads[i] / capacity[i])
+    cost += visits * 10
+
+    for i in range(loads.size):
+        installed = math.ceil(loads[i] / capacity[i]) * capacity[i]
+        wasted = math.ceil(installed / k) * k - installed
+        cost += wasted / 10
+    return cost
+
+
+def _singlePathLoadsLoop(pathIds, pathLinkPtr, pathLinkIdx, demandValue, linksCount):
+    loads = np.zeros(linksCount)
+    for d in range(pathIds.size):
+        p = pathIds[d]
+        for e in range(pathLinkPtr[p], pathLinkPtr[p + 1]):
+            loads[pathLinkIdx[e]] += demandValue[d]
+    return loads
+
+
+def _flowLoadsLoop(shares, pathOffset, pathsCount, pathLinkPtr, pathLinkIdx, demandValue, linksCount):
+    loads = np.zeros(linksCount)
+    geneLoads = np.zeros(linksCount)
+
+    for d in range(pathOffset.size):
+        first = pathOffset[d]
+        last = first + pathsCount[d]
+
+        # Sum flows of single demand first, then add them to totals - like Gene.getCapacity
+        for p in range(first, last):
+            part = demandValue[d] * shares[p]
+            for e in range(pathLinkPtr[p], pathLinkPtr[p + 1]):
+                geneLoads[pathLinkIdx[e]] += part
+        for e in range(pathLinkPtr[first], pathLinkPtr[last]):
+            link = pathLinkIdx[e]
+            loads[link] += geneLoads[link]
+            geneLoads[link] = 0.0
+    return loads
+
+
+def _linkDemandsLoop(shares, pathDemand, pathLinkPtr, pathLinkIdx, demandValue, linksCount):
+    demands = np.zeros(linksCount)
+    for p in range(shares.size):
+        part = demandValue[pathDemand[p]] * shares[p]
+        for e in range(pathLinkPtr[p], pathLinkPtr[p + 1]):
+            demands[pathLinkIdx[e]] += part
+    return demands
+
+
+if numba is not None:
+    _numbaObjective = numba.njit(cache=True)(_objectiveLoop)
+    _numbaSinglePathLoads = numba.njit(cache=True)(_singlePathLoadsLoop)
+    _numbaFlowLoads = numba.njit(cache=True)(_flowLoadsLoop)
+    _numbaLinkDemands = numba.njit(cache=True)(_linkDemandsLoop)
@@ -0,0 +1,136 @@
+"""
+    LinearRelaxation.py - link-path flow model of the network design problem
+    Variables are path shares x_p of every demand, modules y_e installed on every
+    link and modularity units z_e covering installed capacity. With integral
+    modules the model gives exactly the objective of Chromosome.objFunc:
+        min sum_e (C_e y_e - load_e) / 100 + 10 y_e + (k z_e - C_e y_e) / 10
+        s.t. sum_p x_p = 1 for every demand, load_e <= C_e y_e, C_e y_e <= k z_e
+    so its LP relaxation is a lower bound of any solution found by the genetic algorithm
+    Solved with HiGHS through scipy, which is optional dependency
+"""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import scipy.optimize
+    import scipy.sparse
+except ImportError:
+    scipy = None
+
+from src.NetworkModel import NetworkModel
+
+# Spare capacity (in capacity units) of modules in routing returned for split flows
+ROUNDING_MARGIN = 1e-6
+
+
+class LinearRelaxation:
+    def __init__(self, network: NetworkModel, k: int = 1):
+        if scipy is None:
+            raise ImportError('scipy module is required for solving linear relaxation')
+        if network.scenarios is not None:
+            raise ValueError('Linear relaxation does not support traffic scenarios')
+
+        self.network = network
+        self.index = network.getIndex()
+        self.k = k
+
+        self.lowerBound: Optional[float] = None
+        self.shares: Optional[np.ndarray] = None
+
+    def buildModel(self, margin: float = 0.0) -> Tuple[np.ndarray, List['scipy.optimize.LinearConstraint']]:
+        """
+        Return objective coefficients and constraints, variables are ordered x, y, z
+        :param margin: capacity of every module left unused, in capacity units
+        """
+        index = self.index
+        paths = index.totalPathsCount()
+        links = index.linksCount()
+        capacity = index.capacity
+
+        cost = np.concatenate((
+            -index.demandValue[index.pathDemand] * index.pathLength / 100,
+            10 + capacity / 100 - capacity / 10,
+            np.full(links, self.k / 10),
+        ))
+
+        # Every demand is fully routed
+        routed = scipy.sparse.csr_matrix(
+            (np.ones(paths), (index.pathDemand, np.arange(paths))),
+            shape=(index.demandsCount(), paths + 2 * links)
+        )
+
+        # Link load fits into installed modules, which fit into modularity units
+        linkRange = np.arange(links)
+        rows = np.concatenate((index.pathLinkIdx, linkRange, links + linkRange, links + linkRange))
+        cols = np.concatenate((index.entryPath, paths + linkRange, paths + linkRange, paths + links + linkRange))
+        values = np.concatenate((index.demandValue[index.pathDemand[index.entryPath]], -capacity,
+                                 capacity, np.full(links, -self.k, dtype=np.float64)))
+        fits = scipy.sparse.csr_matrix((values, (rows, cols)), shape=(2 * links, paths + 2 * links))
+
+        return cost, [
+            scipy.optimize.LinearConstraint(routed, 1, 1),
+            scipy.optimize.LinearConstraint(fits, -np.inf, np.concatenate((np.full(links, -margin), np.zeros(links)))),
+        ]
+
+    def solve(self, exact: bool = False, singleMode: bool = True, timeLimit: Optional[float] = None) -> float:
+        """
+        Solve LP relaxation and return its value, which is a lower bound of objective function.
+        When @exact is set, mixed integer problem (integral modules, and paths in single mode)
+        is solved afterwards and its best bound is used if it's better
+        """
+        cost, constraints = self.buildModel()
+        paths = self.index.totalPathsCount()
+        bounds = scipy.optimize.Bounds(0, np.concatenate((np.ones(paths), np.full(cost.size - paths, np.inf))))
+
+        result = scipy.optimize.milp(cost, constraints=constraints, bounds=bounds)
+        if result.x is None:
+            raise RuntimeError(f'Linear relaxation could not be solved: {result.message}')
+        self.lowerBound = result.fun
+        self.shares = result.x[:paths]
+
+        if exact:
+            integrality = np.ones(cost.size)
+            if not singleMode:
+                integrality[:paths] = 0
+
+            options = {'time_limit': timeLimit} if timeLimit is not None else {}
+            result = scipy.optimize.milp(cost, constraints=constraints, bounds=bounds,
+                                         integrality=integrality, options=options)
+            bound = getattr(result, 'mip_dual_bound', None)
+            if bound is not None and np.isfinite(bound):
+                self.lowerBound = max(self.lowerBound, bound)
+            if not singleMode:
+                # Split flows of optimal solution fill modules exactly, so rounding errors of
+                # shares would add modules - routing is taken from model with a bit of spare capacity
+                _, constraints = self.buildModel(ROUNDING_MARGIN)
+                result = scipy.optimize.milp(cost, constraints=constraints, bounds=bounds,
+                                             integrality=integrality, options=options)
+            if result.x is not None:
+                self.shares = result.x[:paths]
+
+        return self.lowerBound
+
+    def demandsFlows(self, singleMode: bool = True) -> Dict[str, List[Tuple[float, List[str]]]]:
+        """
+        Return routing of solved model in the format of FileParser.loadSolution. In single
+        mode every demand is rounded to the path with the biggest share
+        """
+        if self.shares is None:
+            raise RuntimeError('Model has to be solved first')
+
+        demandsFlows: Dict[str, List[Tuple[float, List[str]]]] = {}
+        for d, name in enumerate(self.index.demandNames):
+            first = self.index.pathOffset[d]
+            shares = self.shares[first:first + self.index.pathsCount[d]]
+            demand = self.network.getDemand(name)
+
+            if singleMode:
+                chosen = [int(np.argmax(shares))]
+            else:
+                chosen = [i for i, share in enumerate(shares) if share > 1e-9]
+            demandsFlows[name] = [
+                (demand.value * (1.0 if singleMode else float(shares[i])), [link.name for link in demand.paths[i]])
+                for i in chosen
+            ]
+        return demandsFlows
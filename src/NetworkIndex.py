@@ -0,0 +1,154 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class NetworkIndex:
+    """
+    Array representation of network model used by vectorized evaluation.
+    Links and demands are numbered in the order of network.links and network.demands,
+    paths of all demands are numbered consecutively - demand `d` owns global paths
+    pathOffset[d] ... pathOffset[d] + pathsCount[d] - 1
+    """
+
+    # Arrays used by evaluation kernels, enough to rebuild index in another process
+    ARRAYS = ['capacity', 'demandValue', 'pathsCount', 'pathOffset', 'pathLength', 'pathLinkPtr',
+              'pathLinkIdx', 'pathDemand', 'pathPosition', 'entryPath', 'entryPair', 'pairLink', 'pairDemand']
+
+    def __init__(self, network: 'NetworkModel'):
+        self.linkNames: List[str] = list(network.links)
+        self.linkPos: Dict[str, int] = {name: i for i, name in enumerate(self.linkNames)}
+        self.demandNames: List[str] = list(network.demands)
+        self.demandPos: Dict[str, int] = {name: i for i, name in enumerate(self.demandNames)}
+
+        self.capacity = np.array([link.module_capacity for link in network.links.values()], dtype=np.float64)
+        self.demandValue = np.array([demand.value for demand in network.demands.values()], dtype=np.float64)
+        self.pathsCount = np.array([demand.pathsCount() for demand in network.demands.values()], dtype=np.intp)
+        self.pathOffset = np.concatenate(([0], np.cumsum(self.pathsCount)[:-1])).astype(np.intp)
+
+        # Path -> links table in CSR form: links of global path `p` are
+        # pathLinkIdx[pathLinkPtr[p]:pathLinkPtr[p + 1]]
+        self.pathLinks: List[List[int]] = [
+            [self.linkPos[link.name] for link in path]
+            for demand in network.demands.values()
+            for path in demand.paths
+        ]
+        self.pathLength = np.array([len(path) for path in self.pathLinks], dtype=np.intp)
+        self.pathLinkPtr = np.concatenate(([0], np.cumsum(self.pathLength))).astype(np.intp)
+        self.pathLinkIdx = np.array([link for path in self.pathLinks for link in path], dtype=np.intp)
+        self.pathDemand = np.repeat(np.arange(len(self.demandNames), dtype=np.intp), self.pathsCount)
+        self.pathPosition = np.arange(len(self.pathLinks), dtype=np.intp) - self.pathOffset[self.pathDemand]
+
+        # Every entry of pathLinkIdx belongs to one (demand, link) pair. Pairs are
+        # numbered in order of demands, so loads can be summed per demand first
+        self.entryPath = np.repeat(np.arange(len(self.pathLinks), dtype=np.intp), self.pathLength)
+        pairKeys, self.entryPair = np.unique(self.pathDemand[self.entryPath] * self.linksCount() + self.pathLinkIdx,
+                                             return_inverse=True)
+        self.pairLink = (pairKeys % self.linksCount()).astype(np.intp)
+        self.pairDemand = (pairKeys // self.linksCount()).astype(np.intp)
+
+        # Demand values in every traffic scenario, one row per scenario
+        self.scenarioValues: Optional[np.ndarray] = None
+        self.setScenarios(network.scenarios)
+
+    @staticmethod
+    def fromArrays(arrays: Dict[str, np.ndarray]) -> 'NetworkIndex':
+        """
+        Create index holding only given arrays (see ARRAYS), without names of links,
+        demands and per-path link lists. It's enough for evaluation kernels
+        """
+        index = NetworkIndex.__new__(NetworkIndex)
+        for name in NetworkIndex.ARRAYS:
+            setattr(index, name, arrays[name])
+        index.scenarioValues = arrays.get('scenarioValues')
+        return index
+
+    def setScenarios(self, scenarios: Optional[Dict[str, List[float]]]) -> None:
+        """
+        Build matrix of demand values in traffic @scenarios (see NetworkModel.setScenarios)
+        """
+        if not scenarios:
+            self.scenarioValues = None
+            return
+
+        count = len(next(iter(scenarios.values())))
+        self.scenarioValues = np.repeat(self.demandValue[np.newaxis], count, axis=0)
+        for name, values in scenarios.items():
+            self.scenarioValues[:, self.demandPos[name]] = values
+
+    def linksCount(self) -> int:
+        return self.capacity.size
+
+    def demandsCount(self) -> int:
+        return self.demandValue.size
+
+    def totalPathsCount(self) -> int:
+        return self.pathLength.size
+
+    def singlePathLoads(self, choices: np.ndarray) -> np.ndarray:
+        """
+        Return load of each link when every demand is routed entirely
+        over its path with index given by @choices
+        """
+        return self.pathLoads(self.pathOffset + choices, self.demandValue)
+
+    def pathLoads(self, pathIds: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """
+        Return load of each link when @values are sent over global paths @pathIds
+        """
+        lengths = self.pathLength[pathIds]
+
+        # Positions of consecutive links of chosen paths in pathLinkIdx table
+        starts = np.repeat(self.pathLinkPtr[pathIds] - (np.cumsum(lengths) - lengths), lengths)
+        positions = starts + np.arange(starts.size, dtype=np.intp)
+
+        return np.bincount(self.pathLinkIdx[positions],
+                           weights=np.repeat(values, lengths),
+                           minlength=self.linksCount())
+
+    def flowLoads(self, shares: np.ndarray) -> np.ndarray:
+        """
+        Return load of each link when demands are split between their
+        paths according to @shares (one value per global path)
+        """
+        parts = self.demandValue[self.pathDemand] * shares
+        pairLoads = np.bincount(self.entryPair, weights=parts[self.entryPath], minlength=self.pairLink.size)
+        return np.bincount(self.pairLink, weights=pairLoads, minlength=self.linksCount())
+
+    def linkDemands(self, shares: np.ndarray) -> np.ndarray:
+        """
+        Same as flowLoads, but summed path by path instead of demand by demand
+        """
+        parts = self.demandValue[self.pathDemand] * shares
+        return np.bincount(self.pathLinkIdx, weights=parts[self.entryPath], minlength=self.linksCount())
+
+    def routingMatrix(self, shares: np.ndarray) -> np.ndarray:
+        """
+        Return part of each demand (rows) sent over each link (columns) when demands
+        are split between their paths according to @shares
+        """
+        pairShares = np.bincount(self.entryPair, weights=shares[self.entryPath], minlength=self.pairLink.size)
+        routing = np.zeros((self.demandsCount(), self.linksCount()))
+        routing[self.pairDemand, self.pairLink] = pairShares
+        return routing
+
+    def choiceShares(self, choices: np.ndarray) -> np.ndarray:
+        """
+        Return shares of all paths when every demand uses only the path chosen by @choices
+        """
+        shares = np.zeros(self.totalPathsCount())
+        shares[self.pathOffset + choices] = 1.0
+        return shares
+
+    def pathEntropy(self, choices: np.ndarray) -> np.ndarray:
+        """
+        Return entropy of path choices of each demand across population, normalized
+        to 0 ... 1 by the number of admissible paths (0 for demands with single path)
+        :param choices: matrix of chosen path indices, one row per individual
+        """
+        counts = np.bincount((self.pathOffset + choices).ravel(), minlength=self.totalPathsCount())
+        shares = counts / choices.shape[0]
+        terms = -shares * np.log(np.where(shares > 0, shares, 1))
+
+        maxEntropy = np.log(np.maximum(self.pathsCount, 2))
+        return np.add.reduceat(terms, self.pathOffset) / maxEntropy
@@ -1,5 +1,5 @@
 import queue
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 
 import src.FileParser as FileParser
 
@@ -76,6 +76,11 @@ class NetworkModel:
         self.links: Dict[str, Link] = {}
         self.demands: Dict[str, Demand] = {}
         self.k = k
+        self._index = None
+
+        # Demand values in every traffic scenario (see setScenarios), None plans for demand values
+        self.scenarios: Optional[Dict[str, List[float]]] = None
+        self.scenarioQuantile = 1.0
 
     def parse(self) -> None:
         nodes, links, demands, paths = FileParser.parse(self.filename)
@@ -148,5 +153,102 @@ class NetworkModel:
     def getDemand(self, name: str) -> Demand:
         return self.demands[name]
 
+    def routingShares(self, demandsFlows: Dict[str, List[Tuple[float, List[str]]]]) -> Dict[str, List[float]]:
+        """
+        Convert demand routings (as returned by FileParser.loadSolution) to the share of
+        demand flow sent over each admissible path. Flows over paths which are not
+        admissible are skipped, demands without any admissible flow are omitted
+        """
+        shares: Dict[str, List[float]] = {}
+        for demandName, flows in demandsFlows.items():
+            if demandName not in self.demands:
+                continue
+
+            demand = self.demands[demandName]
+            pathIds = {tuple(link.name for link in path): i for i, path in enumerate(demand.paths)}
+            choices = [0.0] * demand.pathsCount()
+            for value, linkNames in flows:
+                i = pathIds.get(tuple(linkNames), pathIds.get(tuple(reversed(linkNames))))
+                if i is not None and value > 0:
+                    choices[i] += value
+
+            # Shares are relative to admissible flow, so zero-valued demands are handled too
+            total = sum(choices)
+            if total > 0:
+                shares[demandName] = [choice / total for choice in choices]
+        return shares
+
+    def updateDemands(self, values: Dict[str, float]) -> None:
+        """
+        Change values of existing demands. Paths and array index are kept,
+        only demand values in the index are updated in place. Demands missing
+        from traffic scenarios take the new value in all scenarios
+        """
+        for name, value in values.items():
+            self.demands[name].value = value
+            if self._index is not None:
+                pos = self._index.demandPos[name]
+                self._index.demandValue[pos] = value
+                if self._index.scenarioValues is not None and name not in self.scenarios:
+                    self._index.scenarioValues[:, pos] = value
+
+    def addDemand(self, name: str, source: str, target: str, value: float,
+                  paths: Optional[List[List[str]]] = None, maxLen: float = float('inf')) -> Demand:
+        """
+        Add new demand with admissible @paths given as lists of link names,
+        or generated the same way as for models without admissible paths
+        """
+        if name in self.demands:
+            raise ValueError(f'Demand {name} already exists')
+
+        if paths is None:
+            linkPaths = self.generateAdmissiblePaths([{'name': name, 'source': source, 'target': target}])[name]
+        else:
+            linkPaths = [[self.links[linkName] for linkName in path] for path in paths]
+
+        self.demands[name] = Demand(name, source, target, value, maxLen, linkPaths)
+        self._index = None
+        return self.demands[name]
+
+    def removeDemand(self, name: str) -> None:
+        del self.demands[name]
+        if self.scenarios is not None:
+            self.scenarios.pop(name, None)
+            if not self.scenarios:
+                # No demand left with scenarios, capacity is planned for demand values again
+                self.scenarios = None
+        self._index = None
+
+    def setScenarios(self, scenarios: Optional[Dict[str, List[float]]], quantile: float = 1.0) -> None:
+        """
+        Plan capacity for many traffic matrices instead of demand values. @scenarios map demand
+        names to their value in every scenario, demands missing from them keep their value in all
+        scenarios. Links get modules for @quantile of their loads over scenarios (1 is the worst case).
+        None goes back to planning for demand values
+        """
+        if not 0 <= quantile <= 1:
+            raise ValueError('Scenario quantile must be within 0 ... 1')
+        if scenarios is not None:
+            unknown = sorted(set(scenarios) - set(self.demands))
+            if unknown:
+                raise KeyError('Unknown demands in scenarios: ' + ', '.join(unknown))
+            if len({len(values) for values in scenarios.values()}) != 1 or not next(iter(scenarios.values())):
+                raise ValueError('All demands need values for the same, non-zero number of scenarios')
+            scenarios = {name: list(values) for name, values in scenarios.items()}
+
+        self.scenarios = scenarios
+        self.scenarioQuantile = quantile
+        if self._index is not None:
+            self._index.setScenarios(scenarios)
+
+    def getIndex(self) -> 'NetworkIndex':
+        """
+        Return array representation of the model, built on first use
+        """
+        if self._index is None:
+            from src.NetworkIndex import NetworkIndex
+            self._index = NetworkIndex(self)
+        return self._index
+
     def linksCount(self) -> int:
         return len(self.links)
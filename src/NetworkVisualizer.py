@@ -1,7 +1,8 @@
 import os
 import networkx as nx
+import numpy as np
 from matplotlib import pyplot as plt
-from typing import Any, Dict, List, Tuple, Optional
+from typing import Any, Dict, Iterable, List, Tuple, Optional
 
 from src.NetworkModel import NetworkModel
 from src.Chromosome import Chromosome
@@ -43,24 +44,24 @@ class NetworkVisualizer:
 
         plt.savefig(self.getPath('network_modules.png'))
 
-    def drawObjFuncGraph(self, costHistory: List[float]):
+    def drawObjFuncGraph(self, epochs: List[int], costHistory: List[float]):
         plt.figure(self.windowID)
         self.windowID += 1
 
         plt.clf()
-        plt.plot(costHistory)
+        plt.plot(epochs, costHistory)
         plt.title('Value of objective function for each epoch')
         plt.xlabel('Epoch number')
         plt.ylabel('Cost')
 
         plt.savefig(self.getPath('objfunc.png'))
 
-    def drawChangesHistory(self, changesHistory: List[int]):
+    def drawChangesHistory(self, epochs: List[int], changesHistory: List[int]):
         plt.figure(self.windowID)
         self.windowID += 1
 
         plt.clf()
-        plt.plot(changesHistory)
+        plt.plot(epochs, changesHistory)
         plt.title('Epochs since last change of objective function')
         plt.xlabel('Epoch number')
         plt.ylabel('Epoch since last change')
@@ -95,3 +96,15 @@ class NetworkVisualizer:
                 f.write(','.join(map(str, line)))
                 f.write('\n')
             f.write('\n')
+
+    def outputChunksCSV(self, name: str, columnLabels: List[str], formats: List[str], chunks: Iterable[np.ndarray]):
+        """
+        Write CSV file from 2D arrays, each one holding consecutive rows
+        """
+        with open(self.getPath(name), 'w') as f:
+            f.write(','.join(columnLabels))
+            f.write('\n')
+
+            for chunk in chunks:
+                np.savetxt(f, chunk, fmt=formats, delimiter=',')
+            f.write('\n')
@@ -0,0 +1,48 @@
+import random
+from typing import List, Union
+
+import numpy as np
+
+
+class RandomStream(random.Random):
+    """
+    Random number generator which can be split into independent, reproducible
+    streams (e.g. one per worker process or island) derived from one root seed.
+    Works as a drop-in replacement for `random` module, NumPy generator seeded
+    from the same stream is available as `generator` attribute
+    """
+
+    def __init__(self, seed: Union[int, np.random.SeedSequence, None] = None):
+        if isinstance(seed, np.random.SeedSequence):
+            self.seedSequence = seed
+        else:
+            self.seedSequence = np.random.SeedSequence(seed)
+
+        # PCG64 consumes first 4 words of the state, so Python generator uses the next ones
+        state = self.seedSequence.generate_state(8, np.uint64)
+        super().__init__(int.from_bytes(state[4:].tobytes(), 'little'))
+        self.generator = np.random.Generator(np.random.PCG64(self.seedSequence))
+
+    def __reduce__(self):
+        return self.__class__, (self.seedSequence,), (self.getstate(), self.generator.bit_generator.state)
+
+    def __setstate__(self, state):
+        pythonState, numpyState = state
+        self.setstate(pythonState)
+        self.generator.bit_generator.state = numpyState
+
+    def spawn(self, n: int) -> List['RandomStream']:
+        """
+        Return @n new independent streams, the same for every stream created with the same seed
+        """
+        return [RandomStream(child) for child in self.seedSequence.spawn(n)]
+
+
+def numpyGenerator(rng) -> np.random.Generator:
+    """
+    Return NumPy generator paired with @rng. For other generators (or global `random`
+    module) new generator is seeded from @rng, so seeding it makes NumPy draws reproducible too
+    """
+    if isinstance(rng, RandomStream):
+        return rng.generator
+    return np.random.default_rng(rng.getrandbits(64))
@@ -0,0 +1,109 @@
+"""
+    Reduction.py - preprocessing which shrinks network design problem before it's solved
+    1) Admissible paths which contain all links of another path of the same demand are pruned.
+       They load the same links and some more, so they never need fewer modules - only the
+       spare capacity term can prefer them, by at most a hundredth of demand value per link
+    2) Demands between the same nodes with the same admissible paths are merged into one demand
+       carrying their total value. Any split of the merged demand loads links exactly like the
+       same split of original demands, so in multi mode it's an exact reduction. In single mode
+       merged demands are forced onto the same path
+    Solutions of reduced problem are mapped back to demands and paths of the original one
+"""
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+
+from src.Chromosome import Chromosome
+from src.NetworkModel import Demand, NetworkModel
+from src.SinglePathChromosome import SinglePathChromosome
+
+
+class Reduction:
+    def __init__(self, network: NetworkModel, prunePaths: bool = True, mergeDemands: bool = True):
+        self.original = network
+        self.reduced = NetworkModel(network.filename, network.k)
+        self.reduced.nodes = network.nodes
+        self.reduced.links = network.links
+
+        # Names of original demands merged into every demand of reduced model
+        self.groups: Dict[str, List[str]] = {}
+        self.prunedPaths = 0
+
+        merged: Dict[Tuple, str] = {}
+        for demand in network.demands.values():
+            paths = self.prune(demand.paths) if prunePaths else list(demand.paths)
+            self.prunedPaths += demand.pathsCount() - len(paths)
+
+            key = (frozenset((demand.source, demand.target)),
+                   frozenset(frozenset(link.name for link in path) for path in paths))
+            if mergeDemands and key in merged:
+                representative = self.reduced.demands[merged[key]]
+                representative.value += demand.value
+                representative.maxLen = min(representative.maxLen, demand.maxLen)
+                self.groups[representative.name].append(demand.name)
+                continue
+
+            merged[key] = demand.name
+            self.reduced.demands[demand.name] = Demand(demand.name, demand.source, demand.target,
+                                                       demand.value, demand.maxLen, paths)
+            self.groups[demand.name] = [demand.name]
+
+        if network.scenarios is not None:
+            count = len(next(iter(network.scenarios.values())))
+            self.reduced.setScenarios({
+                name: np.sum([network.scenarios.get(member, [network.demands[member].value] * count)
+                              for member in members], axis=0).tolist()
+                for name, members in self.groups.items()
+            }, network.scenarioQuantile)
+
+    @staticmethod
+    def prune(paths: List[List['Link']]) -> List[List['Link']]:
+        """
+        Return @paths without those containing all links of another path and some more.
+        Paths with the same links are kept only once
+        """
+        linkSets = [frozenset(link.name for link in path) for path in paths]
+        kept = []
+        for i, links in enumerate(linkSets):
+            dominated = any(other < links or (other == links and j < i) for j, other in enumerate(linkSets))
+            if not dominated:
+                kept.append(paths[i])
+        return kept
+
+    def summary(self) -> str:
+        original = self.original.getIndex()
+        reduced = self.reduced.getIndex()
+        return (f'{original.demandsCount()} -> {reduced.demandsCount()} demands, '
+                f'{original.totalPathsCount()} -> {reduced.totalPathsCount()} paths')
+
+    def expandShares(self, shares: np.ndarray) -> np.ndarray:
+        """
+        Convert @shares of all paths of reduced model (see Chromosome.pathShares) to shares
+        of all paths of original model. Every merged demand is split like its group
+        """
+        original = self.original.getIndex()
+        reduced = self.reduced.getIndex()
+
+        expanded = np.zeros(original.totalPathsCount())
+        for name, members in self.groups.items():
+            first = reduced.pathOffset[reduced.demandPos[name]]
+            for member in members:
+                pathShares = {frozenset(link.name for link in path): shares[first + i]
+                              for i, path in enumerate(self.reduced.demands[name].paths)}
+                offset = original.pathOffset[original.demandPos[member]]
+                for i, path in enumerate(self.original.demands[member].paths):
+                    # Share goes to the first of paths with the same links
+                    expanded[offset + i] = pathShares.pop(frozenset(link.name for link in path), 0.0)
+        return expanded
+
+    def expand(self, chromosome: Union[Chromosome, SinglePathChromosome]) -> Union[Chromosome, SinglePathChromosome]:
+        """
+        Return chromosome of original model routing demands like @chromosome of reduced model
+        """
+        shares = self.expandShares(chromosome.pathShares())
+        if isinstance(chromosome, SinglePathChromosome):
+            index = self.original.getIndex()
+            expanded = SinglePathChromosome(self.original, chromosome.k, True)
+            expanded.choices = index.pathPosition[shares > 0.5].astype(np.uint8)
+            return expanded
+        return Chromosome.fromShares(self.original, shares, chromosome.singleMode, chromosome.k)
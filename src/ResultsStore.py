@@ -0,0 +1,107 @@
+"""
+    ResultsStore.py - SQLite store of scores of parameter sweep runs
+    Every run is keyed by hash of model file, parameters of the algorithm and the number
+    of repetition, so interrupted sweeps can skip finished runs and repeated configurations
+    reuse scores computed before
+"""
+import hashlib
+import json
+import sqlite3
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class ResultsStore:
+    def __init__(self, fileName: str):
+        self.connection = sqlite3.connect(fileName)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS runs (
+                model TEXT NOT NULL,
+                params TEXT NOT NULL,
+                run INTEGER NOT NULL,
+                score REAL NOT NULL,
+                PRIMARY KEY (model, params, run)
+            )
+        """)
+        self.connection.commit()
+
+    @staticmethod
+    def modelHash(fileName: str) -> str:
+        """
+        Return hash of model file contents, so renamed or moved files keep their results
+        """
+        digest = hashlib.sha256()
+        with open(fileName, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 16), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def paramsKey(params: Dict[str, Any]) -> str:
+        return json.dumps(params, sort_keys=True)
+
+    def scores(self, model: str, params: Dict[str, Any]) -> Dict[int, float]:
+        """
+        Return scores of finished runs of configuration @params, by the number of repetition
+        """
+        rows = self.connection.execute('SELECT run, score FROM runs WHERE model = ? AND params = ?',
+                                       (model, self.paramsKey(params)))
+        return dict(rows.fetchall())
+
+    def add(self, model: str, params: Dict[str, Any], run: int, score: float) -> None:
+        """
+        Save score of single run, committed right away so it survives interrupted sweep
+        """
+        self.connection.execute('INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?)',
+                                (model, self.paramsKey(params), run, score))
+        self.connection.commit()
+
+    @staticmethod
+    def matching(where: Optional[Dict[str, Any]]) -> Tuple[str, List[Any]]:
+        """
+        Return SQL condition (and its arguments) selecting runs with parameters equal to @where
+        """
+        where = where or {}
+        condition = ''.join(" AND json_extract(params, '$.' || ?) = ?" for _ in where)
+        return condition, [arg for name, value in where.items() for arg in (name, value)]
+
+    def aggregate(self, model: str, param: str, quantiles: Sequence[float] = (0.1, 0.5, 0.9),
+                  where: Optional[Dict[str, Any]] = None) -> List[List[Any]]:
+        """
+        Return rows of value of parameter @param, number of runs, mean score and
+        @quantiles of scores of all runs with that value. Only runs with parameters
+        equal to @where are included, scores of other problem variants aren't comparable
+        """
+        condition, args = self.matching(where)
+        rows = self.connection.execute(
+            "SELECT json_extract(params, '$.' || ?) AS value, score FROM runs WHERE model = ?" + condition +
+            ' ORDER BY value',
+            [param, model] + args
+        ).fetchall()
+
+        groups: Dict[Any, List[float]] = {}
+        for value, score in rows:
+            groups.setdefault(value, []).append(score)
+        return [
+            [value, len(scores), float(np.mean(scores))] + np.quantile(scores, quantiles).tolist()
+            for value, scores in groups.items()
+        ]
+
+    def best(self, model: str, where: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Return parameters and mean score of configuration with the best mean score,
+        out of configurations with parameters equal to @where
+        """
+        condition, args = self.matching(where)
+        row = self.connection.execute(
+            'SELECT params, AVG(score) AS mean FROM runs WHERE model = ?' + condition +
+            ' GROUP BY params ORDER BY mean LIMIT 1',
+            [model] + args
+        ).fetchone()
+        if row is None:
+            return None
+        return {'params': json.loads(row[0]), 'score': row[1]}
+
+    def close(self) -> None:
+        self.connection.close()
@@ -0,0 +1,119 @@
+"""
+    SharedPopulation.py - evaluation of population in worker processes
+    Index arrays of network model, genomes of evaluated chromosomes and their
+    scores live in shared memory blocks. Workers attach to them once at startup,
+    so evaluating a batch only takes sending ranges of rows to evaluate
+"""
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Tuple, Union
+
+import numpy as np
+
+import src.Kernels as Kernels
+from src.Chromosome import Chromosome
+from src.NetworkIndex import NetworkIndex
+from src.NetworkModel import NetworkModel
+from src.SinglePathChromosome import SinglePathChromosome
+
+# Arrays and settings of worker process, set by _attach
+_worker: Dict[str, Any] = {}
+
+
+def _attach(spec: Dict[str, Tuple[str, Tuple[int, ...], str]], packed: bool, k: int, backend: str) -> None:
+    Kernels.useBackend(backend)
+
+    blocks = []
+    arrays: Dict[str, np.ndarray] = {}
+    for name, (blockName, shape, dtype) in spec.items():
+        block = shared_memory.SharedMemory(blockName)
+        blocks.append(block)
+        arrays[name] = np.ndarray(shape, dtype, buffer=block.buf)
+
+    _worker.update(blocks=blocks, index=NetworkIndex.fromArrays(arrays), genomes=arrays['genomes'],
+                   scores=arrays['scores'], packed=packed, k=k)
+
+
+def _evaluateRows(rows: Tuple[int, int]) -> None:
+    """
+    Evaluate genomes in rows @rows[0] ... @rows[1] - 1, writing scores in place
+    """
+    index: NetworkIndex = _worker['index']
+    genomes: np.ndarray = _worker['genomes']
+    scores: np.ndarray = _worker['scores']
+
+    for row in range(*rows):
+        if _worker['packed']:
+            loads = Kernels.singlePathLoads(index, genomes[row])
+            scores[row] = Kernels.objective(loads, index.capacity, _worker['k'])
+        else:
+            loads = Kernels.flowLoads(index, genomes[row])
+            demands = Kernels.linkDemands(index, genomes[row])
+            scores[row] = Kernels.objective(loads, index.capacity, _worker['k'], demands)
+
+
+class SharedPopulation:
+    """
+    Pool of worker processes evaluating objective function of up to @rows
+    chromosomes at once. Packed genome stores path index of every demand,
+    float genome stores share of every path (see Chromosome.pathShares).
+    Workers use array kernels, so scores are identical to Chromosome.objFunc
+    unless reference 'python' backend is selected
+    """
+
+    def __init__(self, network: NetworkModel, rows: int, packed: bool, k: int = 1, workers: int = 2):
+        index = network.getIndex()
+        self.packed = packed
+        self.workers = workers
+
+        self.blocks: List[shared_memory.SharedMemory] = []
+        self.spec: Dict[str, Tuple[str, Tuple[int, ...], str]] = {}
+        for name in NetworkIndex.ARRAYS:
+            array = getattr(index, name)
+            self.allocate(name, array.shape, array.dtype)[:] = array
+
+        width = index.demandsCount() if packed else index.totalPathsCount()
+        self.genomes = self.allocate('genomes', (rows, width), np.uint8 if packed else np.float64)
+        self.scores = self.allocate('scores', (rows,), np.float64)
+
+        self.pool = mp.Pool(workers, initializer=_attach, initargs=(self.spec, packed, k, Kernels.activeBackend()))
+
+    def allocate(self, name: str, shape: Tuple[int, ...], dtype) -> np.ndarray:
+        """
+        Create shared memory block for array, which workers attach to as @name
+        """
+        dtype = np.dtype(dtype)
+        block = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+        self.blocks.append(block)
+        self.spec[name] = (block.name, tuple(shape), dtype.str)
+        return np.ndarray(shape, dtype, buffer=block.buf)
+
+    def evaluate(self, chromosomes: List[Union[Chromosome, SinglePathChromosome]]) -> List[float]:
+        """
+        Return objective function values of @chromosomes, computed by workers
+        """
+        scores: List[float] = []
+        rows = self.genomes.shape[0]
+        for start in range(0, len(chromosomes), rows):
+            batch = chromosomes[start:start + rows]
+            for row, chromosome in enumerate(batch):
+                self.genomes[row] = chromosome.pathIndices() if self.packed else chromosome.pathShares()
+
+            chunk = -(-len(batch) // self.workers)
+            self.pool.map(_evaluateRows, [(i, min(i + chunk, len(batch))) for i in range(0, len(batch), chunk)])
+            scores += self.scores[:len(batch)].tolist()
+        return scores
+
+    def close(self) -> None:
+        """
+        Stop workers and release shared memory
+        """
+        self.pool.terminate()
+        self.pool.join()
+
+        # Views of blocks have to be released before closing them
+        self.genomes = self.scores = None
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
@@ -0,0 +1,272 @@
+import math
+import random
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import src.BatchOperators as BatchOperators
+import src.Kernels as Kernels
+from src.Chromosome import Gene
+from src.FileParser import saveSolution
+from src.NetworkModel import NetworkModel
+from src.RandomStream import numpyGenerator
+
+
+class SinglePathChromosome:
+    """
+    Chromosome specialized for single mode. Instead of one Gene per demand, it
+    stores only the index of chosen path for every demand (in order of network.demands)
+    """
+
+    singleMode = True
+
+    def __init__(self, network: NetworkModel, k: int = 1, _skipGen: bool = False, rng: random.Random = random):
+        self.network = network
+        self.index = network.getIndex()
+        self.k = k
+
+        # Per-link loads of current choices, computed on first use
+        self.loads: Optional[np.ndarray] = None
+
+        if _skipGen:
+            return
+
+        # Same distribution as Gene.normalize applied to uniformly drawn path choices
+        self.choices = BatchOperators.randomChoices(self.index, 1, numpyGenerator(rng))[0]
+
+    @property
+    def choices(self) -> np.ndarray:
+        return self._choices
+
+    @choices.setter
+    def choices(self, choices: np.ndarray) -> None:
+        self._choices = choices
+        self.loads = None
+
+    @staticmethod
+    def fromSolution(network: NetworkModel, demandsFlows: Dict[str, List[Tuple[float, List[str]]]],
+                     k: int = 1, rng: random.Random = random) -> 'SinglePathChromosome':
+        """
+        Create chromosome using the path carrying the biggest flow in @demandsFlows
+        (see FileParser.loadSolution). Demands missing from solution get random paths
+        """
+        chromosome = SinglePathChromosome(network, k, rng=rng)
+        for demandName, choices in network.routingShares(demandsFlows).items():
+            chromosome.choices[chromosome.index.demandPos[demandName]] = choices.index(max(choices))
+        chromosome.loads = None
+        return chromosome
+
+    def __str__(self) -> str:
+        return f'SinglePathChromosome()[objFunc: {self.objFunc()}]'
+
+    def __deepcopy__(self, memo) -> 'SinglePathChromosome':
+        newObj = SinglePathChromosome(self.network, self.k, True)
+        newObj.index = self.index
+        newObj.choices = self.choices.copy()
+        newObj.loads = self.loads
+        return newObj
+
+    def shallowCopy(self) -> 'SinglePathChromosome':
+        """
+        Choices are a single small array, so shallow copy is the same as deep copy
+        """
+        return self.__deepcopy__({})
+
+    @property
+    def genes(self) -> Dict[str, Gene]:
+        """
+        Genes equivalent to chosen paths. They are built on every access,
+        so modifying them does not change the chromosome
+        """
+        genes: Dict[str, Gene] = {}
+        for name, choice in zip(self.index.demandNames, self.choices.tolist()):
+            gene = Gene(name, self.network, True, _skipGen=True)
+            gene.path_choices = [1 if i == choice else 0 for i in range(self.network.getDemand(name).pathsCount())]
+            genes[name] = gene
+        return genes
+
+    def genomeKey(self) -> bytes:
+        return self.choices.tobytes()
+
+    def saveToXML(self, filename: str):
+        """
+        Save chromosome to XML file compatible with SNDlib platform
+        Routings are generated demand by demand while the file is written
+        """
+        modsPerLink = self.modulesPerLink()
+        linkModules = (
+            (link, {'count': modsPerLink[link], 'capacity': self.network.links[link].module_capacity})
+            for link in modsPerLink
+        )
+
+        demandsFlow = (
+            (name, [(self.network.getDemand(name).value,
+                     [link.name for link in self.network.getDemand(name).paths[choice]])])
+            for name, choice in zip(self.index.demandNames, self.choices.tolist())
+        )
+        saveSolution(filename, linkModules, demandsFlow)
+
+    def pathIndices(self) -> np.ndarray:
+        return self.choices
+
+    def pathShares(self) -> np.ndarray:
+        return self.index.choiceShares(self.choices)
+
+    def linkLoads(self) -> np.ndarray:
+        """
+        Return the total capacity of each link, in order of network.links. With traffic
+        scenarios it's the load capacity is planned for (see Kernels.designLoads)
+        """
+        if self.loads is None:
+            if self.index.scenarioValues is not None:
+                self.loads = Kernels.designLoads(self.index, self.pathShares(),
+                                                 self.network.scenarioQuantile)
+            else:
+                self.loads = Kernels.singlePathLoads(self.index, self.choices)
+        return self.loads
+
+    def rescaleLoads(self, demands: np.ndarray, deltas: np.ndarray) -> None:
+        """
+        Update cached loads after values of @demands (positions in index) changed by @deltas
+        """
+        if self.index.scenarioValues is not None:
+            # Quantile of loads over scenarios can't be updated incrementally
+            self.loads = None
+            return
+        if self.loads is not None:
+            self.loads = self.loads + self.index.pathLoads(self.index.pathOffset[demands] + self.choices[demands], deltas)
+
+    def syncDemands(self, rng: random.Random = random) -> None:
+        """
+        Follow demands added to or removed from the network - path choices of remaining
+        demands are kept, new demands get random paths
+        """
+        index = self.network.getIndex()
+        if index is self.index:
+            return
+
+        choices = SinglePathChromosome(self.network, self.k, rng=rng).choices
+        kept = [(index.demandPos[name], choice) for name, choice in zip(self.index.demandNames, self.choices.tolist())
+                if name in index.demandPos]
+        for pos, choice in kept:
+            choices[pos] = choice
+
+        self.index = index
+        self.choices = choices
+
+    def totalLinksCapacity(self) -> Dict[str, float]:
+        return dict(zip(self.index.linkNames, self.linkLoads().tolist()))
+
+    def modulesPerLink(self, ceil: bool = True) -> Dict[str, int]:
+        modules = self.linkLoads() / self.index.capacity
+        if ceil:
+            return dict(zip(self.index.linkNames, np.ceil(modules).astype(np.int64).tolist()))
+        return dict(zip(self.index.linkNames, modules.tolist()))
+
+    def calcDemands(self) -> Dict[str, float]:
+        """
+        For each link calculate the spare capacity
+        """
+        loads = self.linkLoads()
+        spare = np.ceil(loads / self.index.capacity) * self.index.capacity - loads
+        return dict(zip(self.index.linkNames, spare.tolist()))
+
+    def objFunc(self) -> float:
+        """
+        Same objective function as Chromosome.objFunc, computed on arrays
+        """
+        return Kernels.objective(self.linkLoads(), self.index.capacity, self.k)
+
+    def linkCost(self, link: int, load: float) -> float:
+        """
+        Return contribution of link with index @link carrying @load capacity units
+        to the objective function
+        """
+        modCap = self.network.links[self.index.linkNames[link]].module_capacity
+        modules = math.ceil(load / modCap)
+        cap = modules * modCap
+        wasted = math.ceil(cap / self.k) * self.k - cap
+        return (cap - load) / 100 + modules * 10 + wasted / 10
+
+    def localSearch(self, maxPasses: int = 1) -> int:
+        """
+        Greedily reroute single demands onto the admissible path which reduces
+        objective function the most, see Chromosome.localSearch
+        Returns the number of applied moves
+        """
+        loads: List[float] = self.linkLoads().tolist()
+        offsets: List[int] = self.index.pathOffset.tolist()
+        counts: List[int] = self.index.pathsCount.tolist()
+        values: List[float] = self.index.demandValue.tolist()
+        moves = 0
+
+        for _ in range(maxPasses):
+            improved = False
+            for d, choice in enumerate(self.choices.tolist()):
+                oldLinks = self.index.pathLinks[offsets[d] + choice]
+
+                bestDelta = -1e-9
+                bestPath = None
+                for i in range(counts[d]):
+                    if i == choice:
+                        continue
+
+                    newLinks = self.index.pathLinks[offsets[d] + i]
+                    newLoads: Dict[int, float] = {link: loads[link] for link in oldLinks + newLinks}
+                    for link in oldLinks:
+                        newLoads[link] -= values[d]
+                    for link in newLinks:
+                        newLoads[link] += values[d]
+
+                    delta = 0.0
+                    for link, load in newLoads.items():
+                        delta += self.linkCost(link, load) - self.linkCost(link, loads[link])
+
+                    if delta < bestDelta:
+                        bestDelta = delta
+                        bestPath = i
+
+                if bestPath is None:
+                    continue
+
+                for link in oldLinks:
+                    loads[link] -= values[d]
+                for link in self.index.pathLinks[offsets[d] + bestPath]:
+                    loads[link] += values[d]
+                self.choices[d] = bestPath
+                self.loads = None
+
+                moves += 1
+                improved = True
+
+            if not improved:
+                break
+        return moves
+
+    def mutate(self, mutationFactor: float, rng: random.Random = random) -> None:
+        """
+        Mutate chosen path of each demand with probability @mutationFactor. New path
+        is the one Chromosome.mutate would select for the same random draws
+        """
+        self.choices = BatchOperators.mutateChoices(self.index, self.choices[np.newaxis], mutationFactor,
+                                                    numpyGenerator(rng))[0]
+
+    @staticmethod
+    def reproduce(parent1: 'SinglePathChromosome', parent2: 'SinglePathChromosome',
+                  xoverMode: str, rng: random.Random = random) -> 'SinglePathChromosome':
+        """
+        Crossover operating directly on path indices, equivalent to Chromosome.reproduce
+        for one-hot path choices
+        """
+        child = SinglePathChromosome(parent1.network, parent1.k, True)
+        first = parent1.choices
+        second = parent2.choices
+
+        if xoverMode == 'hor-slice':
+            slicePos = rng.randint(0, first.size)
+            child.choices = np.concatenate((first[:slicePos], second[slicePos:]))
+        else:
+            child.choices = BatchOperators.crossChoices(parent1.index, first[np.newaxis], second[np.newaxis],
+                                                        xoverMode, numpyGenerator(rng))[0]
+
+        return child
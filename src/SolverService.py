@@ -0,0 +1,244 @@
+"""
+    SolverService.py - long-running solver service
+    Clients connect over Unix socket (or localhost TCP port) and exchange
+    newline-delimited JSON messages. Solve request:
+        {"command": "solve", "model": "polska.txt", "params": {"epochs": 500}, "progressEvery": 10}
+    is answered with a stream of events: queued, started, progress..., result (or error/rejected)
+    Jobs wait in a bounded queue and run on a pool of worker processes, each of
+    them keeping parsed network models in memory between jobs
+"""
+import asyncio
+import concurrent.futures
+import itertools
+import json
+import multiprocessing as mp
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.GeneticAlgorithm import GeneticAlgorithm
+from src.NetworkModel import NetworkModel
+from src.RandomStream import RandomStream
+
+# Same defaults as main.py
+DEFAULT_PARAMS: Dict[str, Any] = {
+    'n': 10,
+    'epochs': 100,
+    'mutationFactor': 0.3,
+    'singleMode': True,
+    'xoverChance': 0.5,
+    'selection': 'exp',
+    'succession': 'best',
+    'modularity': 1,
+    'xoverMode': 'avg',
+    'localSearch': 0,
+    'adaptive': False,
+    'batched': False,
+    'restartEntropy': 0.0,
+    'restartStall': 0,
+    'restartRatio': 0.5,
+    'cacheSize': 10000,
+    'genome': 'auto',
+    'init': 'random',
+    'seed': None,
+}
+
+# Models parsed by this (worker) process with modification time of their files, keyed by absolute path
+_models: Dict[str, Tuple[float, NetworkModel]] = {}
+
+
+def loadModel(fileName: str) -> NetworkModel:
+    """
+    Return parsed network model, parsing the file only if it wasn't loaded before or has changed
+    """
+    path = os.path.abspath(fileName)
+    mtime = os.path.getmtime(path)
+    if path not in _models or _models[path][0] != mtime:
+        network = NetworkModel(fileName)
+        network.parse()
+        network.getIndex()
+        _models[path] = (mtime, network)
+    return _models[path][1]
+
+
+def preloadModels(fileNames: List[str]) -> None:
+    for fileName in fileNames:
+        loadModel(fileName)
+
+
+def createAlgorithm(network: NetworkModel, params: Dict[str, Any]) -> GeneticAlgorithm:
+    """
+    Create genetic algorithm from @params, missing ones are taken from DEFAULT_PARAMS
+    """
+    unknown = set(params) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise ValueError('Unknown parameters: ' + ', '.join(sorted(unknown)))
+    params = {**DEFAULT_PARAMS, **params}
+
+    return GeneticAlgorithm(network, params['n'], params['epochs'], params['mutationFactor'],
+                            params['singleMode'], params['xoverChance'], params['selection'],
+                            params['succession'], params['modularity'], params['xoverMode'],
+                            localSearch=params['localSearch'], cacheSize=params['cacheSize'],
+                            genome=params['genome'], rng=RandomStream(params['seed']),
+                            adaptive=params['adaptive'], restartEntropy=params['restartEntropy'],
+                            restartStall=params['restartStall'], restartRatio=params['restartRatio'],
+                            batched=params['batched'], init=params['init'])
+
+
+def solveJob(jobId: int, model: str, params: Dict[str, Any], progressQueue, progressEvery: int) -> Dict[str, Any]:
+    """
+    Run genetic algorithm in worker process, progress events are sent through @progressQueue
+    """
+    genetic = createAlgorithm(loadModel(model), params)
+
+    def progress(epoch: int, score: float):
+        if progressEvery > 0 and epoch % progressEvery == 0:
+            progressQueue.put((jobId, {'event': 'progress', 'job': jobId, 'epoch': epoch, 'best': score}))
+
+    score = genetic.run(True, progress)
+    best = genetic.population[0]
+    modules = best.modulesPerLink()
+    return {
+        'event': 'result',
+        'job': jobId,
+        'score': score,
+        'totalModules': sum(modules.values()),
+        'modulesPerLink': modules,
+        'pathChoices': {name: gene.path_choices for name, gene in best.genes.items()},
+    }
+
+
+class SolverService:
+    def __init__(self, workers: int = os.cpu_count(), queueSize: int = 100, preload: Optional[List[str]] = None):
+        self.workers = workers
+        self.queueSize = queueSize
+        self.preload = preload or []
+
+        self.jobIds = itertools.count()
+        self.listeners: Dict[int, asyncio.Queue] = {}
+        self.running = 0
+        # Address the service listens on, set once it's started
+        self.address: Optional[Any] = None
+
+    async def serve(self, socketPath: Optional[str] = None, host: str = '127.0.0.1', port: Optional[int] = None):
+        """
+        Start accepting clients on Unix socket @socketPath, or on TCP @host:@port if port is given
+        (port 0 picks free port, see address)
+        """
+        self.jobs: asyncio.Queue = asyncio.Queue(self.queueSize)
+        self.pool = concurrent.futures.ProcessPoolExecutor(self.workers, initializer=preloadModels,
+                                                           initargs=(self.preload,))
+        self.manager = mp.Manager()
+        self.progress = self.manager.Queue()
+
+        if port is not None:
+            server = await asyncio.start_server(self.handleClient, host, port)
+        else:
+            if os.path.exists(socketPath):
+                os.remove(socketPath)
+            server = await asyncio.start_unix_server(self.handleClient, socketPath)
+        self.address = server.sockets[0].getsockname()
+
+        tasks = [asyncio.create_task(self.worker()) for _ in range(self.workers)]
+        tasks.append(asyncio.create_task(self.pumpProgress()))
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.progress.put(None)
+            self.pool.shutdown(cancel_futures=True)
+            self.manager.shutdown()
+            if port is None and os.path.exists(socketPath):
+                os.remove(socketPath)
+
+    async def pumpProgress(self):
+        """
+        Forward progress events from worker processes to clients waiting for them
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await loop.run_in_executor(None, self.progress.get)
+            if item is None:
+                return
+            jobId, event = item
+            if jobId in self.listeners:
+                self.listeners[jobId].put_nowait(event)
+
+    async def worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            jobId, model, params, progressEvery = await self.jobs.get()
+            events = self.listeners.get(jobId)
+            if events is None:
+                # Client disconnected while the job was waiting in queue
+                continue
+            events.put_nowait({'event': 'started', 'job': jobId})
+
+            self.running += 1
+            try:
+                result = await loop.run_in_executor(self.pool, solveJob, jobId, model, params,
+                                                    self.progress, progressEvery)
+            except Exception as e:
+                result = {'event': 'error', 'job': jobId, 'message': f'{type(e).__name__}: {e}'}
+            finally:
+                self.running -= 1
+            events.put_nowait(result)
+
+    def status(self) -> Dict[str, Any]:
+        return {'event': 'status', 'queued': self.jobs.qsize(), 'running': self.running, 'workers': self.workers}
+
+    async def handleClient(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        async def send(message: Dict[str, Any]):
+            writer.write(json.dumps(message).encode() + b'\n')
+            await writer.drain()
+
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    request = None
+                if not isinstance(request, dict):
+                    await send({'event': 'error', 'message': 'Request must be a JSON object'})
+                    continue
+
+                command = request.get('command', 'solve')
+                if command == 'status':
+                    await send(self.status())
+                elif command == 'solve':
+                    await self.solve(request, send)
+                else:
+                    await send({'event': 'error', 'message': f'Unknown command "{command}"'})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def solve(self, request: Dict[str, Any], send):
+        """
+        Queue solve job and stream its events back until it's finished
+        """
+        jobId = next(self.jobIds)
+        model = request.get('model')
+        if not isinstance(model, str) or not os.path.exists(model):
+            await send({'event': 'error', 'job': jobId, 'message': f'Model file "{model}" does not exist'})
+            return
+
+        events: asyncio.Queue = asyncio.Queue()
+        self.listeners[jobId] = events
+        try:
+            try:
+                self.jobs.put_nowait((jobId, model, request.get('params', {}), request.get('progressEvery', 0)))
+            except asyncio.QueueFull:
+                await send({'event': 'rejected', 'job': jobId, 'message': 'Job queue is full'})
+                return
+
+            await send({'event': 'queued', 'job': jobId, 'position': self.jobs.qsize()})
+            while True:
+                event = await events.get()
+                await send(event)
+                if event['event'] in ['result', 'error']:
+                    return
+        finally:
+            del self.listeners[jobId]
@@ -0,0 +1,172 @@
+"""
+    Survivability.py - link failure analysis of network design solutions
+    Every failure scenario removes flows crossing failed links and reroutes each affected
+    demand onto one of its remaining admissible paths - the one with the biggest spare
+    capacity left on its bottleneck link. Scenario reports demands left without any path
+    and links whose installed modules can't carry rerouted traffic
+"""
+import concurrent.futures
+import itertools
+import multiprocessing as mp
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from src.Chromosome import Chromosome
+from src.NetworkModel import NetworkModel
+from src.SinglePathChromosome import SinglePathChromosome
+
+# Load exceeding installed capacity by less than this is treated as rounding error
+OVERLOAD_TOLERANCE = 1e-9
+
+# Columns of rows returned by SurvivabilityAnalyzer.summary
+SUMMARY_COLUMNS = ['Failed links', 'Unroutable demands', 'Lost traffic', 'Rerouted demands',
+                   'Overloaded links', 'Excess load', 'Unroutable demand names', 'Overloaded link names']
+
+# Analyzer used by worker processes, set by _attach
+_analyzer: Optional['SurvivabilityAnalyzer'] = None
+
+
+def _attach(analyzer: 'SurvivabilityAnalyzer') -> None:
+    global _analyzer
+    _analyzer = analyzer
+
+
+def _evaluateScenarios(scenarios: List[Tuple[int, ...]]) -> List[Dict[str, Any]]:
+    return [_analyzer.evaluate(failed) for failed in scenarios]
+
+
+class SurvivabilityAnalyzer:
+    """
+    Failure analysis of routing given by @shares of all paths (see Chromosome.pathShares)
+    with @modules installed on every link (in order of network.links)
+    """
+
+    def __init__(self, network: NetworkModel, shares: np.ndarray, modules: np.ndarray):
+        index = network.getIndex()
+        self.index = index
+        self.shares = shares
+        self.installed = modules * index.capacity
+
+        # Traffic of every path and loads of links without failures
+        self.flows = index.demandValue[index.pathDemand] * shares
+        self.loads = index.pathLoads(np.arange(index.totalPathsCount()), self.flows)
+
+        # Inverted index link -> paths crossing it, in CSR form: paths crossing link `l`
+        # are linkPaths[linkPathPtr[l]:linkPathPtr[l + 1]], their demands are pathDemand[path]
+        order = np.argsort(index.pathLinkIdx, kind='stable')
+        self.linkPaths = index.entryPath[order]
+        self.linkPathPtr = np.concatenate(([0], np.cumsum(np.bincount(index.pathLinkIdx,
+                                                                      minlength=index.linksCount())))).astype(np.intp)
+
+    @staticmethod
+    def fromChromosome(chromosome: Union[Chromosome, SinglePathChromosome]) -> 'SurvivabilityAnalyzer':
+        modules = chromosome.modulesPerLink()
+        return SurvivabilityAnalyzer(chromosome.network, chromosome.pathShares(),
+                                     np.array([modules[name] for name in chromosome.network.links], dtype=np.float64))
+
+    @staticmethod
+    def fromSolution(network: NetworkModel, linksModules: Dict[str, Any],
+                     demandsFlows: Dict[str, List[Tuple[float, List[str]]]]) -> 'SurvivabilityAnalyzer':
+        """
+        Create analyzer of solution loaded by FileParser.loadSolution. Installed modules are
+        converted to the number of modules of network links, flows over paths which are not
+        admissible are skipped
+        """
+        index = network.getIndex()
+        shares = np.zeros(index.totalPathsCount())
+        for name, choices in network.routingShares(demandsFlows).items():
+            first = index.pathOffset[index.demandPos[name]]
+            shares[first:first + len(choices)] = choices
+
+        capacity = np.array([linksModules[name]['capacity'] * linksModules[name]['count']
+                             if name in linksModules else 0.0 for name in index.linkNames])
+        return SurvivabilityAnalyzer(network, shares, capacity / index.capacity)
+
+    def linkPathsOf(self, link: int) -> np.ndarray:
+        return self.linkPaths[self.linkPathPtr[link]:self.linkPathPtr[link + 1]]
+
+    def pathLinksOf(self, path: int) -> np.ndarray:
+        return self.index.pathLinkIdx[self.index.pathLinkPtr[path]:self.index.pathLinkPtr[path + 1]]
+
+    def evaluate(self, failed: Tuple[int, ...]) -> Dict[str, Any]:
+        """
+        Fail links with indices @failed and reroute affected demands. Return names of failed
+        links, demands left without admissible path, traffic they lose, overloaded links with
+        their excess load and the number of rerouted demands
+        """
+        index = self.index
+        downPaths = set(itertools.chain.from_iterable(self.linkPathsOf(link).tolist() for link in failed))
+
+        # Only flows of paths crossing failed links are removed
+        brokenPaths = np.array(sorted(path for path in downPaths if self.flows[path] > 0), dtype=np.intp)
+        loads = self.loads.copy()
+        lost: Dict[int, float] = {}
+        if brokenPaths.size:
+            loads -= index.pathLoads(brokenPaths, self.flows[brokenPaths])
+            for path, flow in zip(brokenPaths.tolist(), self.flows[brokenPaths].tolist()):
+                demand = int(index.pathDemand[path])
+                lost[demand] = lost.get(demand, 0.0) + flow
+        loads[list(failed)] = 0.0
+
+        # The biggest flows are rerouted first, while there's the most spare capacity
+        unroutable: List[str] = []
+        lostTraffic = 0.0
+        for demand, flow in sorted(lost.items(), key=lambda item: (-item[1], item[0])):
+            first = index.pathOffset[demand]
+            alive = [path for path in range(first, first + index.pathsCount[demand]) if path not in downPaths]
+            if not alive:
+                unroutable.append(index.demandNames[demand])
+                lostTraffic += flow
+                continue
+
+            spare = [float(np.min(self.installed[self.pathLinksOf(path)] - loads[self.pathLinksOf(path)]))
+                     for path in alive]
+            chosen = alive[int(np.argmax(spare))]
+            loads[self.pathLinksOf(chosen)] += flow
+
+        excess = loads - self.installed
+        overloaded = {index.linkNames[link]: float(excess[link])
+                      for link in np.nonzero(excess > OVERLOAD_TOLERANCE * np.maximum(self.installed, 1))[0].tolist()}
+        return {
+            'failed': [index.linkNames[link] for link in failed],
+            'unroutable': unroutable,
+            'lost': lostTraffic,
+            'overloaded': overloaded,
+            'rerouted': len(lost) - len(unroutable),
+        }
+
+    def scenarios(self, failures: int = 1) -> Iterator[Tuple[int, ...]]:
+        """
+        Yield all combinations of up to @failures links failing at once
+        """
+        links = range(self.index.linksCount())
+        return itertools.chain.from_iterable(itertools.combinations(links, count) for count in range(1, failures + 1))
+
+    def analyze(self, failures: int = 1, workers: int = 0, chunkSize: int = 64) -> List[Dict[str, Any]]:
+        """
+        Evaluate all scenarios of up to @failures links failing at once (see evaluate),
+        split into chunks of @chunkSize scenarios evaluated by @workers processes (0 evaluates
+        in this process)
+        """
+        scenarios = list(self.scenarios(failures))
+        if workers <= 0:
+            return [self.evaluate(failed) for failed in scenarios]
+
+        chunks = [scenarios[i:i + chunkSize] for i in range(0, len(scenarios), chunkSize)]
+        context = mp.get_context('fork') if 'fork' in mp.get_all_start_methods() else None
+        with concurrent.futures.ProcessPoolExecutor(workers, mp_context=context,
+                                                    initializer=_attach, initargs=(self,)) as pool:
+            return list(itertools.chain.from_iterable(pool.map(_evaluateScenarios, chunks)))
+
+    @staticmethod
+    def summary(results: List[Dict[str, Any]]) -> List[List[Any]]:
+        """
+        Return rows of CSV file describing every scenario, see SUMMARY_COLUMNS
+        """
+        return [
+            [' '.join(result['failed']), len(result['unroutable']), result['lost'], result['rerouted'],
+             len(result['overloaded']), sum(result['overloaded'].values()),
+             ' '.join(result['unroutable']), ' '.join(result['overloaded'])]
+            for result in results
+        ]
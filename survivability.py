@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+import argparse
+import os
+
+import src.FileParser as FileParser
+from src.NetworkModel import NetworkModel
+from src.NetworkVisualizer import NetworkVisualizer
+from src.Survivability import SUMMARY_COLUMNS, SurvivabilityAnalyzer
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check which link failures a network design solution survives')
+    parser.add_argument('solution', metavar='FILE', type=str, help='Solution XML saved by solver or SNDlib')
+    parser.add_argument('--model', '-f', metavar='FILE', type=str, default='polska.txt',
+                        help='Path to file describing network model')
+    parser.add_argument('--failures', metavar='N', type=int, default=1, choices=[1, 2],
+                        help='Maximal number of links failing at once (1 / 2)')
+    parser.add_argument('--workers', '-w', metavar='N', type=int, default=os.cpu_count(),
+                        help='Number of worker processes evaluating failure scenarios')
+    parser.add_argument('--output', metavar='DIR', dest='output_dir', type=str, default='output',
+                        help='Name of directory to which survivability.csv will be saved')
+    args = parser.parse_args()
+
+    network = NetworkModel(args.model)
+    network.parse()
+
+    analyzer = SurvivabilityAnalyzer.fromSolution(network, *FileParser.loadSolution(args.solution))
+    results = analyzer.analyze(args.failures, args.workers)
+
+    NetworkVisualizer(args.output_dir, False).outputCSV('survivability.csv', SUMMARY_COLUMNS,
+                                                        SurvivabilityAnalyzer.summary(results))
+    print(f'[i] Scenarios: {len(results)}, '
+          f'with unroutable demands: {sum(1 for result in results if result["unroutable"])}, '
+          f'with overloaded links: {sum(1 for result in results if result["overloaded"])}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+import random
+from unittest import TestCase
+
+from src.AdaptiveRates import AdaptiveRates
+
+
+class TestAdaptiveRates(TestCase):
+    def test_one_fifth_rule(self):
+        rates = AdaptiveRates(0.3, 0.5)
+        rates.update([True, True, False], [], 1)
+        self.assertGreater(rates.mutationFactor, 0.3)
+
+        rates = AdaptiveRates(0.3, 0.5)
+        rates.update([False] * 9 + [True], [], 1)
+        self.assertLess(rates.mutationFactor, 0.3)
+
+    def test_mutation_bounds(self):
+        rates = AdaptiveRates(0.3, 0.5, minMutation=0.1)
+        for epoch in range(1, 40):
+            rates.update([False], [], epoch)
+        self.assertEqual(rates.mutationFactor, 0.1)
+
+    def test_stall_boost(self):
+        rates = AdaptiveRates(0.3, 0.5, stallEpochs=10)
+        rates.update([], [], 10)
+        self.assertAlmostEqual(rates.mutationFactor, 0.6)
+
+    def test_mode_credit(self):
+        rates = AdaptiveRates(0.3, 0.5)
+        for _ in range(50):
+            rates.update([False], [('avg', True), ('hor-slice', False), ('vert-slice', False)], 1)
+        self.assertGreater(rates.xoverChance, 0.5)
+
+        rng = random.Random(1)
+        modes = [rates.chooseMode(rng) for _ in range(1000)]
+        self.assertGreater(modes.count('avg'), 800)
+        self.assertGreater(modes.count('hor-slice'), 0)
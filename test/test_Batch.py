@@ -0,0 +1,63 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+import batch
+
+TEST_MODEL = os.path.join(os.path.dirname(__file__), 'testModel.txt')
+POLSKA = os.path.join(os.path.dirname(__file__), '..', 'polska.txt')
+
+
+class TestBatch(TestCase):
+    def setUp(self):
+        self.tempDir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tempDir.cleanup()
+
+    def writeManifest(self, manifest) -> str:
+        fileName = os.path.join(self.tempDir.name, 'manifest.json')
+        with open(fileName, 'w') as file:
+            json.dump(manifest, file)
+        return fileName
+
+    def test_load_manifest(self):
+        jobs = batch.loadManifest(self.writeManifest({
+            'defaults': {'epochs': 5, 'n': 4},
+            'jobs': [{'model': TEST_MODEL, 'params': {'n': 6}, 'output': 'out'}, {'model': POLSKA}],
+        }))
+        self.assertListEqual(jobs, [
+            {'id': 0, 'model': TEST_MODEL, 'params': {'epochs': 5, 'n': 6}, 'output': 'out'},
+            {'id': 1, 'model': POLSKA, 'params': {'epochs': 5, 'n': 4}, 'output': os.path.join('output', 'job_1')},
+        ])
+
+        # Plain list of jobs without defaults
+        jobs = batch.loadManifest(self.writeManifest([{'model': TEST_MODEL}]))
+        self.assertDictEqual(jobs[0]['params'], {})
+
+        with self.assertRaises(KeyError):
+            batch.loadManifest(self.writeManifest([{'params': {}}]))
+
+    def test_sort_jobs(self):
+        jobs = batch.loadManifest(self.writeManifest([
+            {'model': TEST_MODEL},
+            {'model': os.path.join(self.tempDir.name, 'missing.txt')},
+            {'model': POLSKA},
+        ]))
+        self.assertLess(batch.jobSize(jobs[0]), batch.jobSize(jobs[2]))
+
+        # The biggest job goes first, job with missing model fails without stopping the rest
+        runnable, failures = batch.sortJobs(jobs)
+        self.assertListEqual([job['id'] for job in runnable], [2, 0])
+        self.assertListEqual([failure['id'] for failure in failures], [1])
+        self.assertTrue(failures[0]['error'].startswith('FileNotFoundError'))
+
+    def test_run_job(self):
+        output = os.path.join(self.tempDir.name, 'job')
+        result = batch.runJob({'id': 3, 'model': TEST_MODEL, 'params': {'n': 4, 'epochs': 3, 'seed': 1},
+                               'output': output})
+        self.assertEqual(result['id'], 3)
+        self.assertGreater(result['score'], 0)
+        for fileName in ['cost_history.csv', 'modules_per_link.csv', 'path_choices.csv']:
+            self.assertTrue(os.path.exists(os.path.join(output, fileName)), fileName)
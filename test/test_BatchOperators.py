@@ -0,0 +1,101 @@
+import os
+import random
+from unittest import TestCase
+
+import numpy as np
+
+import src.BatchOperators as BatchOperators
+from src.Chromosome import Chromosome, Gene
+from src.NetworkModel import NetworkModel
+from src.SinglePathChromosome import SinglePathChromosome
+
+
+class TestBatchOperators(TestCase):
+    def setUp(self):
+        random.seed(1024)
+        np.random.seed(1024)
+
+        self.network = NetworkModel(os.path.join(os.path.dirname(__file__), 'testModel.txt'))
+        self.network.parse()
+        self.index = self.network.getIndex()
+
+    def test_normalize_like_gene(self):
+        shares = np.random.uniform(0, 2, (20, self.index.totalPathsCount()))
+        shares[0, :2] = 0
+
+        for singleMode in [True, False]:
+            normalized = BatchOperators.normalizeShares(self.index, shares, singleMode)
+            for row in range(shares.shape[0]):
+                chromosome = Chromosome(self.network, singleMode)
+                for d, name in enumerate(self.index.demandNames):
+                    first = self.index.pathOffset[d]
+                    gene: Gene = chromosome.writableGene(name)
+                    gene.path_choices = shares[row, first:first + self.index.pathsCount[d]].tolist()
+                    gene.normalize()
+                self.assertTrue(np.array_equal(normalized[row], chromosome.pathShares()))
+
+    def test_mutation(self):
+        choices = np.stack([SinglePathChromosome(self.network).choices for _ in range(50)])
+        shares = np.stack([Chromosome(self.network, False).pathShares() for _ in range(50)])
+        generator = np.random.default_rng(7)
+
+        self.assertTrue(np.array_equal(BatchOperators.mutateChoices(self.index, choices, 0.0, generator), choices))
+        self.assertTrue(np.array_equal(BatchOperators.mutateShares(self.index, shares, 0.0, generator, False), shares))
+
+        mutated = BatchOperators.mutateChoices(self.index, choices, 1.0, generator)
+        self.assertTrue(np.all(mutated < self.index.pathsCount))
+        self.assertFalse(np.array_equal(mutated, choices))
+
+        mutated = BatchOperators.mutateShares(self.index, shares, 1.0, generator, False)
+        self.assertTrue(np.allclose(np.add.reduceat(mutated, self.index.pathOffset, axis=1), 1))
+        self.assertFalse(np.array_equal(mutated, shares))
+
+    def test_breed(self):
+        for packed in [True, False]:
+            if packed:
+                genomes = np.stack([SinglePathChromosome(self.network).choices for _ in range(4)])
+            else:
+                genomes = np.stack([Chromosome(self.network, False).pathShares() for _ in range(4)])
+
+            first = np.array([0, 1, 2, 3])
+            second = np.array([0, 2, 3, 0])
+            modes = [None, 'hor-slice', 'avg', 'vert-slice']
+            children = BatchOperators.breed(self.index, genomes, first, second, modes, 0.0,
+                                            np.random.default_rng(1), packed, False)
+
+            self.assertEqual(children.shape, genomes.shape)
+            self.assertTrue(np.array_equal(children[0], genomes[0]))
+            for row in range(1, 4):
+                if packed:
+                    self.assertTrue(np.all(children[row] < self.index.pathsCount))
+                else:
+                    self.assertTrue(np.allclose(np.add.reduceat(children[row], self.index.pathOffset), 1))
+
+            with self.assertRaises(ValueError):
+                BatchOperators.breed(self.index, genomes, first, second, ['bogus'] * 4, 0.0,
+                                     np.random.default_rng(1), packed, False)
+
+    def test_initialization(self):
+        generator = np.random.default_rng(7)
+        choices = BatchOperators.randomChoices(self.index, 500, generator)
+        self.assertEqual(choices.shape, (500, self.index.demandsCount()))
+        self.assertTrue(np.all(choices < self.index.pathsCount))
+
+        # Same draws give the same genomes in both representations
+        weights = BatchOperators.pathWeights(self.index, 20, np.random.default_rng(3), 'shortest')
+        shares = BatchOperators.randomShares(self.index, 20, np.random.default_rng(3), True, 'shortest')
+        packed = BatchOperators.randomChoices(self.index, 20, np.random.default_rng(3), 'shortest')
+        self.assertTrue(np.array_equal(shares, BatchOperators.normalizeShares(self.index, weights, True)))
+        self.assertTrue(np.array_equal(shares, np.stack([self.index.choiceShares(row) for row in packed])))
+
+        # Biased initialization prefers paths with fewer links
+        shortest = BatchOperators.shortestChoices(self.index)
+        lengths = self.index.pathLength[self.index.pathOffset + shortest]
+        self.assertTrue(np.array_equal(lengths, np.minimum.reduceat(self.index.pathLength, self.index.pathOffset)))
+
+        uniform = BatchOperators.randomChoices(self.index, 2000, generator)
+        biased = BatchOperators.randomChoices(self.index, 2000, generator, 'shortest')
+        self.assertGreater(np.mean(biased == shortest), np.mean(uniform == shortest))
+
+        with self.assertRaises(ValueError):
+            BatchOperators.pathWeights(self.index, 1, generator, 'longest')
@@ -1,8 +1,16 @@
+import copy
+import os
 import random
+import subprocess
+import sys
+from typing import Dict, List, Tuple
 from unittest import TestCase
 
+import numpy as np
+
 from src.Chromosome import Chromosome
 from src.NetworkModel import NetworkModel, Link, Demand, Node
+from src.SinglePathChromosome import SinglePathChromosome
 
 
 class TestChromosome(TestCase):
@@ -10,12 +18,9 @@ class TestChromosome(TestCase):
         random.seed(1024)
         self.assertEqual(random.randint(0, 1000), 816)
 
-        self.network = NetworkModel('./testModel.txt')
+        self.network = NetworkModel(os.path.join(os.path.dirname(__file__), 'testModel.txt'))
         self.network.parse()
 
-        # TODO: Fix unit-tests
-        self.fail()
-
 
 class TestReproductionSingleMode(TestChromosome):
     def setUp(self):
@@ -23,7 +28,8 @@ class TestReproductionSingleMode(TestChromosome):
         self.chromosome1 = Chromosome(self.network)
         self.chromosome2 = Chromosome(self.network)
 
-        self.child1, self.child2 = Chromosome.reproduce(self.chromosome1, self.chromosome2)
+        self.child1 = Chromosome.reproduce(self.chromosome1, self.chromosome2, 'avg')
+        self.child2 = Chromosome.reproduce(self.chromosome1, self.chromosome2, 'vert-slice')
 
     def test_chromosome_configs(self):
         # Check that single_mode was preserved
@@ -39,13 +45,13 @@ class TestReproductionSingleMode(TestChromosome):
         self.assertEqual(len(self.child2.genes), len(self.chromosome2.genes))
 
         for gene in self.child1.genes.values():
-            self.assertEqual(len(gene.getModules()), len(self.network.links))
+            self.assertEqual(len(gene.getCapacity()), len(self.network.links))
             self.assertEqual(
                 len(gene.path_choices),
                 self.network.getDemand(gene.name).pathsCount()
             )
         for gene in self.child2.genes.values():
-            self.assertEqual(len(gene.getModules()), len(self.network.links))
+            self.assertEqual(len(gene.getCapacity()), len(self.network.links))
             self.assertEqual(
                 len(gene.path_choices),
                 self.network.getDemand(gene.name).pathsCount()
@@ -62,6 +68,7 @@ class TestReproductionSingleMode(TestChromosome):
         self.assertEqual(id(self.child1.network), id(self.chromosome1.network))
         self.assertEqual(id(self.child2.network), id(self.chromosome2.network))
 
+        # Averaged and sliced genes are new objects, only hor-slice shares genes with parents
         for demandName in self.child1.genes:
             self.assertNotEqual(id(self.child1.genes[demandName]), id(self.child2.genes[demandName]))
             self.assertNotEqual(id(self.child1.genes[demandName]), id(self.chromosome1.genes[demandName]))
@@ -80,80 +87,216 @@ class TestObjFunc(TestChromosome):
         super().setUp()
         self.chromosome = Chromosome(self.network, singleMode=True)
 
+        # Demand_0_1 over Link_0_1, Demand_0_2 over Link_0_2 and Link_2_3, Demand_0_3 over Link_0_2
+        for name, choices in [('Demand_0_1', [1, 0]), ('Demand_0_2', [0, 1]), ('Demand_0_3', [1, 0])]:
+            self.chromosome.writableGene(name).path_choices = choices
+
     def test_modules_count_ceil(self):
         self.assertDictEqual(
             self.chromosome.modulesPerLink(),
-            {'Link_0_1': 0.0, 'Link_0_2': 2.0,
-             'Link_2_3': 2.0, 'Link_3_1': 1.0}
+            {'Link_0_1': 1, 'Link_0_2': 1,
+             'Link_2_3': 1, 'Link_3_1': 0}
         )
 
     def test_modules_count_without_ceil(self):
         self.assertDictEqual(
             self.chromosome.modulesPerLink(ceil=False),
             {
-                'Link_0_1': 0.0,
-                'Link_0_2': 1.5710835338674305,
-                'Link_2_3': 1.3138313299610425,
-                'Link_3_1': 0.445120740777845
+                'Link_0_1': 195 / 622,
+                'Link_0_2': 332 / 622,
+                'Link_2_3': 158 / 622,
+                'Link_3_1': 0.0
             }
         )
 
-    def test_fixed_modules_count(self):
+    def test_total_links_capacity(self):
         self.assertDictEqual(
-            self.chromosome.fixedModulesPerLink(),
+            self.chromosome.totalLinksCapacity(),
             {
-                'Link_0_1': 0.0, 'Link_0_2': 2.0,
-                'Link_2_3': 2.0, 'Link_3_1': 1.0
+                'Link_0_1': 195.0, 'Link_0_2': 332.0,
+                'Link_2_3': 158.0, 'Link_3_1': 0.0
             }
         )
 
-    def test_obj_demands_diff_ceil(self):
+    def test_obj_demands_diff(self):
         self.assertDictEqual(
-            self.chromosome.calcDemands(ceil=True),
+            self.chromosome.calcDemands(),
             {
-                'Link_0_1': 0.0,
-                'Link_0_2': 717,
-                'Link_2_3': 891,
-                'Link_3_1': 427
-            }
-        )
-
-    def test_obj_demands_diff_without_ceil(self):
-        self.assertDictEqual(
-            self.chromosome.calcDemands(ceil=False),
-            {
-                'Link_0_1': 0.0,
-                'Link_0_2': 450.21395806554176,
-                'Link_2_3': 464.2030872357684,
-                'Link_3_1': 81.86510076381961
+                'Link_0_1': 427.0,
+                'Link_0_2': 290.0,
+                'Link_2_3': 464.0,
+                'Link_3_1': 0.0
             }
         )
 
     def test_obj_func_value(self):
-        self.assertEqual(
-            self.chromosome.objFunc(),
-            59.9628214606513
+        # Spare capacity (427 + 290 + 464) / 100 and 3 modules
+        self.assertAlmostEqual(self.chromosome.objFunc(), 41.81)
+
+        # 622 capacity units of every module take 623 with modularity 7
+        self.chromosome.k = 7
+        self.assertAlmostEqual(self.chromosome.objFunc(), 42.11)
+
+
+class TestLocalSearch(TestCase):
+    def setUp(self):
+        random.seed(1024)
+
+        self.network = NetworkModel(os.path.join(os.path.dirname(__file__), 'testModel.txt'))
+        self.network.parse()
+
+    def test_link_costs_sum_to_obj_func(self):
+        for singleMode in [True, False]:
+            chromosome = Chromosome(self.network, singleMode=singleMode)
+            loads = chromosome.totalLinksCapacity()
+            self.assertAlmostEqual(
+                sum(chromosome.linkCost(name, load) for name, load in loads.items()),
+                chromosome.objFunc()
+            )
+
+    def test_local_search_never_worsens(self):
+        for singleMode in [True, False]:
+            for _ in range(10):
+                chromosome = Chromosome(self.network, singleMode=singleMode)
+                before = chromosome.objFunc()
+                moves = chromosome.localSearch(maxPasses=3)
+
+                self.assertLessEqual(chromosome.objFunc(), before)
+                if moves == 0:
+                    self.assertEqual(chromosome.objFunc(), before)
+                for gene in chromosome.genes.values():
+                    self.assertAlmostEqual(sum(gene.path_choices), 1.0)
+
+    def test_local_search_independent_of_hash_seed(self):
+        # Moves are chosen by float sums over links, which must be taken in the same order in every process
+        script = (
+            'import random\n'
+            'from src.Chromosome import Chromosome\n'
+            'from src.NetworkModel import NetworkModel\n'
+            "network = NetworkModel('polska.txt')\n"
+            'network.parse()\n'
+            'random.seed(7)\n'
+            'chromosomes = [Chromosome(network, singleMode=False, k=7) for _ in range(5)]\n'
+            'print([(c.localSearch(maxPasses=5), c.pathShares().tolist()) for c in chromosomes])\n'
         )
+        root = os.path.join(os.path.dirname(__file__), '..')
+        outputs = {
+            subprocess.run([sys.executable, '-c', script], cwd=root, capture_output=True, text=True, check=True,
+                           env={**os.environ, 'PYTHONHASHSEED': seed}).stdout
+            for seed in ['0', '1', '2']
+        }
+        self.assertEqual(len(outputs), 1)
+
+
+class TestCopyOnWrite(TestCase):
+    def setUp(self):
+        random.seed(1024)
+
+        self.network = NetworkModel(os.path.join(os.path.dirname(__file__), 'testModel.txt'))
+        self.network.parse()
+
+    def choices(self, chromosome: Chromosome):
+        return {name: list(gene.path_choices) for name, gene in chromosome.genes.items()}
+
+    def test_deepcopy_is_independent(self):
+        original = Chromosome(self.network, singleMode=False)
+        before = self.choices(original)
+
+        duplicate = copy.deepcopy(original)
+        duplicate.genes['Demand_0_1'].path_choices = [0.5, 0.5]
+        duplicate.mutate(1.0)
+        self.assertDictEqual(self.choices(original), before)
+
+    def test_shallow_copy_shares_genes(self):
+        original = Chromosome(self.network, singleMode=False)
+        before = self.choices(original)
+
+        duplicate = original.shallowCopy()
+        for name in original.genes:
+            self.assertIs(duplicate.genes[name], original.genes[name])
+
+        duplicate.mutate(1.0)
+        self.assertDictEqual(self.choices(original), before)
+        for name in original.genes:
+            self.assertIsNot(duplicate.genes[name], original.genes[name])
+
+        # Original has to copy the gene before writing too
+        original.writableGene('Demand_0_1').path_choices = [0.5, 0.5]
+        self.assertNotEqual(self.choices(duplicate)['Demand_0_1'], [0.5, 0.5])
+
+    def test_hor_slice_shares_genes(self):
+        parent1 = Chromosome(self.network, singleMode=False)
+        parent2 = Chromosome(self.network, singleMode=False)
+        before1, before2 = self.choices(parent1), self.choices(parent2)
+
+        child = Chromosome.reproduce(parent1, parent2, 'hor-slice')
+        for name, gene in child.genes.items():
+            self.assertTrue(gene is parent1.genes[name] or gene is parent2.genes[name])
+
+        child.mutate(1.0)
+        parent1.mutate(1.0)
+        child.localSearch()
+        self.assertDictEqual(self.choices(parent2), before2)
+        self.assertNotEqual(self.choices(parent1), before1)
+
+    def test_lazy_genes(self):
+        index = self.network.getIndex()
+        shares = Chromosome(self.network, singleMode=False).pathShares()
+
+        lazy = Chromosome.fromShares(self.network, shares, singleMode=False)
+        duplicate = lazy.shallowCopy()
+        self.assertIs(lazy.pathShares(), shares)
+        self.assertEqual(lazy.objFunc(), duplicate.objFunc())
+
+        # Path indices don't need genes, ties go to the first path like for built genes
+        for values in [shares, np.array([0.5, 0.5, 0.2, 0.8, 1.0, 0.0])]:
+            pending = Chromosome.fromShares(self.network, values, singleMode=False)
+            built = Chromosome.fromShares(self.network, values, singleMode=False)
+            self.assertIsNotNone(built.genes)
+            self.assertListEqual(pending.pathIndices().tolist(), built.pathIndices().tolist())
+            self.assertTrue(pending.hasPendingShares())
+            self.assertFalse(built.hasPendingShares())
+
+        # Genes are built on first access, every copy builds its own
+        duplicate.mutate(1.0)
+        self.assertTrue(np.array_equal(lazy.pathShares(), shares))
+        for d, name in enumerate(index.demandNames):
+            first = index.pathOffset[d]
+            self.assertListEqual(lazy.genes[name].path_choices, shares[first:first + index.pathsCount[d]].tolist())
+            self.assertIsNot(lazy.genes[name], duplicate.genes[name])
+
+
+
+class TestFromSolution(TestCase):
+    def setUp(self):
+        random.seed(1024)
+
+        self.network = NetworkModel(os.path.join(os.path.dirname(__file__), '..', 'polska.txt'))
+        self.network.parse()
+
+    def flows(self, name: str, shares: List[float]) -> Dict[str, List[Tuple[float, List[str]]]]:
+        demand = self.network.getDemand(name)
+        return {name: [(demand.value * share, [link.name for link in path])
+                       for share, path in zip(shares, demand.paths) if share > 0]}
+
+    def test_single_mode_uses_biggest_flow(self):
+        # Even split over paths 0 and 2 must not end up on path 1
+        demandsFlows = self.flows('Demand_0_1', [0.5, 0.0, 0.5, 0.0, 0.0, 0.0, 0.0])
+        chromosome = Chromosome.fromSolution(self.network, demandsFlows, singleMode=True)
+        packed = SinglePathChromosome.fromSolution(self.network, demandsFlows)
+        self.assertListEqual(chromosome.genes['Demand_0_1'].path_choices, [1, 0, 0, 0, 0, 0, 0])
+        self.assertEqual(packed.choices[packed.index.demandPos['Demand_0_1']], 0)
+
+        chromosome = Chromosome.fromSolution(self.network, demandsFlows, singleMode=False)
+        self.assertListEqual(chromosome.genes['Demand_0_1'].path_choices, [0.5, 0.0, 0.5, 0.0, 0.0, 0.0, 0.0])
 
-    # def test_obj_func_value_2(self):
-    #     bkp = self.chromosome.genes['Demand_0_1'].modules['Link_0_2']
-    #     self.chromosome.genes['Demand_0_1'].modules['Link_0_2'] = 0.1
-    #
-    #     self.assertEqual(
-    #         self.chromosome.objFunc(),
-    #         45.65467703566077
-    #     )
-    #
-    #     self.chromosome.genes['Demand_0_1'].modules['Link_0_2'] = bkp
-    #
-    # def test_obj_func_value_3(self):
-    #     bkp = self.chromosome.genes['Demand_0_1'].modules['Link_0_2']
-    #     self.chromosome.genes['Demand_0_1'].modules['Link_0_2'] = 0.0
-    #
-    #     self.assertEqual(
-    #         self.chromosome.objFunc(),
-    #         64.32468833910937
-    #     )
-    #
-    #     self.chromosome.genes['Demand_0_1'].modules['Link_0_2'] = bkp
+    def test_zero_demand(self):
+        demandsFlows = self.flows('Demand_0_1', [0.25, 0.75, 0.0, 0.0, 0.0, 0.0, 0.0])
+        self.network.updateDemands({'Demand_0_1': 0.0})
+        demandsFlows['Demand_0_2'] = [(0.0, [link.name for link in self.network.getDemand('Demand_0_2').paths[1]])]
 
+        shares = self.network.routingShares(demandsFlows)
+        self.assertListEqual(shares['Demand_0_1'], [0.25, 0.75, 0.0, 0.0, 0.0, 0.0, 0.0])
+        self.assertNotIn('Demand_0_2', shares)
+        chromosome = Chromosome.fromSolution(self.network, demandsFlows, singleMode=False)
+        self.assertListEqual(chromosome.genes['Demand_0_1'].path_choices, [0.25, 0.75, 0.0, 0.0, 0.0, 0.0, 0.0])
@@ -0,0 +1,68 @@
+import os
+import random
+from unittest import TestCase
+
+import numpy as np
+
+import src.Decomposition as Decomposition
+from src.NetworkModel import Link, NetworkModel, Node
+
+
+class TestDecomposition(TestCase):
+    def setUp(self):
+        random.seed(1024)
+        np.random.seed(1024)
+
+        self.network = NetworkModel(os.path.join(os.path.dirname(__file__), '..', 'polska.txt'))
+        self.network.parse()
+
+    def test_partition(self):
+        parts = Decomposition.partitionDemands(self.network, 4)
+        self.assertEqual(len(parts), 4)
+        self.assertListEqual(sorted(name for part in parts for name in part), sorted(self.network.demands))
+        self.assertLessEqual(max(map(len, parts)), -(-len(self.network.demands) // 4))
+
+    def twoTriangles(self) -> NetworkModel:
+        # Two triangles without any link between them
+        network = NetworkModel('two-triangles')
+        for i in range(6):
+            network.nodes[f'N{i}'] = Node(f'N{i}', i, i)
+        for a, b in [(0, 1), (1, 2), (2, 0), (3, 4), (4, 5), (5, 3)]:
+            network.links[f'Link_{a}_{b}'] = Link(f'Link_{a}_{b}', f'N{a}', f'N{b}', [10.0], [1.0])
+        for a, b in [(0, 1), (0, 2), (3, 4), (4, 5), (3, 5)]:
+            network.addDemand(f'Demand_{a}_{b}', f'N{a}', f'N{b}', 5.0)
+        return network
+
+    def test_components(self):
+        network = self.twoTriangles()
+        parts = Decomposition.partitionDemands(network, 2)
+        self.assertListEqual(sorted(parts), [['Demand_0_1', 'Demand_0_2'], ['Demand_3_4', 'Demand_4_5', 'Demand_3_5']])
+
+    def test_components_split(self):
+        # Spare regions split the bigger component, regions never mix components
+        network = self.twoTriangles()
+        parts = Decomposition.partitionDemands(network, 3)
+        self.assertEqual(len(parts), 3)
+        self.assertIn(['Demand_0_1', 'Demand_0_2'], parts)
+        self.assertListEqual(sorted(name for part in parts for name in part), sorted(network.demands))
+
+        self.assertEqual(len(Decomposition.partitionDemands(network, 10)), 5)
+
+    def test_sub_network_scenarios(self):
+        self.network.setScenarios({'Demand_0_1': [1.0, 2.0], 'Demand_0_2': [3.0, 4.0]}, 0.5)
+        region = Decomposition.subNetwork(self.network, ['Demand_0_1', 'Demand_0_3'])
+        self.assertDictEqual(region.scenarios, {'Demand_0_1': [1.0, 2.0]})
+        self.assertEqual(region.scenarioQuantile, 0.5)
+        self.assertIsNone(Decomposition.subNetwork(self.network, ['Demand_0_3']).scenarios)
+
+    def test_solve_regions(self):
+        params = {'n': 4, 'epochs': 5, 'seed': 1}
+        merged, regions = Decomposition.solveRegions(self.network, 3, params, processes=2)
+        self.assertSetEqual(set(merged), set(self.network.demands))
+        self.assertEqual(sum(demands for demands, _ in regions), len(self.network.demands))
+        for name, flows in merged.items():
+            self.assertEqual(len(flows), 1)
+            self.assertAlmostEqual(flows[0][0], self.network.getDemand(name).value)
+
+        # Runs with the same seed give the same routing
+        self.assertDictEqual(Decomposition.solveRegions(self.network, 3, params, processes=1)[0], merged)
@@ -0,0 +1,130 @@
+import os
+import random
+import time
+from unittest import TestCase
+
+import numpy as np
+
+import src.Kernels as Kernels
+from src.Chromosome import Chromosome
+from src.NetworkModel import Link, NetworkModel, Node
+from src.SinglePathChromosome import SinglePathChromosome
+
+MODELS_DIR = os.path.join(os.path.dirname(__file__), '..')
+
+
+def syntheticModel(nodes: int, chords: int, demands: int, rng: random.Random) -> NetworkModel:
+    """
+    Create random connected network - ring of @nodes nodes with @chords additional links.
+    Demand values are multiples of module capacities now and then, so loads hit module boundaries
+    """
+    network = NetworkModel(f'synthetic-{nodes}-{chords}-{demands}')
+    names = [f'N{i}' for i in range(nodes)]
+    for name in names:
+        network.nodes[name] = Node(name, rng.uniform(14, 24), rng.uniform(49, 55))
+
+    edges = {(i, (i + 1) % nodes) for i in range(nodes)}
+    while len(edges) < nodes + chords:
+        a, b = rng.sample(range(nodes), 2)
+        if (a, b) not in edges and (b, a) not in edges:
+            edges.add((a, b))
+    for a, b in sorted(edges):
+        capacity = rng.choice([10.0, 40.0, 155.0, 622.0])
+        network.links[f'Link_{a}_{b}'] = Link(f'Link_{a}_{b}', names[a], names[b], [capacity], [capacity * 2])
+
+    while len(network.demands) < demands:
+        a, b = sorted(rng.sample(range(nodes), 2))
+        if f'Demand_{a}_{b}' in network.demands:
+            continue
+        value = rng.choice([rng.uniform(1, 500), float(rng.randint(1, 20) * 10)])
+        network.addDemand(f'Demand_{a}_{b}', names[a], names[b], value)
+    return network
+
+
+class TestDifferential(TestCase):
+    """
+    Randomized comparison of reference dict-based evaluation (Chromosome with 'python' backend)
+    and array backends, on bundled and synthetic models. Module counts have to match exactly,
+    objective values and spare capacities up to rounding errors
+    """
+
+    BACKENDS = ['numpy', 'numba']
+    # Random genomes evaluated per model and configuration
+    GENOMES = 3
+
+    def setUp(self):
+        random.seed(1024)
+        np.random.seed(1024)
+        self.timings = {}
+
+    def tearDown(self):
+        Kernels.useBackend('auto')
+        for name, seconds in self.timings.items():
+            print(f'[i] {self.id()} {name}: {seconds:.3f}s')
+
+    def timed(self, name: str, function):
+        start = time.perf_counter()
+        result = function()
+        self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+        return result
+
+    def models(self):
+        rng = random.Random(2048)
+        for fileName in ['polska.txt', 'germany50.txt']:
+            network = NetworkModel(os.path.join(MODELS_DIR, fileName))
+            network.parse()
+            yield fileName, network
+        for nodes, chords, demands in [(5, 2, 8), (12, 10, 40), (30, 25, 150)]:
+            yield f'synthetic {nodes}x{demands}', syntheticModel(nodes, chords, demands, rng)
+
+    def reference(self, chromosome: Chromosome):
+        Kernels.useBackend('python')
+        return chromosome.objFunc(), chromosome.modulesPerLink(), chromosome.calcDemands()
+
+    def compare(self, label: str, reference, objFunc: float, modules, spare):
+        refObjFunc, refModules, refSpare = reference
+        self.assertAlmostEqual(objFunc, refObjFunc, delta=1e-9 * max(1.0, abs(refObjFunc)), msg=label)
+        self.assertDictEqual({name: int(value) for name, value in modules.items()},
+                             {name: int(value) for name, value in refModules.items()}, msg=label)
+        for name, value in refSpare.items():
+            self.assertAlmostEqual(spare[name], value, delta=1e-6 * max(1.0, abs(value)), msg=f'{label} {name}')
+
+    def configs(self):
+        for k in [1, 3, 10]:
+            for _ in range(self.GENOMES):
+                yield k
+
+    def test_float_genome(self):
+        for modelName, network in self.models():
+            index = network.getIndex()
+            linkNames = list(network.links)
+            for singleMode in [True, False]:
+                for k in self.configs():
+                    chromosome = Chromosome(network, singleMode=singleMode, k=k)
+                    reference = self.timed(f'{modelName} reference', lambda: self.reference(chromosome))
+
+                    for backend in self.BACKENDS:
+                        Kernels.useBackend(backend)
+                        objFunc = self.timed(f'{modelName} {backend}', chromosome.objFunc)
+                        shares = chromosome.pathShares()
+                        loads = Kernels.flowLoads(index, shares)
+                        modules = np.ceil(loads / index.capacity)
+                        spare = modules * index.capacity - Kernels.linkDemands(index, shares)
+                        self.compare(f'{modelName} {backend} single={singleMode} k={k}', reference, objFunc,
+                                     dict(zip(linkNames, modules.tolist())), dict(zip(linkNames, spare.tolist())))
+
+    def test_packed_genome(self):
+        for modelName, network in self.models():
+            for k in self.configs():
+                packed = SinglePathChromosome(network, k=k)
+                chromosome = Chromosome(network, singleMode=True, k=k)
+                for name, gene in packed.genes.items():
+                    chromosome.writableGene(name).path_choices = gene.path_choices
+                reference = self.timed(f'{modelName} reference', lambda: self.reference(chromosome))
+
+                for backend in self.BACKENDS:
+                    Kernels.useBackend(backend)
+                    packed.loads = None
+                    objFunc = self.timed(f'{modelName} packed {backend}', packed.objFunc)
+                    self.compare(f'{modelName} packed {backend} k={k}', reference, objFunc,
+                                 packed.modulesPerLink(), packed.calcDemands())
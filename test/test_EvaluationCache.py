@@ -0,0 +1,63 @@
+import copy
+import os
+import random
+from unittest import TestCase
+
+from src.Chromosome import Chromosome
+from src.EvaluationCache import EvaluationCache
+from src.NetworkModel import NetworkModel
+
+
+class TestEvaluationCache(TestCase):
+    def setUp(self):
+        random.seed(1024)
+
+        self.network = NetworkModel(os.path.join(os.path.dirname(__file__), 'testModel.txt'))
+        self.network.parse()
+
+    def test_duplicates_hit(self):
+        cache = EvaluationCache(10)
+        chromosome = Chromosome(self.network)
+        duplicate = copy.deepcopy(chromosome)
+
+        self.assertEqual(cache.evaluate(chromosome), chromosome.objFunc())
+        self.assertEqual(cache.evaluate(duplicate), chromosome.objFunc())
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_lru_eviction(self):
+        cache = EvaluationCache(2)
+        chromosomes = [Chromosome(self.network, singleMode=False) for _ in range(3)]
+
+        for chromosome in chromosomes:
+            cache.evaluate(chromosome)
+        self.assertEqual(len(cache), 2)
+
+        cache.evaluate(chromosomes[0])
+        self.assertEqual((cache.hits, cache.misses), (0, 4))
+
+    def test_genome_key(self):
+        chromosome = Chromosome(self.network)
+        self.assertEqual(
+            chromosome.genomeKey(),
+            bytes(gene.path_choices.index(1) for gene in chromosome.genes.values())
+        )
+
+        chromosome = Chromosome(self.network, singleMode=False)
+        mutated = copy.deepcopy(chromosome)
+        mutated.genes['Demand_0_1'].path_choices = [0.25, 0.75]
+        self.assertNotEqual(chromosome.genomeKey(), mutated.genomeKey())
+
+    def test_evaluate_many(self):
+        cache = EvaluationCache(10)
+        chromosomes = [Chromosome(self.network, singleMode=False) for _ in range(3)]
+        cache.evaluate(chromosomes[0])
+
+        batches = []
+        def evaluator(batch):
+            batches.append(batch)
+            return [x.objFunc() for x in batch]
+
+        population = chromosomes + [copy.deepcopy(chromosomes[1])]
+        self.assertListEqual(cache.evaluateMany(population, evaluator), [x.objFunc() for x in population])
+        self.assertListEqual(batches, [chromosomes[1:]])
+        self.assertEqual((cache.hits, cache.misses), (2, 3))
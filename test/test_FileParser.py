@@ -0,0 +1,38 @@
+import os
+import tempfile
+from unittest import TestCase
+
+import src.FileParser as FileParser
+
+
+class TestSolutionFiles(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.fileName = os.path.join(self.directory.name, 'solution.xml')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        linksModules = {
+            'Link_0_1': {'capacity': 622.0, 'count': 2.0},
+            'Link_0_2': {'capacity': 0, 'count': 0},
+        }
+        demandsFlows = {
+            'Demand_0_1': [(195.0, ['Link_0_1'])],
+            'Demand_0_2': [(79.0, ['Link_0_1', 'Link_3_1']), (79.0, ['Link_0_2', 'Link_2_3'])],
+        }
+
+        FileParser.saveSolution(self.fileName, linksModules, demandsFlows)
+        self.assertEqual(FileParser.loadSolution(self.fileName), (linksModules, demandsFlows))
+
+        # Iterables of pairs are streamed the same way as dicts
+        FileParser.saveSolution(self.fileName, iter(linksModules.items()), iter(demandsFlows.items()))
+        self.assertEqual(FileParser.loadSolution(self.fileName), (linksModules, demandsFlows))
+
+    def test_unknown_tag(self):
+        with open(self.fileName, 'w') as f:
+            f.write('<solution xmlns="http://sndlib.zib.de/solution"><unknown/></solution>')
+
+        with self.assertRaises(KeyError):
+            FileParser.loadSolution(self.fileName)
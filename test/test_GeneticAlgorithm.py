@@ -0,0 +1,178 @@
+import os
+import random
+from unittest import TestCase
+
+import numpy as np
+
+import src.BatchOperators as BatchOperators
+from src.Chromosome import Chromosome
+from src.GeneticAlgorithm import RESTART_COOLDOWN, GeneticAlgorithm
+from src.NetworkModel import NetworkModel
+from src.RandomStream import RandomStream
+from src.SinglePathChromosome import SinglePathChromosome
+
+
+class TestGeneticAlgorithm(TestCase):
+    def setUp(self):
+        self.network = NetworkModel(os.path.join(os.path.dirname(__file__), 'testModel.txt'))
+        self.network.parse()
+
+    def algorithm(self, n: int = 6, epochs: int = 10, singleMode: bool = True, **kwargs) -> GeneticAlgorithm:
+        return GeneticAlgorithm(self.network, n, epochs, 0.3, singleMode, 0.5, 'exp', 'best', 1, 'avg',
+                                rng=RandomStream(1024), **kwargs)
+
+    def test_adaptive_scores_children_once(self):
+        for succession in ['best', 'tourney']:
+            genetic = self.algorithm(epochs=1, adaptive=True, cacheSize=0)
+            genetic.succession = succession
+            evaluated = []
+            evaluate = genetic.evaluate
+            genetic.evaluate = lambda chromosome: evaluated.append(chromosome) or evaluate(chromosome)
+            genetic.run(True)
+
+            # Ranking of population, children and the rest of population in succession
+            self.assertEqual(len(evaluated), 3 * genetic.n - 2, succession)
+
+    def assertElitist(self, genetic: GeneticAlgorithm):
+        # The best chromosome always survives, so the best score never gets worse
+        costs = genetic.history['cost']
+        self.assertTrue(np.all(np.diff(costs) <= 0), costs)
+        self.assertLessEqual(genetic.population[0].objFunc(), costs[-1])
+
+    def test_batched(self):
+        for singleMode, genome, kind in [(True, 'float', Chromosome), (False, 'float', Chromosome),
+                                         (True, 'packed', SinglePathChromosome)]:
+            for xoverMode in ['avg', 'vert-slice', 'hor-slice']:
+                genetic = self.algorithm(singleMode=singleMode, genome=genome, batched=True)
+                genetic.xoverMode = xoverMode
+                score = genetic.run(True)
+
+                label = f'{genome} single={singleMode} {xoverMode}'
+                self.assertEqual(len(genetic.population), genetic.n, label)
+                self.assertTrue(all(isinstance(x, kind) for x in genetic.population), label)
+                self.assertEqual(len(genetic.history), genetic.epochs, label)
+                self.assertElitist(genetic)
+                self.assertEqual(score, genetic.population[0].objFunc(), label)
+                offsets = self.network.getIndex().pathOffset
+                for chromosome in genetic.population:
+                    np.testing.assert_allclose(np.add.reduceat(chromosome.pathShares(), offsets), 1.0)
+
+                # Genome of the best chromosome is still there after another epoch
+                best = min(genetic.population, key=lambda x: x.objFunc()).genomeKey()
+                genetic.epochs = 1
+                genetic.run(True)
+                self.assertIn(best, [x.genomeKey() for x in genetic.population], label)
+
+    def test_batched_plain_random(self):
+        # Generators other than RandomStream work too, seeding them makes runs reproducible
+        for singleMode, genome in [(True, 'float'), (False, 'float'), (True, 'packed')]:
+            for xoverMode in ['avg', 'vert-slice', 'hor-slice']:
+                scores = []
+                for _ in range(2):
+                    genetic = GeneticAlgorithm(self.network, 6, 10, 0.3, singleMode, 0.5, 'exp', 'best', 1, xoverMode,
+                                               genome=genome, batched=True, rng=random.Random(1))
+                    scores.append(genetic.run(True))
+                    self.assertEqual(len(genetic.population), genetic.n)
+                self.assertEqual(scores[0], scores[1], f'{genome} single={singleMode} {xoverMode}')
+
+    def test_demands_change_during_run(self):
+        for singleMode, genome in [(True, 'float'), (False, 'float'), (True, 'packed')]:
+            self.setUp()
+            genetic = self.algorithm(epochs=5, singleMode=singleMode, genome=genome)
+            genetic.run(True)
+            for chromosome in genetic.population:
+                chromosome.linkLoads()
+
+            # Rescaled loads are the same as computed from scratch for new values
+            genetic.updateDemands({'Demand_0_1': 300.0, 'Demand_0_3': 20.0})
+            for chromosome in genetic.population:
+                recomputed = chromosome.shallowCopy()
+                recomputed.loads = None
+                np.testing.assert_allclose(chromosome.linkLoads(), recomputed.linkLoads())
+
+            self.network.addDemand('Demand_3_2', 'Wroclaw', 'Szczecin', 50.0, paths=[['Link_2_3']])
+            self.network.removeDemand('Demand_0_2')
+            genetic.syncDemands()
+            index = self.network.getIndex()
+            for chromosome in genetic.population:
+                np.testing.assert_allclose(np.add.reduceat(chromosome.pathShares(), index.pathOffset), 1.0)
+
+            label = f'{genome} single={singleMode}'
+            score = genetic.run(True)
+            self.assertEqual(len(genetic.population), genetic.n, label)
+            self.assertEqual(score, genetic.population[0].objFunc(), label)
+            self.assertNotIn('Demand_0_2', genetic.population[0].genes, label)
+            self.assertIn('Demand_3_2', genetic.population[0].genes, label)
+
+    def test_restart(self):
+        genetic = self.algorithm(n=7, restartRatio=0.5)
+        row, _ = genetic.rank(genetic.population)
+        genetic.restart(5)
+
+        # The best chromosome and the better half are kept, the rest is replaced
+        self.assertEqual(len(genetic.population), genetic.n)
+        self.assertListEqual(genetic.population[:4], row[:4])
+        self.assertTrue(all(x not in row for x in genetic.population[4:]))
+        self.assertEqual((genetic.restarts, genetic.lastRestart), (1, 5))
+
+    def test_should_restart(self):
+        genetic = self.algorithm(restartEntropy=0.5)
+        genetic.history.append(changes=0)
+        self.assertFalse(genetic.shouldRestart(RESTART_COOLDOWN - 1, 0.1))
+        self.assertTrue(genetic.shouldRestart(RESTART_COOLDOWN, 0.1))
+        self.assertFalse(genetic.shouldRestart(RESTART_COOLDOWN, 0.9))
+
+        genetic = self.algorithm(restartStall=3)
+        genetic.history.append(changes=2)
+        self.assertFalse(genetic.shouldRestart(10, 1.0))
+        genetic.history.append(changes=3)
+        self.assertTrue(genetic.shouldRestart(10, 1.0))
+        genetic.lastRestart = 9
+        self.assertFalse(genetic.shouldRestart(10, 1.0))
+
+    def test_restarts_during_run(self):
+        for genome in ['float', 'packed']:
+            genetic = self.algorithm(epochs=30, genome=genome, restartStall=3)
+            genetic.run(True)
+            self.assertGreater(genetic.restarts, 0, genome)
+            self.assertEqual(len(genetic.population), genetic.n, genome)
+            self.assertElitist(genetic)
+
+    def test_target_gap(self):
+        initial = min(x.objFunc() for x in self.algorithm().population)
+
+        # Lower bound reached right away stops the run in the first epoch
+        genetic = self.algorithm(epochs=50, lowerBound=initial, targetGap=0.0)
+        self.assertEqual(genetic.run(True), initial)
+        self.assertEqual(len(genetic.history), 1)
+        self.assertEqual(len(genetic.population), genetic.n)
+
+        genetic = self.algorithm(epochs=50, lowerBound=initial / 2, targetGap=0.6)
+        genetic.run(True)
+        self.assertEqual(len(genetic.history), 1)
+        self.assertAlmostEqual(genetic.gap(initial), 0.5)
+
+        # Unreachable gap runs all epochs
+        genetic = self.algorithm(epochs=20, lowerBound=initial / 2, targetGap=0.1)
+        genetic.run(True)
+        self.assertEqual(len(genetic.history), 20)
+
+    def test_shortest_init(self):
+        index = self.network.getIndex()
+        shortest = BatchOperators.shortestChoices(index)
+        for singleMode, genome in [(True, 'float'), (False, 'float'), (True, 'packed')]:
+            genetic = self.algorithm(singleMode=singleMode, genome=genome, init='shortest')
+            chromosomes = genetic.newChromosomes(5, 'shortest')
+            self.assertEqual(len(chromosomes), 5)
+
+            # The first one routes every demand over its shortest path, others are random
+            self.assertListEqual(chromosomes[0].pathIndices().tolist(), shortest.tolist())
+            for chromosome in chromosomes:
+                np.testing.assert_allclose(np.add.reduceat(chromosome.pathShares(), index.pathOffset), 1.0)
+            self.assertEqual(len(genetic.population), genetic.n)
+            self.assertIn(shortest.tobytes(), [np.asarray(x.pathIndices(), dtype=np.uint8).tobytes()
+                                               for x in genetic.population])
+
+        self.assertListEqual(genetic.newChromosomes(0, 'shortest'), [])
+        with self.assertRaises(ValueError):
+            self.algorithm(init='longest')
@@ -0,0 +1,71 @@
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from src.History import History
+
+
+class TestHistory(TestCase):
+    def fill(self, history: History, count: int):
+        for i in range(count):
+            history.append(cost=1000.0 - i, changes=i % 3)
+
+    def test_chunks(self):
+        history = History({'cost': 'f8', 'changes': 'i4'}, chunkSize=4)
+        self.fill(history, 10)
+
+        self.assertEqual(len(history), 10)
+        self.assertEqual(len(history.chunks['cost']), 3)
+        self.assertListEqual(history['cost'].tolist(), [1000.0 - i for i in range(10)])
+        self.assertEqual(history['changes'].dtype, np.int32)
+        self.assertEqual(history.last('cost'), 991.0)
+
+        rows = np.concatenate(list(history.iterChunks(['cost', 'changes'])))
+        self.assertListEqual(rows[:, 0].tolist(), list(range(10)))
+        self.assertListEqual(rows[:, 2].tolist(), [i % 3 for i in range(10)])
+
+    def test_memory_mapped(self):
+        with tempfile.TemporaryDirectory() as directory:
+            history = History({'cost': 'f8'}, chunkSize=4, directory=directory)
+            self.fill(history, 6)
+
+            self.assertIsInstance(history.chunks['cost'][0], np.memmap)
+            self.assertListEqual(history['cost'].tolist(), [1000.0 - i for i in range(6)])
+
+            # Flushed chunks can be read back from files
+            history.flush()
+            chunk = np.fromfile(os.path.join(directory, 'cost.1.bin'), dtype='f8')
+            self.assertListEqual(chunk.tolist(), [996.0, 995.0, 0.0, 0.0])
+
+            history.close(remove=True)
+            self.assertEqual(len(history), 0)
+            self.assertListEqual(os.listdir(directory), [])
+
+    def test_downsample(self):
+        history = History({'cost': 'f8', 'changes': 'i4'}, chunkSize=8)
+        self.fill(history, 25)
+
+        epochs, values = history.downsample('cost', maxPoints=5)
+        self.assertListEqual(epochs.tolist(), [0, 5, 10, 15, 20])
+        self.assertListEqual(values.tolist(), [996.0, 991.0, 986.0, 981.0, 976.0])
+
+        epochs, values = history.downsample('cost', maxPoints=100)
+        self.assertEqual(values.size, 25)
+
+    def test_downsample_across_chunks(self):
+        rng = np.random.default_rng(1024)
+        for count, chunkSize, maxPoints in [(1000, 64, 7), (999, 100, 10), (130, 13, 3), (5, 2, 1)]:
+            history = History({'cost': 'f8'}, chunkSize=chunkSize)
+            values = rng.uniform(0, 100, count)
+            for value in values:
+                history.append(cost=value)
+
+            # Buckets of whole series reduced at once
+            bucket = -(-count // maxPoints)
+            padded = np.pad(values, (0, -count % bucket), mode='edge').reshape(-1, bucket)
+            for reduce in [np.min, np.max]:
+                epochs, points = history.downsample('cost', maxPoints, reduce)
+                self.assertListEqual(epochs.tolist(), list(range(0, count, bucket)))
+                np.testing.assert_array_equal(points, reduce(padded, axis=1))
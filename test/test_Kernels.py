@@ -0,0 +1,50 @@
+import os
+import random
+from unittest import TestCase
+
+import numpy as np
+
+import src.Kernels as Kernels
+from src.Chromosome import Chromosome
+from src.NetworkModel import NetworkModel
+from src.SinglePathChromosome import SinglePathChromosome
+
+
+class TestKernels(TestCase):
+    def setUp(self):
+        random.seed(1024)
+        np.random.seed(1024)
+
+        self.network = NetworkModel(os.path.join(os.path.dirname(__file__), 'testModel.txt'))
+        self.network.parse()
+
+    def tearDown(self):
+        Kernels.useBackend('auto')
+
+    def evaluate(self, chromosome, backend: str) -> float:
+        Kernels.useBackend(backend)
+        return chromosome.objFunc()
+
+    def test_backends_identical_to_reference(self):
+        for singleMode in [True, False]:
+            for k in [1, 7]:
+                chromosome = Chromosome(self.network, singleMode=singleMode, k=k)
+                reference = self.evaluate(chromosome, 'python')
+
+                for backend in ['numpy', 'numba']:
+                    self.assertEqual(self.evaluate(chromosome, backend), reference)
+
+    def test_packed_loads(self):
+        chromosome = SinglePathChromosome(self.network)
+        index = self.network.getIndex()
+        shares = np.zeros(index.totalPathsCount())
+        shares[index.pathOffset + chromosome.choices] = 1
+
+        for backend in ['numpy', 'numba']:
+            Kernels.useBackend(backend)
+            loads = Kernels.singlePathLoads(index, chromosome.choices)
+            self.assertListEqual(loads.tolist(), Kernels.flowLoads(index, shares).tolist())
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            Kernels.useBackend('fortran')
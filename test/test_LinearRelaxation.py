@@ -0,0 +1,47 @@
+import os
+import random
+from unittest import TestCase, skipIf
+
+import numpy as np
+
+from src.Chromosome import Chromosome
+from src.NetworkModel import NetworkModel
+from src.SinglePathChromosome import SinglePathChromosome
+
+try:
+    from src.LinearRelaxation import LinearRelaxation
+    import scipy
+except ImportError:
+    scipy = None
+
+
+@skipIf(scipy is None, 'scipy module is not installed')
+class TestLinearRelaxation(TestCase):
+    def setUp(self):
+        random.seed(1024)
+
+        self.network = NetworkModel(os.path.join(os.path.dirname(__file__), 'testModel.txt'))
+        self.network.parse()
+
+    def test_lower_bound(self):
+        for k in [1, 7]:
+            relaxation = LinearRelaxation(self.network, k)
+            bound = relaxation.solve()
+            for _ in range(20):
+                self.assertLessEqual(bound, Chromosome(self.network, singleMode=False, k=k).objFunc() + 1e-9)
+
+    def test_exact_single_mode(self):
+        relaxation = LinearRelaxation(self.network, 3)
+        bound = relaxation.solve(exact=True)
+
+        # The model is small enough to check every routing
+        index = self.network.getIndex()
+        best = float('inf')
+        for code in range(2 ** index.demandsCount()):
+            chromosome = SinglePathChromosome(self.network, 3, _skipGen=True)
+            chromosome.choices = np.array([(code >> d) & 1 for d in range(index.demandsCount())], dtype=np.uint8)
+            best = min(best, chromosome.objFunc())
+
+        seed = SinglePathChromosome.fromSolution(self.network, relaxation.demandsFlows(True), 3)
+        self.assertAlmostEqual(bound, best)
+        self.assertAlmostEqual(seed.objFunc(), best)
@@ -1,11 +1,14 @@
+import os
 from unittest import TestCase
 
+from src.Chromosome import Chromosome
 from src.NetworkModel import NetworkModel, Node, Link, Demand
+from src.SinglePathChromosome import SinglePathChromosome
 
 
 class TestNetworkModel(TestCase):
     def test_parse(self):
-        network = NetworkModel('./testModel.txt')
+        network = NetworkModel(os.path.join(os.path.dirname(__file__), 'testModel.txt'))
         network.parse()
 
         expectedNodes = {
@@ -38,3 +41,48 @@ class TestNetworkModel(TestCase):
         self.assertDictEqual(network.nodes, expectedNodes, "Incorrect nodes list")
         self.assertDictEqual(network.links, expectedLinks, "Incorrect links list")
         self.assertDictEqual(network.demands, expectedDemands, "Incorrect demands list")
+
+    def test_routing_shares(self):
+        network = NetworkModel(os.path.join(os.path.dirname(__file__), 'testModel.txt'))
+        network.parse()
+
+        shares = network.routingShares({
+            'Demand_0_1': [(195.0, ['Link_0_1'])],
+            'Demand_0_2': [(79.0, ['Link_0_1', 'Link_3_1']), (79.0, ['Link_2_3', 'Link_0_2'])],
+            'Demand_0_3': [(174.0, ['Link_0_1', 'Link_2_3'])],
+            'Demand_9_9': [(1.0, ['Link_0_1'])],
+        })
+        self.assertDictEqual(shares, {
+            'Demand_0_1': [1.0, 0.0],
+            'Demand_0_2': [0.5, 0.5],
+        })
+
+    def test_update_demands(self):
+        network = NetworkModel(os.path.join(os.path.dirname(__file__), 'testModel.txt'))
+        network.parse()
+        index = network.getIndex()
+
+        network.updateDemands({'Demand_0_2': 100.0})
+        self.assertEqual(network.getDemand('Demand_0_2').value, 100.0)
+        self.assertIs(network.getIndex(), index)
+        self.assertEqual(index.demandValue[index.demandPos['Demand_0_2']], 100.0)
+
+        network.addDemand('Demand_3_2', 'Wroclaw', 'Warsaw', 10.0, paths=[['Link_3_1']])
+        self.assertIsNot(network.getIndex(), index)
+        self.assertListEqual(network.getIndex().demandNames[-1:], ['Demand_3_2'])
+
+        network.removeDemand('Demand_0_1')
+        self.assertNotIn('Demand_0_1', network.getIndex().demandPos)
+        with self.assertRaises(ValueError):
+            network.addDemand('Demand_0_2', 'Gdansk', 'Wroclaw', 1.0)
+
+    def test_remove_last_scenario_demand(self):
+        network = NetworkModel(os.path.join(os.path.dirname(__file__), 'testModel.txt'))
+        network.parse()
+        network.setScenarios({'Demand_0_2': [100.0, 200.0]})
+
+        network.removeDemand('Demand_0_2')
+        self.assertIsNone(network.scenarios)
+        self.assertIsNone(network.getIndex().scenarioValues)
+        for chromosome in [Chromosome(network, singleMode=False), SinglePathChromosome(network)]:
+            self.assertGreater(chromosome.objFunc(), 0)
@@ -0,0 +1,50 @@
+import os
+import pickle
+import random
+from unittest import TestCase
+
+from src.GeneticAlgorithm import GeneticAlgorithm
+from src.NetworkModel import NetworkModel
+from src.RandomStream import RandomStream, numpyGenerator
+
+
+class TestRandomStream(TestCase):
+    def test_spawned_streams(self):
+        first = [stream.random() for stream in RandomStream(420).spawn(3)]
+        second = [stream.random() for stream in RandomStream(420).spawn(3)]
+
+        self.assertListEqual(first, second)
+        self.assertEqual(len(set(first)), 3)
+
+    def test_pickle(self):
+        rng = RandomStream(420)
+        rng.random()
+        rng.generator.random()
+
+        copied = pickle.loads(pickle.dumps(rng))
+        self.assertEqual(copied.random(), rng.random())
+        self.assertEqual(copied.generator.random(), rng.generator.random())
+
+    def test_numpy_generator(self):
+        rng = RandomStream(420)
+        self.assertIs(numpyGenerator(rng), rng.generator)
+
+        # Other generators seed new NumPy generator, so seeding them is enough
+        draws = [numpyGenerator(random.Random(1)).integers(0, 1000, 5).tolist() for _ in range(2)]
+        self.assertListEqual(draws[0], draws[1])
+        random.seed(1)
+        first = numpyGenerator(random).random()
+        random.seed(1)
+        self.assertEqual(numpyGenerator(random).random(), first)
+
+    def test_reproducible_runs(self):
+        network = NetworkModel(os.path.join(os.path.dirname(__file__), 'testModel.txt'))
+        network.parse()
+
+        for singleMode, genome in [(True, 'packed'), (True, 'float'), (False, 'float')]:
+            results = [
+                GeneticAlgorithm(network, 5, 10, 0.3, singleMode, 0.5, 'exp', 'best', 1, 'avg',
+                                 genome=genome, rng=RandomStream(7)).run(True)
+                for _ in range(2)
+            ]
+            self.assertEqual(results[0], results[1])
@@ -0,0 +1,49 @@
+import os
+import random
+from unittest import TestCase
+
+import numpy as np
+
+from src.Chromosome import Chromosome
+from src.NetworkModel import NetworkModel
+from src.Reduction import Reduction
+from src.SinglePathChromosome import SinglePathChromosome
+
+
+class TestReduction(TestCase):
+    def setUp(self):
+        random.seed(1024)
+        np.random.seed(1024)
+
+        self.network = NetworkModel(os.path.join(os.path.dirname(__file__), 'testModel.txt'))
+        self.network.parse()
+
+        # Copy of existing demand between the same nodes, with one more path which is a
+        # superset of another one and a duplicate path
+        demand = self.network.getDemand('Demand_0_2')
+        paths = [[link.name for link in path] for path in demand.paths]
+        extra = sorted(paths, key=len)[0] + [link for link in self.network.links if link not in paths[0]][:1]
+        self.network.addDemand('Copy_0_2', demand.source, demand.target, 30.0, paths + [extra, paths[0]])
+
+    def test_reduce(self):
+        reduction = Reduction(self.network)
+        self.assertEqual(reduction.prunedPaths, 2)
+        self.assertListEqual(reduction.groups['Demand_0_2'], ['Demand_0_2', 'Copy_0_2'])
+        self.assertNotIn('Copy_0_2', reduction.reduced.demands)
+        self.assertEqual(reduction.reduced.getDemand('Demand_0_2').value,
+                         self.network.getDemand('Demand_0_2').value + 30.0)
+
+    def test_expand(self):
+        reduction = Reduction(self.network)
+        for _ in range(10):
+            chromosome = Chromosome(reduction.reduced, singleMode=False, k=3)
+            expanded = reduction.expand(chromosome)
+            self.assertIs(expanded.network, self.network)
+            self.assertAlmostEqual(expanded.objFunc(), chromosome.objFunc())
+
+        reduction = Reduction(self.network, mergeDemands=False)
+        for _ in range(10):
+            packed = SinglePathChromosome(reduction.reduced, k=3)
+            expanded = reduction.expand(packed)
+            np.testing.assert_array_equal(expanded.linkLoads(), packed.linkLoads())
+            self.assertEqual(expanded.objFunc(), packed.objFunc())
@@ -0,0 +1,48 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from src.ResultsStore import ResultsStore
+
+
+class TestResultsStore(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = ResultsStore(os.path.join(self.directory.name, 'results.db'))
+        self.model = ResultsStore.modelHash(os.path.join(os.path.dirname(__file__), 'testModel.txt'))
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def test_scores(self):
+        params = {'n': 10, 'selection': 'exp'}
+        self.store.add(self.model, params, 0, 100.0)
+        self.store.add(self.model, params, 1, 90.0)
+        self.store.add(self.model, {'n': 20, 'selection': 'exp'}, 0, 80.0)
+
+        # Order of parameters doesn't matter
+        self.assertDictEqual(self.store.scores(self.model, {'selection': 'exp', 'n': 10}), {0: 100.0, 1: 90.0})
+        self.assertDictEqual(self.store.scores('other', params), {})
+        self.assertDictEqual(self.store.best(self.model), {'params': {'n': 20, 'selection': 'exp'}, 'score': 80.0})
+
+    def test_aggregate(self):
+        for run, score in enumerate([10.0, 20.0, 30.0]):
+            self.store.add(self.model, {'n': 10, 'selection': 'exp'}, run, score)
+            self.store.add(self.model, {'n': 10, 'selection': 'rand'}, run, score * 2)
+
+        rows = self.store.aggregate(self.model, 'selection', quantiles=(0.5,))
+        self.assertListEqual(rows, [['exp', 3, 20.0, 20.0], ['rand', 3, 40.0, 40.0]])
+
+    def test_problem_variants(self):
+        # Multi mode and other modularity give scores on different scales
+        for run, score in enumerate([10.0, 20.0]):
+            self.store.add(self.model, {'selection': 'exp', 'singleMode': True, 'modularity': 1}, run, score)
+            self.store.add(self.model, {'selection': 'rand', 'singleMode': False, 'modularity': 1}, run, score / 10)
+            self.store.add(self.model, {'selection': 'rand', 'singleMode': True, 'modularity': 7}, run, score / 5)
+
+        where = {'singleMode': True, 'modularity': 1}
+        self.assertListEqual(self.store.aggregate(self.model, 'selection', (0.5,), where), [['exp', 2, 15.0, 15.0]])
+        self.assertEqual(self.store.best(self.model, where)['params']['selection'], 'exp')
+        self.assertEqual(self.store.best(self.model, {'singleMode': False})['score'], 1.5)
+        self.assertIsNone(self.store.best(self.model, {'modularity': 3}))
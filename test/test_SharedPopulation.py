@@ -0,0 +1,35 @@
+import os
+import random
+from unittest import TestCase
+
+import numpy as np
+
+from src.Chromosome import Chromosome
+from src.NetworkModel import NetworkModel
+from src.SharedPopulation import SharedPopulation
+from src.SinglePathChromosome import SinglePathChromosome
+
+
+class TestSharedPopulation(TestCase):
+    def setUp(self):
+        random.seed(1024)
+        np.random.seed(1024)
+
+        self.network = NetworkModel(os.path.join(os.path.dirname(__file__), 'testModel.txt'))
+        self.network.parse()
+
+    def test_packed(self):
+        population = [SinglePathChromosome(self.network, k=3) for _ in range(7)]
+        shared = SharedPopulation(self.network, 3, True, 3, workers=2)
+        try:
+            self.assertListEqual(shared.evaluate(population), [x.objFunc() for x in population])
+        finally:
+            shared.close()
+
+    def test_float(self):
+        population = [Chromosome(self.network, singleMode=False, k=3) for _ in range(7)]
+        shared = SharedPopulation(self.network, 4, False, 3, workers=2)
+        try:
+            self.assertListEqual(shared.evaluate(population), [x.objFunc() for x in population])
+        finally:
+            shared.close()
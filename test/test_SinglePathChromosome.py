@@ -0,0 +1,159 @@
+import copy
+import os
+import random
+from unittest import TestCase
+
+import numpy as np
+
+from src.Chromosome import Chromosome
+from src.NetworkModel import NetworkModel
+from src.SinglePathChromosome import SinglePathChromosome
+
+
+class TestSinglePathChromosome(TestCase):
+    def setUp(self):
+        random.seed(1024)
+        np.random.seed(1024)
+
+        self.network = NetworkModel(os.path.join(os.path.dirname(__file__), 'testModel.txt'))
+        self.network.parse()
+
+    def toChromosome(self, packed: SinglePathChromosome) -> Chromosome:
+        chromosome = Chromosome(self.network, singleMode=True, k=packed.k)
+        for name, gene in packed.genes.items():
+            chromosome.genes[name].path_choices = gene.path_choices
+        return chromosome
+
+    def test_same_evaluation_as_chromosome(self):
+        for k in [1, 7]:
+            for _ in range(10):
+                packed = SinglePathChromosome(self.network, k=k)
+                reference = self.toChromosome(packed)
+
+                self.assertEqual(packed.objFunc(), reference.objFunc())
+                self.assertDictEqual(packed.modulesPerLink(), reference.modulesPerLink())
+                self.assertDictEqual(packed.calcDemands(), reference.calcDemands())
+                self.assertDictEqual(packed.totalLinksCapacity(), reference.totalLinksCapacity())
+
+    def test_reproduce(self):
+        parent1 = SinglePathChromosome(self.network)
+        parent2 = SinglePathChromosome(self.network)
+        parent1.choices[:] = [0, 1, 0]
+        parent2.choices[:] = [1, 1, 1]
+
+        child = SinglePathChromosome.reproduce(parent1, parent2, 'hor-slice')
+        self.assertEqual(child.choices.dtype, np.uint8)
+        for i, choice in enumerate(child.choices):
+            self.assertIn(choice, [parent1.choices[i], parent2.choices[i]])
+
+        # round() of 0.5 goes to the nearest even number, as in Gene.normalize
+        child = SinglePathChromosome.reproduce(parent1, parent2, 'avg')
+        self.assertListEqual(child.choices.tolist(), [0, 1, 0])
+
+        with self.assertRaises(ValueError):
+            SinglePathChromosome.reproduce(parent1, parent2, 'unknown')
+
+    def test_mutate(self):
+        chromosome = SinglePathChromosome(self.network)
+        original = copy.deepcopy(chromosome)
+
+        chromosome.mutate(0.0)
+        self.assertListEqual(chromosome.choices.tolist(), original.choices.tolist())
+
+        for _ in range(20):
+            chromosome.mutate(1.0)
+            self.assertTrue(np.all(chromosome.choices < self.network.getIndex().pathsCount))
+
+    def test_local_search(self):
+        chromosome = SinglePathChromosome(self.network)
+        before = chromosome.objFunc()
+        chromosome.localSearch(maxPasses=3)
+        self.assertLessEqual(chromosome.objFunc(), before)
+
+    def test_path_entropy(self):
+        index = self.network.getIndex()
+        packed = SinglePathChromosome(self.network)
+        self.assertTrue(np.array_equal(packed.pathIndices(), self.toChromosome(packed).pathIndices()))
+
+        same = np.stack([packed.pathIndices()] * 4)
+        self.assertTrue(np.array_equal(index.pathEntropy(same), np.zeros(index.demandsCount())))
+
+        # Every path chosen equally often gives the maximum entropy
+        spread = np.stack([np.minimum(i, index.pathsCount - 1) for i in range(2)])
+        expected = np.where(index.pathsCount > 1, 1.0, 0.0)
+        self.assertTrue(np.allclose(index.pathEntropy(spread), expected))
+
+    def test_demand_changes(self):
+        packed = SinglePathChromosome(self.network, k=3)
+        packed.objFunc()
+
+        index = self.network.getIndex()
+        demands = np.array([index.demandPos['Demand_0_2']])
+        deltas = np.array([40.0])
+        self.network.updateDemands({'Demand_0_2': self.network.getDemand('Demand_0_2').value + 40.0})
+        packed.rescaleLoads(demands, deltas)
+        self.assertEqual(packed.objFunc(), self.toChromosome(packed).objFunc())
+
+        before = dict(zip(index.demandNames, packed.choices.tolist()))
+        self.network.removeDemand('Demand_0_1')
+        packed.syncDemands()
+        after = dict(zip(self.network.getIndex().demandNames, packed.choices.tolist()))
+        self.assertDictEqual(after, {name: before[name] for name in after})
+        self.assertEqual(packed.objFunc(), self.toChromosome(packed).objFunc())
+
+    def test_scenarios(self):
+        packed = SinglePathChromosome(self.network, k=3)
+        reference = self.toChromosome(packed)
+        names = list(self.network.demands)
+        nominal = [self.network.getDemand(name).value for name in names]
+        loads = packed.linkLoads().copy()
+
+        # Single scenario equal to demand values plans the same capacity
+        self.network.setScenarios({name: [value] for name, value in zip(names, nominal)})
+        packed.loads = None
+        np.testing.assert_allclose(packed.linkLoads(), loads)
+        np.testing.assert_allclose(reference.linkLoads(), loads)
+
+        # Worst case is the maximum of loads computed separately for each scenario
+        scenarios = {name: [value, 2 * value, value / 2] for name, value in zip(names, nominal)}
+        expected = []
+        for i in range(3):
+            self.network.setScenarios(None)
+            self.network.updateDemands({name: values[i] for name, values in scenarios.items()})
+            packed.loads = None
+            expected.append(packed.linkLoads())
+        self.network.updateDemands(dict(zip(names, nominal)))
+
+        self.network.setScenarios(scenarios)
+        packed.loads = None
+        np.testing.assert_allclose(packed.linkLoads(), np.max(expected, axis=0))
+        self.assertAlmostEqual(packed.objFunc(), reference.objFunc())
+        self.assertDictEqual(packed.modulesPerLink(), reference.modulesPerLink())
+
+        self.network.setScenarios(scenarios, quantile=0.5)
+        packed.loads = None
+        np.testing.assert_allclose(packed.linkLoads(), np.median(expected, axis=0))
+
+        with self.assertRaises(KeyError):
+            self.network.setScenarios({'Unknown': [1.0]})
+
+    def test_scenarios_update_unlisted_demand(self):
+        packed = SinglePathChromosome(self.network, k=3)
+        names = list(self.network.demands)
+        listed, unlisted = names[1:], names[0]
+        self.network.setScenarios({name: [self.network.getDemand(name).value, 1.0] for name in listed})
+        before = packed.objFunc()
+
+        # Demand missing from scenarios follows its new value in all scenarios
+        index = self.network.getIndex()
+        value = self.network.getDemand(unlisted).value + 500
+        delta = np.array([500.0])
+        self.network.updateDemands({unlisted: value})
+        packed.rescaleLoads(np.array([index.demandPos[unlisted]]), delta)
+        np.testing.assert_allclose(index.scenarioValues[:, index.demandPos[unlisted]], [value, value])
+
+        fresh = copy.deepcopy(packed)
+        fresh.loads = None
+        self.assertNotEqual(packed.objFunc(), before)
+        self.assertAlmostEqual(packed.objFunc(), fresh.objFunc())
+        self.assertAlmostEqual(packed.objFunc(), self.toChromosome(packed).objFunc())
@@ -0,0 +1,85 @@
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import src.SolverService as SolverService
+
+TEST_MODEL = os.path.join(os.path.dirname(__file__), 'testModel.txt')
+
+
+class TestLoadModel(TestCase):
+    def test_cache_follows_mtime(self):
+        with tempfile.TemporaryDirectory() as tempDir:
+            fileName = os.path.join(tempDir, 'model.txt')
+            shutil.copy(TEST_MODEL, fileName)
+
+            network = SolverService.loadModel(fileName)
+            self.assertIs(SolverService.loadModel(fileName), network)
+
+            # Changed file is parsed again
+            mtime = os.path.getmtime(fileName)
+            os.utime(fileName, (mtime + 10, mtime + 10))
+            reloaded = SolverService.loadModel(fileName)
+            self.assertIsNot(reloaded, network)
+            self.assertIs(SolverService.loadModel(fileName), reloaded)
+
+
+class TestSolverService(TestCase):
+    async def request(self, address, message):
+        """
+        Send single request and return all events up to its result
+        """
+        reader, writer = await asyncio.open_connection(*address)
+        writer.write(json.dumps(message).encode() + b'\n')
+        await writer.drain()
+
+        events = []
+        while line := await reader.readline():
+            events.append(json.loads(line))
+            if events[-1]['event'] in ['result', 'error', 'rejected', 'status']:
+                break
+        writer.close()
+        return events
+
+    async def session(self):
+        service = SolverService.SolverService(workers=1, queueSize=4)
+        serving = asyncio.create_task(service.serve(port=0))
+        while service.address is None:
+            await asyncio.sleep(0.01)
+
+        try:
+            solved = await self.request(service.address, {
+                'model': TEST_MODEL, 'params': {'n': 4, 'epochs': 6, 'seed': 1}, 'progressEvery': 2})
+            failed = await self.request(service.address, {'model': TEST_MODEL, 'params': {'unknown': 1}})
+            missing = await self.request(service.address, {'model': TEST_MODEL + '.missing'})
+            status = await self.request(service.address, {'command': 'status'})
+        finally:
+            serving.cancel()
+            try:
+                await serving
+            except asyncio.CancelledError:
+                pass
+        return solved, failed, missing, status
+
+    def test_solve(self):
+        solved, failed, missing, status = asyncio.run(self.session())
+
+        kinds = [event['event'] for event in solved]
+        self.assertListEqual(kinds[:2], ['queued', 'started'])
+        self.assertEqual(kinds[-1], 'result')
+        progress = [event for event in solved if event['event'] == 'progress']
+        self.assertListEqual([event['epoch'] for event in progress], [0, 2, 4])
+        self.assertTrue(all(event['job'] == solved[0]['job'] for event in solved))
+
+        result = solved[-1]
+        self.assertLessEqual(result['score'], progress[-1]['best'])
+        self.assertEqual(result['totalModules'], sum(result['modulesPerLink'].values()))
+        self.assertSetEqual(set(result['pathChoices']), {'Demand_0_1', 'Demand_0_2', 'Demand_0_3'})
+
+        self.assertEqual(failed[-1]['event'], 'error')
+        self.assertIn('Unknown parameters', failed[-1]['message'])
+        self.assertListEqual([event['event'] for event in missing], ['error'])
+        self.assertDictEqual(status[0], {'event': 'status', 'queued': 0, 'running': 0, 'workers': 1})
@@ -0,0 +1,59 @@
+import os
+import random
+from unittest import TestCase
+
+import numpy as np
+
+from src.Chromosome import Chromosome
+from src.NetworkModel import NetworkModel
+from src.SinglePathChromosome import SinglePathChromosome
+from src.Survivability import SurvivabilityAnalyzer
+
+
+class TestSurvivability(TestCase):
+    def setUp(self):
+        random.seed(1024)
+        np.random.seed(1024)
+
+        self.network = NetworkModel(os.path.join(os.path.dirname(__file__), 'testModel.txt'))
+        self.network.parse()
+
+    def test_single_failures(self):
+        chromosome = SinglePathChromosome(self.network)
+        analyzer = SurvivabilityAnalyzer.fromChromosome(chromosome)
+        np.testing.assert_allclose(analyzer.loads, chromosome.linkLoads())
+
+        results = analyzer.analyze()
+        self.assertEqual(len(results), len(self.network.links))
+        for result in results:
+            failed = result['failed'][0]
+            affected = [demand for name, demand in self.network.demands.items()
+                        if failed in [link.name for link in demand.paths[chromosome.choices[
+                            self.network.getIndex().demandPos[name]]]]]
+            unroutable = [demand.name for demand in affected
+                          if all(failed in [link.name for link in path] for path in demand.paths)]
+
+            self.assertListEqual(sorted(result['unroutable']), sorted(unroutable))
+            self.assertEqual(result['rerouted'], len(affected) - len(unroutable))
+            self.assertAlmostEqual(result['lost'], sum(self.network.getDemand(name).value for name in unroutable))
+
+    def test_solution_and_workers(self):
+        chromosome = Chromosome(self.network, singleMode=False)
+        analyzer = SurvivabilityAnalyzer.fromChromosome(chromosome)
+
+        modules = chromosome.modulesPerLink()
+        linksModules = {name: {'capacity': link.module_capacity, 'count': modules[name]}
+                        for name, link in self.network.links.items()}
+        demandsFlows = {
+            name: [(demand.value * share, [link.name for link in path])
+                   for share, path in zip(chromosome.genes[name].path_choices, demand.paths) if share > 0]
+            for name, demand in self.network.demands.items()
+        }
+        loaded = SurvivabilityAnalyzer.fromSolution(self.network, linksModules, demandsFlows)
+        np.testing.assert_allclose(loaded.loads, analyzer.loads)
+        np.testing.assert_allclose(loaded.installed, analyzer.installed)
+
+        results = analyzer.analyze(failures=2)
+        links = len(self.network.links)
+        self.assertEqual(len(results), links + links * (links - 1) // 2)
+        self.assertListEqual(analyzer.analyze(failures=2, workers=2, chunkSize=5), results)
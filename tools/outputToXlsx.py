@@ -2,12 +2,14 @@
 """
 Utility for converting multiple CSV files outputted by solver
 to one XLSX file with useful formulas inserted
+Rows are streamed to the workbook (xlsxwriter constant_memory mode)
+and every CSV file is read only once
 """
 
 import argparse
 import os
 
-from typing import Dict
+from typing import Dict, List, Optional, Set, Union
 
 try:
     import xlsxwriter as xlsx
@@ -17,12 +19,39 @@ except ImportError:
     raise
 
 
-def isFloat(number: str) -> bool:
+CSV_FILES = ['summary.csv', 'path_choices.csv',
+             'cost_history.csv', 'demand_diff_per_link.csv',
+             'modules_per_link.csv', 'modules_per_link_per_demand.csv', 'links_per_demand.csv']
+
+
+def parseCell(cell: str) -> Union[float, str]:
     try:
-        float(number)
-        return True
+        return float(cell)
     except ValueError:
-        return False
+        return cell
+
+
+def readRows(fileName: str):
+    """
+    Yield cells of consecutive non-empty lines of CSV file
+    """
+    with open(fileName, 'r') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if line:
+                yield line.split(',')
+
+
+def writeRow(worksheet, y: int, row: List[str], bold, boldFirstColumn: bool = False):
+    for x, cell in enumerate(row):
+        if y == 0 or (boldFirstColumn and x == 0):
+            worksheet.write_string(y, x, cell, bold)
+        else:
+            value = parseCell(cell)
+            if isinstance(value, float):
+                worksheet.write_number(y, x, value)
+            else:
+                worksheet.write_string(y, x, value)
 
 
 def main():
@@ -31,52 +60,53 @@ def main():
                         help='Directory of containing CSV files generated by network solver')
     parser.add_argument('--output', metavar='FILE', dest='output_file', type=str, default='result.xlsx',
                         help='Output file name')
+    parser.add_argument('--values', dest='values', action='store_true',
+                        help='Write computed values to active_paths_modules sheet instead of COUNTIF formulas')
     args = parser.parse_args()
 
-    # Create new workbook and clone CSV files to it
-    workbook = xlsx.Workbook(args.output_file)
+    # Create new workbook, in constant memory mode rows are flushed to disk as soon as next row is started
+    workbook = xlsx.Workbook(args.output_file, {'constant_memory': True})
     bold = workbook.add_format({'bold': True})
-    worksheets: Dict[str, object] = {}
-
-    for fileName in ['summary.csv', 'path_choices.csv',
-                     'cost_history.csv', 'demand_diff_per_link.csv',
-                     'modules_per_link.csv', 'modules_per_link_per_demand.csv', 'links_per_demand.csv']:
-        worksheet = workbook.add_worksheet(fileName.replace('.csv', ''))
-        with open(os.path.join(args.input_dir, fileName), 'r') as f:
-            for y, line in enumerate(f.read().split('\n')):
-                for x, cell in enumerate(line.split(',')):
-                    if y == 0:
-                        # Make header row bold
-                        worksheet.write(y, x, cell, bold)
-                    else:
-                        if isFloat(cell):
-                            worksheet.write_number(y, x, float(cell))
-                        else:
-                            worksheet.write(y, x, cell)
-        worksheets[fileName] = worksheet
-
+    worksheets: Dict[str, object] = {
+        fileName: workbook.add_worksheet(fileName.replace('.csv', ''))
+        for fileName in CSV_FILES
+    }
     activePathsModules = workbook.add_worksheet('active_paths_modules')
-    activePathsModules.write('A1', 'Demand name', bold)
-
-    with open(os.path.join(args.input_dir, 'modules_per_link_per_demand.csv'), 'r') as f:
-        for y, line in enumerate(f.read().split('\n')):
-            for x, cell in enumerate(line.split(',')):
-                if y == 0 or x == 0:
-                    # Make header row and column bold
-                    activePathsModules.write(y, x, cell, bold)
-                else:
-                    # Write helper formula for computing objFunc value
-                    activePathsModules.write_formula(y, x,
-                                                     f'=IF('
-                                                        f'COUNTIF('
-                                                            f'$links_per_demand.$B{y+1}:$I{y+1}, '
-                                                            f'$modules_per_link_per_demand.{xl_col_to_name(x)}$1'
-                                                        f') > 0, '
-                                                        f'$modules_per_link_per_demand.{xl_col_to_name(x)}{y+1}, '
-                                                        f'0)')
-
     worksheets['activePathsModules'] = activePathsModules
 
+    # Links used by each demand are needed before modules per demand are processed
+    linksPerDemand: Optional[Dict[str, Set[str]]] = {} if args.values else None
+
+    for fileName in ['links_per_demand.csv'] + [name for name in CSV_FILES if name != 'links_per_demand.csv']:
+        worksheet = worksheets[fileName]
+        for y, row in enumerate(readRows(os.path.join(args.input_dir, fileName))):
+            writeRow(worksheet, y, row, bold)
+
+            if fileName == 'links_per_demand.csv' and linksPerDemand is not None and y > 0:
+                linksPerDemand[row[0]] = set(row[1:])
+            elif fileName == 'modules_per_link_per_demand.csv':
+                if y == 0:
+                    header = row
+                    writeRow(activePathsModules, y, ['Demand name'] + row[1:], bold)
+                elif linksPerDemand is not None:
+                    active = linksPerDemand.get(row[0], set())
+                    writeRow(activePathsModules, y, [row[0]] + [
+                        cell if header[x] in active else '0'
+                        for x, cell in enumerate(row) if x > 0
+                    ], bold, boldFirstColumn=True)
+                else:
+                    activePathsModules.write_string(y, 0, row[0], bold)
+                    for x in range(1, len(row)):
+                        # Write helper formula for computing objFunc value
+                        activePathsModules.write_formula(y, x,
+                                                         f'=IF('
+                                                            f'COUNTIF('
+                                                                f'$links_per_demand.$B{y+1}:$I{y+1}, '
+                                                                f'$modules_per_link_per_demand.{xl_col_to_name(x)}$1'
+                                                            f') > 0, '
+                                                            f'$modules_per_link_per_demand.{xl_col_to_name(x)}{y+1}, '
+                                                            f'0)')
+
     workbook.close()
     print('[i] Done!')
 